@@ -0,0 +1,256 @@
+# backend/aggregates.py
+
+import heapq
+import os
+import time
+from bisect import bisect_left, insort
+from collections import Counter, deque
+from datetime import datetime, timezone
+
+from dotenv import load_dotenv
+
+from backend.analytics_engine import DEFAULT_QUANTILES, heavy_hitters_list, quantile_label
+from backend.flight_store import flight_store
+from backend.heavy_hitters import SpaceSaving
+from backend.quantiles import RollingQuantiles
+
+load_dotenv()
+
+# Fare history kept for per-airline/per-route quantiles, and the size of each sketch
+PRICE_HISTORY_HOURS = float(os.getenv("PRICE_HISTORY_HOURS", "168"))
+PRICE_SKETCH_SIZE = int(os.getenv("PRICE_SKETCH_SIZE", "200"))
+
+# Keys tracked by each approximate top-K summary over the ingest history
+HEAVY_HITTER_CAPACITY = int(os.getenv("HEAVY_HITTER_CAPACITY", "1000"))
+
+# Fields the live aggregates read; a replacement that keeps all of them is not a change
+AGGREGATED_FIELDS = ("origin", "destination", "airline", "status", "price")
+
+
+class RankedCounter:
+    """
+    Counter whose keys are also bucketed by count, so most_common(n) walks only
+    the buckets holding the answer instead of sorting every key.
+    """
+
+    def __init__(self):
+        self._counts = {}
+        self._buckets = {}
+        self._levels = []
+
+    def __len__(self):
+        return len(self._counts)
+
+    def add(self, key, delta=1):
+        old = self._counts.get(key, 0)
+        new = old + delta
+        if old:
+            self._leave(key, old)
+        if new > 0:
+            self._counts[key] = new
+            self._enter(key, new)
+        else:
+            self._counts.pop(key, None)
+
+    def most_common(self, n):
+        result = []
+        for level in reversed(self._levels):
+            for key in self._buckets[level]:
+                if len(result) == n:
+                    return result
+                result.append((key, level))
+        return result
+
+    def as_dict(self):
+        return dict(self._counts)
+
+    def _enter(self, key, count):
+        bucket = self._buckets.get(count)
+        if bucket is None:
+            bucket = self._buckets[count] = {}
+            insort(self._levels, count)
+        bucket[key] = None
+
+    def _leave(self, key, count):
+        bucket = self._buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[count]
+            del self._levels[bisect_left(self._levels, count)]
+
+
+class PriceStats:
+    """
+    Running count/sum plus min/max heaps with lazy deletion, so prices can be
+    removed when a flight is replaced.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self._live = Counter()
+        self._min_heap = []
+        self._max_heap = []
+
+    def add(self, price):
+        self.count += 1
+        self.total += price
+        self._live[price] += 1
+        heapq.heappush(self._min_heap, price)
+        heapq.heappush(self._max_heap, -price)
+
+        # Drop dead entries once they outnumber live prices
+        if len(self._min_heap) > 2 * self.count + 64:
+            self._min_heap = list(self._live)
+            self._max_heap = [-p for p in self._live]
+            heapq.heapify(self._min_heap)
+            heapq.heapify(self._max_heap)
+
+    def remove(self, price):
+        if not self._live.get(price):
+            return
+        self.count -= 1
+        self.total -= price
+        self._live[price] -= 1
+        if not self._live[price]:
+            del self._live[price]
+
+    def as_dict(self):
+        if not self.count:
+            return {"avg_price": 0, "min_price": 0, "max_price": 0}
+
+        while self._min_heap[0] not in self._live:
+            heapq.heappop(self._min_heap)
+        while -self._max_heap[0] not in self._live:
+            heapq.heappop(self._max_heap)
+        return {
+            "avg_price": round(self.total / self.count, 2),
+            "min_price": self._min_heap[0],
+            "max_price": -self._max_heap[0]
+        }
+
+
+class FlightAggregates:
+    """
+    Route, airline, status and price aggregates updated per flight change.
+    Reads cost O(result size), never O(flights).
+
+    Every flight sighted for the first time, i.e. a (flight number, scheduled
+    departure) not seen within the fare window, also feeds history-wide
+    summaries that outlive the store: rolling per-airline/per-route fare
+    sketches and fixed-size Space-Saving top-K counters for routes and
+    airlines. Re-ingesting a flight does not count it again; a new price for
+    it adds just that fare to the sketches.
+    """
+
+    def __init__(self):
+        self.routes = RankedCounter()
+        self.airlines = RankedCounter()
+        self.statuses = RankedCounter()
+        self.prices = PriceStats()
+        self.price_history = {
+            by: RollingQuantiles(window_seconds=PRICE_HISTORY_HOURS * 3600, k=PRICE_SKETCH_SIZE)
+            for by in ("airline", "route")
+        }
+        self.route_hitters = SpaceSaving(HEAVY_HITTER_CAPACITY)
+        self.airline_hitters = SpaceSaving(HEAVY_HITTER_CAPACITY)
+        self.flight_count = 0
+        self.updated_at = None
+        # Flights already counted by the history summaries, oldest first
+        self._sighted = set()
+        self._sightings = deque()
+
+    def apply(self, previous, current):
+        unchanged = previous is not None and current is not None and all(
+            previous.get(field) == current.get(field) for field in AGGREGATED_FIELDS
+        )
+        if not unchanged:
+            if previous is not None:
+                self._update(previous, -1)
+            if current is not None:
+                self._update(current, 1)
+            self.updated_at = datetime.now(timezone.utc)
+        if current is not None:
+            if self._sight(current):
+                self._record(current)
+            elif not unchanged and previous is not None and previous.get("price") != current.get("price"):
+                # A repriced flight adds its new fare, not another sighting
+                self._record_price(current)
+
+    def top_routes(self, top_n=10, approximate=False):
+        if approximate:
+            return heavy_hitters_list(self.route_hitters, top_n, "route")
+        return [{"route": route, "count": count} for route, count in self.routes.most_common(top_n)]
+
+    def top_airlines(self, top_n=10):
+        return heavy_hitters_list(self.airline_hitters, top_n, "airline")
+
+    def airline_distribution(self):
+        return self.airlines.as_dict()
+
+    def price_stats(self):
+        return self.prices.as_dict()
+
+    def status_breakdown(self):
+        return self.statuses.as_dict()
+
+    def price_quantiles(self, by="airline", quantiles=DEFAULT_QUANTILES):
+        history = self.price_history[by]
+        result = {}
+        for group in history.groups():
+            sketch = history.sketch(group)
+            if sketch is not None:
+                values = sketch.quantiles(quantiles)
+                result[group] = {"count": sketch.count, **{quantile_label(q): v for q, v in zip(quantiles, values)}}
+        return result
+
+    def _update(self, flight, delta):
+        self.flight_count += delta
+        self.routes.add(_route(flight), delta)
+        self.airlines.add(flight.get("airline"), delta)
+        self.statuses.add(flight.get("status"), delta)
+
+        price = flight.get("price")
+        if price is not None:
+            if delta > 0:
+                self.prices.add(price)
+            else:
+                self.prices.remove(price)
+
+    def _record(self, flight):
+        # History summaries: once per sighted flight
+        self.route_hitters.update(_route(flight))
+        self.airline_hitters.update(flight.get("airline"))
+        self._record_price(flight)
+
+    def _record_price(self, flight):
+        price = flight.get("price")
+        if price is not None:
+            self.price_history["airline"].update(flight.get("airline"), price)
+            self.price_history["route"].update(_route(flight), price)
+
+    def _sight(self, flight, now=None):
+        """
+        Note a sighting of `flight`; True if it is the first within the fare window.
+        """
+        now = time.time() if now is None else now
+        # Forget sightings whose fares have left the window, so memory stays bounded
+        horizon = now - PRICE_HISTORY_HOURS * 3600
+        while self._sightings and self._sightings[0][0] < horizon:
+            self._sighted.discard(self._sightings.popleft()[1])
+
+        key = (flight.get("flight_number"), flight.get("departure_time"))
+        if key in self._sighted:
+            return False
+        self._sighted.add(key)
+        self._sightings.append((now, key))
+        return True
+
+
+def _route(flight):
+    return f"{flight.get('origin')} → {flight.get('destination')}"
+
+
+# ✅ Kept in step with the flight store
+flight_aggregates = FlightAggregates()
+flight_store.subscribe(flight_aggregates.apply)
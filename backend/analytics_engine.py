@@ -1,18 +1,155 @@
-def get_top_routes(flights, top_n=10):
+import numpy as np
+
+from backend.flight_frame import FlightFrame
+from backend.heavy_hitters import DEFAULT_CAPACITY, SpaceSaving
+from backend.quantiles import DEFAULT_SKETCH_SIZE, KLLSketch, exact_quantiles
+
+# Route keys are counted in a dense array while airports² stays below this
+_DENSE_ROUTE_LIMIT = 1 << 22
+
+# In "auto" mode, up to this many prices get exact quantiles instead of a sketch
+EXACT_QUANTILE_LIMIT = 10_000
+
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+def get_top_routes(flights, top_n=10, approximate=False, capacity=DEFAULT_CAPACITY):
+    """
+    Most frequent routes. approximate=True counts them in a fixed-size Space-Saving
+    summary and adds each route's overestimation bound as "error".
+    """
+    if approximate:
+        hitters = SpaceSaving(capacity)
+        hitters.extend(_group_key(f, "route") for f in _iter_rows(flights))
+        return heavy_hitters_list(hitters, top_n, "route")
+
+    if isinstance(flights, FlightFrame):
+        return _top_routes_frame(flights, top_n)
+
     from collections import Counter
     routes = [f"{f['origin']} → {f['destination']}" for f in flights]
     most_common = Counter(routes).most_common(top_n)
     return [{"route": route, "count": count} for route, count in most_common]
 
 def get_airline_distribution(flights):
+    if isinstance(flights, FlightFrame):
+        counts = np.bincount(flights.airline_codes, minlength=len(flights.airlines))
+        return {airline: int(count) for airline, count in zip(flights.airlines, counts) if count}
+
     from collections import Counter
     airlines = [f["airline"] for f in flights]
     return dict(Counter(airlines))
 
-def get_price_stats(flights):
-    prices = [f["price"] for f in flights if "price" in f]
+def get_price_stats(flights, quantiles=None, mode="auto", sketch_size=DEFAULT_SKETCH_SIZE):
+    """
+    Average/min/max price, plus "p50"-style keys for each of `quantiles` if given.
+    `mode` is "exact", "sketch" (bounded-memory KLL) or "auto" (exact for small inputs).
+    """
+    if isinstance(flights, FlightFrame):
+        prices = flights.price[flights.price_valid]
+        stats = {
+            "avg_price": round(float(prices.mean()), 2) if prices.size else 0,
+            "min_price": float(prices.min()) if prices.size else 0,
+            "max_price": float(prices.max()) if prices.size else 0
+        }
+    else:
+        prices = [f["price"] for f in flights if "price" in f]
+        stats = {
+            "avg_price": round(sum(prices) / len(prices), 2) if prices else 0,
+            "min_price": min(prices) if prices else 0,
+            "max_price": max(prices) if prices else 0
+        }
+
+    if quantiles:
+        stats.update(_quantile_stats(prices, quantiles, mode, sketch_size))
+    return stats
+
+def get_price_quantiles(flights, by="airline", quantiles=DEFAULT_QUANTILES, mode="auto",
+                        sketch_size=DEFAULT_SKETCH_SIZE):
+    """
+    Price quantiles per airline (by="airline") or per route (by="route").
+    """
+    groups = {}
+    for flight in _iter_rows(flights):
+        price = flight.get("price")
+        if price is not None:
+            groups.setdefault(_group_key(flight, by), []).append(price)
+
     return {
-        "avg_price": round(sum(prices) / len(prices), 2) if prices else 0,
-        "min_price": min(prices) if prices else 0,
-        "max_price": max(prices) if prices else 0
+        group: {"count": len(prices), **_quantile_stats(prices, quantiles, mode, sketch_size)}
+        for group, prices in groups.items()
     }
+
+def build_price_sketches(flights, by=None, sketch_size=DEFAULT_SKETCH_SIZE):
+    """
+    KLL price sketches for one batch: a single sketch when `by` is None, else one
+    per airline/route. Sketches from different batches or workers can be merged.
+    """
+    sketches = {}
+    for flight in _iter_rows(flights):
+        price = flight.get("price")
+        if price is None:
+            continue
+        group = None if by is None else _group_key(flight, by)
+        sketch = sketches.get(group)
+        if sketch is None:
+            sketch = sketches[group] = KLLSketch(sketch_size)
+        sketch.update(price)
+    return sketches.get(None, KLLSketch(sketch_size)) if by is None else sketches
+
+def heavy_hitters_list(hitters, top_n, label):
+    return [{label: key, "count": count, "error": error} for key, count, error in hitters.top(top_n)]
+
+def quantile_label(q):
+    return f"p{q * 100:g}"
+
+def _quantile_stats(prices, quantiles, mode, sketch_size):
+    if isinstance(prices, np.ndarray):
+        prices = prices.tolist()
+    if mode == "exact" or (mode == "auto" and len(prices) <= EXACT_QUANTILE_LIMIT):
+        values = exact_quantiles(prices, quantiles)
+    else:
+        sketch = KLLSketch(sketch_size)
+        sketch.extend(prices)
+        values = sketch.quantiles(quantiles)
+    return {quantile_label(q): (None if v is None else float(v)) for q, v in zip(quantiles, values)}
+
+def _group_key(flight, by):
+    if by == "route":
+        return f"{flight.get('origin')} → {flight.get('destination')}"
+    return flight.get(by)
+
+def _iter_rows(flights):
+    if not isinstance(flights, FlightFrame):
+        return flights
+    return (
+        {
+            "airline": flights.airlines[a],
+            "origin": flights.airports[o],
+            "destination": flights.airports[d],
+            "price": float(p) if valid else None,
+        }
+        for a, o, d, p, valid in zip(
+            flights.airline_codes.tolist(), flights.origin_codes.tolist(),
+            flights.destination_codes.tolist(), flights.price.tolist(), flights.price_valid.tolist()
+        )
+    )
+
+def _top_routes_frame(frame, top_n):
+    n = len(frame)
+    if n == 0:
+        return []
+
+    keys = frame.route_keys()
+    size = len(frame.airports) ** 2
+    if size <= _DENSE_ROUTE_LIMIT:
+        counts = np.bincount(keys, minlength=size)
+        first = np.full(size, n, dtype=np.int64)
+        np.minimum.at(first, keys, np.arange(n))
+        routes = np.flatnonzero(counts)
+        counts, first = counts[routes], first[routes]
+    else:
+        routes, first, counts = np.unique(keys, return_index=True, return_counts=True)
+
+    # Highest count first, ties in first-seen order (as Counter.most_common does)
+    order = np.lexsort((first, -counts))[:top_n]
+    return [{"route": frame.route_name(routes[i]), "count": int(counts[i])} for i in order]
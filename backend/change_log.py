@@ -0,0 +1,209 @@
+# backend/change_log.py
+
+import os
+import uuid
+from collections import deque
+from itertools import islice
+
+from dotenv import load_dotenv
+
+from backend.data_fetcher import current_snapshot
+from backend.flight_store import flight_store
+from backend.normalizer import RECORD_FIELDS, display, format_duration
+from backend.shared_snapshot import shared_snapshot
+
+load_dotenv()
+
+# Changes kept for readers; one further behind than this starts over with a full fetch
+CHANGE_LOG_SIZE = int(os.getenv("CHANGE_LOG_SIZE", "100000"))
+
+# Fields whose changes are sent to readers
+TRACKED_FIELDS = RECORD_FIELDS
+
+
+def changed_fields(previous, current):
+    """
+    Tracked fields whose value differs between two versions of a flight.
+    """
+    return {field: current.get(field) for field in TRACKED_FIELDS if current.get(field) != previous.get(field)}
+
+
+def describe_change(previous, current):
+    """
+    (op, flight_number, payload, before) for a store listener call, or None
+    when no tracked field changed. `before` is what the change replaced: the
+    whole flight for a remove, the earlier values of the changed fields for
+    an update, None for an upsert (there was no flight).
+    """
+    if current is None:
+        return "remove", previous["flight_number"], None, previous
+    if previous is None:
+        return "upsert", current["flight_number"], current, None
+    payload = changed_fields(previous, current)
+    if not payload:
+        return None
+    return "update", current["flight_number"], payload, {field: previous.get(field) for field in payload}
+
+
+def merge_change(earlier, op, payload, before):
+    """
+    (op, payload, base) with the same effect as the change `earlier` followed
+    by this one. `base` is the flight as it was before the first of them, as
+    far as the changes tell: None if there was none, else its values of
+    every field changed since.
+    """
+    if earlier is None:
+        return op, payload, before
+    earlier_op, earlier_payload, base = earlier
+    if base is not None and before is not None:
+        base = {**before, **base}
+    if op == "update" and earlier_op in ("upsert", "update"):
+        return earlier_op, {**earlier_payload, **payload}, base
+    return op, payload, base
+
+
+def net_change(op, payload, base):
+    """
+    (op, payload) of a merged change as it stands against its base, or None
+    when the flight ended up as it was (updated and back, removed and
+    restored unchanged, or added and removed again).
+    """
+    if base is None:
+        return None if op == "remove" else (op, payload)
+    if op == "remove":
+        return op, payload
+    # An update, or an upsert after a remove (whose base is the whole flight)
+    fields = changed_fields(base, payload) if op == "upsert" else {
+        field: value for field, value in payload.items() if base.get(field) != value
+    }
+    return ("update", fields) if fields else None
+
+
+def render_change(flight_number, op, payload):
+    if op == "upsert":
+        return {"op": op, "flight_number": flight_number, "flight": display(payload)}
+    if op == "update":
+        fields = dict(payload)
+        if "duration_minutes" in fields:
+            fields["duration"] = format_duration(fields["duration_minutes"])
+        return {"op": op, "flight_number": flight_number, "fields": fields}
+    return {"op": op, "flight_number": flight_number}
+
+
+class ChangeLog:
+    """
+    Store changes in order, each tagged with a sequence number: "upsert"
+    (a new flight, sent whole), "update" (only the tracked fields that
+    differ from the previous snapshot) and "remove". A read merges each
+    flight's changes and sends only what differs from where it started.
+
+    Readers poll since(cursor) with the cursor of their last read. A cursor
+    from before a restart, or older than the oldest entry kept, gets
+    reset=True: the reader refetches everything and continues from the new
+    cursor.
+
+    With `version` (shared-snapshot mode) cursors name snapshot versions
+    instead of sequence numbers: "{epoch}.{version}" with the deployment's
+    `epoch`, read from any worker. Changes count towards the version
+    `version()` moves to next.
+    """
+
+    def __init__(self, store, max_entries=CHANGE_LOG_SIZE, epoch=None, version=None):
+        self.max_entries = max_entries
+        # Distinguishes cursors of this process from those of an earlier one
+        self.epoch = epoch or uuid.uuid4().hex[:8]
+        self._version = version
+        # (version, seq of its last change) for each version this store held
+        self._marks = deque(maxlen=max_entries)
+        self._entries = deque(maxlen=max_entries)
+        self._seq = 0
+        store.subscribe(self.apply, replay=False)
+
+    @property
+    def cursor(self):
+        if self._version is not None:
+            return f"{self.epoch}.{self._mark()[0]}"
+        return f"{self.epoch}.{self._seq}"
+
+    def apply(self, previous, current):
+        change = describe_change(previous, current)
+        if change is None:
+            return
+        if self._version is not None:
+            # Closes the version being left before its successor's first change
+            self._mark()
+        self._seq += 1
+        self._entries.append((self._seq, *change))
+
+    def since(self, cursor=None, limit=1000):
+        """
+        Changes after `cursor`, merged per flight, at most `limit` flights:
+        {"cursor", "reset", "changes", "has_more"}. Without a cursor, only the
+        current cursor is returned.
+        """
+        if self._version is not None:
+            return self._since_version(cursor, limit)
+        seq = self._parse(cursor)
+        oldest = self._entries[0][0] if self._entries else self._seq + 1
+        if seq is None or seq < oldest - 1 or seq > self._seq:
+            return {"cursor": self.cursor, "reset": cursor is not None, "changes": [], "has_more": False}
+
+        changes, seq, has_more = self._merged(seq, self._seq, limit)
+        return {"cursor": f"{self.epoch}.{seq}", "reset": False, "changes": changes, "has_more": has_more}
+
+    def _since_version(self, cursor, limit):
+        current, end = self._mark()
+        version = self._parse(cursor)
+        if version is not None and version > current:
+            # Another worker already serves a newer version; this one catches up on its next poll
+            return {"cursor": cursor, "reset": False, "changes": [], "has_more": False}
+
+        # Only a version this store held is a known state to diff from
+        start = next((seq for marked, seq in reversed(self._marks) if marked == version), None)
+        oldest = self._entries[0][0] if self._entries else self._seq + 1
+        if start is None or start < oldest - 1:
+            return {"cursor": self.cursor, "reset": cursor is not None, "changes": [], "has_more": False}
+
+        # A partial read has no version of its own: the reader refetches (has_more) and moves on
+        changes, _, has_more = self._merged(start, end, limit)
+        return {"cursor": self.cursor, "reset": False, "changes": changes, "has_more": has_more}
+
+    def _merged(self, seq, end, limit):
+        # (rendered changes, seq of the last one merged, has_more) over entries in (seq, end]
+        oldest = self._entries[0][0] if self._entries else self._seq + 1
+        merged = {}
+        has_more = False
+        for entry_seq, op, flight_number, payload, before in islice(self._entries, seq - oldest + 1, None):
+            if entry_seq > end:
+                break
+            if len(merged) == limit and flight_number not in merged:
+                has_more = True
+                break
+            merged[flight_number] = merge_change(merged.get(flight_number), op, payload, before)
+            seq = entry_seq
+        # Flights that ended up as they were are left out
+        changes = []
+        for flight_number, change in merged.items():
+            net = net_change(*change)
+            if net is not None:
+                changes.append(render_change(flight_number, *net))
+        return changes, seq, has_more
+
+    def _mark(self):
+        version = self._version()
+        if not self._marks or self._marks[-1][0] != version:
+            self._marks.append((version, self._seq))
+        return self._marks[-1]
+
+    def _parse(self, cursor):
+        epoch, _, seq = (cursor or "").partition(".")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        return int(seq)
+
+
+# ✅ Kept in step with the flight store. In shared-snapshot mode its cursors
+# name published versions, so a reader can continue one at any worker
+change_log = ChangeLog(
+    flight_store, epoch=shared_snapshot.epoch, version=lambda: getattr(current_snapshot(), "version", 0)
+) if shared_snapshot is not None else ChangeLog(flight_store)
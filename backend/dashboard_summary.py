@@ -0,0 +1,211 @@
+# backend/dashboard_summary.py
+#
+# Everything the dashboard's KPI row, charts and bullet insights show, built
+# in one pass over a snapshot so a Streamlit rerun only formats and plots it.
+
+from collections import Counter
+from datetime import datetime, timezone
+
+import numpy as np
+
+from backend.quantiles import KLLSketch
+
+TOP_ROUTES = 10
+PRICE_BINS = 20
+
+# Values each price summary keeps at most ~3x of; rank error is about 1/k
+PRICE_SKETCH_SIZE = 1000
+
+# A price move between the first and last flight beyond this is a trend
+PRICE_TREND_THRESHOLD = 2
+
+
+def _top(counts):
+    # Most frequent key; ties go to the smallest, like pandas' mode()
+    if not counts:
+        return None, 0
+    key, count = min(counts.items(), key=lambda item: (-item[1], item[0]))
+    return key, count
+
+
+class PriceSummary:
+    """
+    Count, sum, min and max of a price stream plus a KLL sketch of it, so
+    memory stays fixed however many prices go in. While the sketch has not
+    compacted anything it holds every price and the statistics are exact.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.sketch = KLLSketch(PRICE_SKETCH_SIZE)
+
+    def add(self, price):
+        self.count += 1
+        self.total += price
+        self.min = price if self.min is None or price < self.min else self.min
+        self.max = price if self.max is None or price > self.max else self.max
+        self.sketch.update(price)
+
+    @property
+    def exact(self):
+        return self.sketch.size == self.count
+
+    def values(self):
+        """
+        (values, weights) retained by the sketch; each value stands for `weight` prices.
+        """
+        compactors = self.sketch.compactors
+        values = np.asarray([value for items in compactors for value in items], dtype=float)
+        weights = np.asarray([1 << level for level, items in enumerate(compactors) for _ in items], dtype=float)
+        return values, weights
+
+    def quartiles(self):
+        if self.exact:
+            return np.percentile(self.values()[0], (25, 50, 75))
+        return self.sketch.quantiles((0.25, 0.5, 0.75))
+
+    def histogram(self, bins):
+        values, weights = self.values()
+        counts, edges = np.histogram(values, bins=bins, range=(self.min, self.max), weights=weights)
+        return counts.astype(int), edges
+
+
+def _box_stats(prices):
+    """
+    Plotly box-plot statistics: linear quartiles, whiskers at the furthest
+    points within 1.5 IQR of the box (from the sketch once it has compacted).
+    """
+    q1, median, q3 = prices.quartiles()
+    iqr = q3 - q1
+    values = np.append(prices.values()[0], (prices.min, prices.max))
+    inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+    return {
+        "count": prices.count,
+        "min": float(prices.min),
+        "q1": round(float(q1), 2),
+        "median": round(float(median), 2),
+        "q3": round(float(q3), 2),
+        "max": float(prices.max),
+        "lower_fence": float(inside.min()),
+        "upper_fence": float(inside.max()),
+        "mean": round(prices.total / prices.count, 2),
+    }
+
+
+class SummaryBuilder:
+    """
+    Accumulates flights batch by batch (a store snapshot or an archive
+    stream), then builds the summary with result(). Memory grows with the
+    number of airlines and routes, not with the number of flights.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.airlines = Counter()
+        self.routes = Counter()
+        self._prices = PriceSummary()
+        self._airline_prices = {}
+        self._first_price = None
+        self._last_price = None
+
+    def add(self, flights):
+        airlines = self.airlines
+        routes = self.routes
+        airline_prices = self._airline_prices
+        prices = self._prices
+        for flight in flights:
+            # Older archive rows may hold NULLs where the normalizer now writes "N/A"
+            airline = flight.get("airline") or "N/A"
+            airlines[airline] += 1
+            routes[(flight.get("origin") or "N/A", flight.get("destination") or "N/A")] += 1
+            price = flight.get("price")
+            if price is not None:
+                prices.add(price)
+                group = airline_prices.get(airline)
+                if group is None:
+                    group = airline_prices[airline] = PriceSummary()
+                group.add(price)
+                if self._first_price is None:
+                    self._first_price = price
+                self._last_price = price
+        self.total += len(flights)
+        return self
+
+    def price_trend(self):
+        if self._prices.count < 2:
+            return "stable"
+        change = self._last_price - self._first_price
+        if change > PRICE_TREND_THRESHOLD:
+            return "rising"
+        if change < -PRICE_TREND_THRESHOLD:
+            return "declining"
+        return "stable"
+
+    def result(self):
+        prices = self._prices
+        avg_price = round(prices.total / prices.count, 2) if prices.count else 0
+        top_airline, top_airline_count = _top(self.airlines)
+        top_route, top_route_count = _top(self.routes)
+
+        histogram = {"edges": [], "counts": []}
+        if prices.count:
+            counts, edges = prices.histogram(PRICE_BINS)
+            histogram = {"edges": np.round(edges, 2).tolist(), "counts": counts.tolist()}
+
+        return {
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "kpis": {
+                "total_flights": self.total,
+                "avg_price": avg_price,
+                "unique_routes": len(self.routes),
+                "unique_airlines": len(self.airlines),
+            },
+            "top_airline": {"airline": top_airline, "count": top_airline_count},
+            "top_route": {
+                "origin": top_route[0] if top_route else None,
+                "destination": top_route[1] if top_route else None,
+                "count": top_route_count,
+            },
+            "price_trend": self.price_trend(),
+            "airline_counts": [
+                {"airline": airline, "count": count} for airline, count in self.airlines.most_common()
+            ],
+            "top_routes": [
+                {"origin": origin, "destination": destination, "count": count}
+                for (origin, destination), count in self.routes.most_common(TOP_ROUTES)
+            ],
+            "price_histogram": histogram,
+            "price_by_airline": [
+                {"airline": airline, **_box_stats(group)}
+                for airline, group in sorted(self._airline_prices.items())
+            ],
+            "bullet_insights": self.bullet_insights(avg_price, top_airline, top_airline_count, top_route,
+                                                    top_route_count),
+        }
+
+    def bullet_insights(self, avg_price, top_airline, top_airline_count, top_route, top_route_count):
+        if not self.total:
+            return ["No data available for insights."]
+        insights = [f"📈 There were {self.total} flights in the last week, indicating steady demand."]
+        insights.append(
+            f"✈️ {top_airline} operated the most flights ({top_airline_count}), maintaining market leadership."
+        )
+        if self._prices.count > 1:
+            insights.append(f"💡 Average ticket price is ${avg_price:.2f} and appears {self.price_trend()}.")
+        if top_route:
+            insights.append(f"📊 The busiest route is {top_route[0]}–{top_route[1]} ({top_route_count} flights).")
+        insights.append(f"🧭 {len(self.airlines)} airlines are active, supporting a competitive market.")
+        return insights
+
+
+def build_summary(batches):
+    """
+    Summary over an iterable of flight batches.
+    """
+    builder = SummaryBuilder()
+    for batch in batches:
+        builder.add(batch)
+    return builder.result()
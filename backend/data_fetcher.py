@@ -1,77 +1,249 @@
 # backend/data_fetcher.py
 
+import asyncio
 import os
-import requests
-import random
+import time
+import httpx
 from dotenv import load_dotenv
-from datetime import datetime
+
+from backend.flight_store import flight_store
+from backend.history_store import history_store
+from backend.metrics import INGEST_STAGE_DURATION, RECORDS_INGESTED, timed
+from backend.normalizer import RECORD_FIELDS, duration_minutes, format_duration, normalize_columns, parse_epoch, records
+from backend.shared_snapshot import ENCODED, shared_snapshot, wall_time
+from backend.snapshot_cache import SnapshotCache
+from backend.upstream_client import upstream
+from backend.wire_format import published_flights
 
 # Load environment variables
 load_dotenv()
 
 API_KEY = os.getenv("API_KEY")
-BASE_URL = "http://api.aviationstack.com/v1/flights"
+BASE_URL = os.getenv("AVIATIONSTACK_BASE_URL", "http://api.aviationstack.com/v1/flights")
+
+# Bulk ingestion: AviationStack serves at most 100 records per page
+INGEST_PAGE_SIZE = int(os.getenv("INGEST_PAGE_SIZE", "100"))
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", "8"))
+
+# Flights in each snapshot; more than one page is fetched through pagination
+INGEST_MAX_FLIGHTS = int(os.getenv("INGEST_MAX_FLIGHTS", "100"))
+
+# Connection pool size of the shared upstream client
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "32"))
+
+# Seconds a snapshot is served as fresh, then served stale while it refreshes
+FLIGHT_CACHE_TTL = float(os.getenv("FLIGHT_CACHE_TTL", "60"))
+FLIGHT_CACHE_STALE_TTL = float(os.getenv("FLIGHT_CACHE_STALE_TTL", "240"))
+# Seconds after a failed load during which requests get the last snapshot without trying upstream again
+FLIGHT_CACHE_ERROR_TTL = float(os.getenv("FLIGHT_CACHE_ERROR_TTL", "5"))
 
 def calculate_duration(departure_time: str, arrival_time: str) -> str:
     """
     Estimate duration in "Xh Ym" format from ISO timestamps.
     """
-    try:
-        if not departure_time or not arrival_time:
-            return "N/A"
-
-        dep = datetime.fromisoformat(departure_time.replace("Z", "+00:00"))
-        arr = datetime.fromisoformat(arrival_time.replace("Z", "+00:00"))
-        duration = arr - dep
-        hours, remainder = divmod(duration.total_seconds(), 3600)
-        minutes = remainder // 60
-        return f"{int(hours)}h {int(minutes)}m"
-    except Exception:
-        return "N/A"
-
-def fetch_flight_data(limit=50):
+    minutes = duration_minutes(parse_epoch(departure_time), parse_epoch(arrival_time))
+    return format_duration(minutes)
+
+# ======== Shared HTTP client ========
+_http_client = None
+
+async def open_http_client():
+    """
+    Create the app-lifetime HTTP client; keep-alive connections are reused across requests.
+    """
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            timeout=10,
+            limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_CONNECTIONS)
+        )
+    return _http_client
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+async def _fetch_page(client, offset, page_size):
     params = {
         'access_key': API_KEY,
-        'limit': limit
+        'limit': page_size,
+        'offset': offset
     }
+    # Rate limited, retried and circuit-broken; see backend/upstream_client.py
+    return await upstream.get(client, BASE_URL, params)
 
+def _normalize(page):
+    # Columnar: {field: list} over RECORD_FIELDS, no dict per record
+    with timed("normalize", INGEST_STAGE_DURATION, ("normalize",)):
+        columns = normalize_columns(page)
+    RECORDS_INGESTED.inc(amount=len(columns["flight_number"]))
+    return columns
+
+async def _ingest(limit):
+    client = await open_http_client()
+    if limit <= INGEST_PAGE_SIZE:
+        data = await _fetch_page(client, 0, limit)
+        columns = _normalize(data.get('data', []))
+    else:
+        columns = {field: [] for field in RECORD_FIELDS}
+        async for batch in iter_flight_batches(
+            max_flights=limit, client=client, strict=True, columnar=True, ordered=True
+        ):
+            for field, values in batch.items():
+                columns[field].extend(values)
+
+    # The store mirrors the newest snapshot and holds one record per flight;
+    # history keeps every snapshot and is written straight from the columns.
+    # Archived first: from the sync on, nothing awaits until the snapshot
+    # version moves, so a version always names what the store holds
+    await _archive(columns)
+    with timed("store", INGEST_STAGE_DURATION, ("store",)):
+        flights = flight_store.sync(records(columns))
+    return flights
+
+async def _archive(columns):
+    if history_store is None:
+        return
     try:
-        response = requests.get(BASE_URL, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-
-        # ❗ Check that the response contains expected data
-        if not isinstance(data, dict) or 'data' not in data:
-            print("❌ API response is invalid or missing 'data' key:", data)
-            return []
-
-        flights = data.get('data', [])
-        cleaned = []
-
-        for flight in flights:
-            departure = flight.get('departure', {}) or {}
-            arrival = flight.get('arrival', {}) or {}
-            airline = flight.get('airline', {}) or {}
-            aircraft = flight.get('aircraft', {}) or {}
-
-            dep_time = departure.get('scheduled')
-            arr_time = arrival.get('scheduled')
-
-            cleaned.append({
-                "flight_number": flight.get('flight', {}).get('iata', 'N/A'),
-                "airline": airline.get('name', 'N/A'),
-                "origin": departure.get('airport', 'N/A'),
-                "destination": arrival.get('airport', 'N/A'),
-                "departure_time": dep_time or "N/A",
-                "arrival_time": arr_time or "N/A",
-                "status": flight.get('flight_status', 'N/A'),
-                "price": round(random.uniform(100, 1000), 2),  # Mock price
-                "duration": calculate_duration(dep_time, arr_time),
-                "aircraft_type": aircraft.get('iata', 'N/A')
-            })
-
-        return cleaned
+        with timed("archive", INGEST_STAGE_DURATION, ("archive",)):
+            await asyncio.to_thread(history_store.append, columns)
+    except Exception as e:
+        print(f"❌ Error archiving flights: {e}")
+
+# ✅ One shared snapshot for every route, so concurrent users cost one upstream call
+_snapshot_cache = SnapshotCache(
+    _ingest, ttl=FLIGHT_CACHE_TTL, stale_ttl=FLIGHT_CACHE_STALE_TTL, min_limit=INGEST_PAGE_SIZE,
+    error_ttl=FLIGHT_CACHE_ERROR_TTL
+)
 
+async def fetch_flight_data(limit=50):
+    """
+    Up to `limit` flights of the current snapshot; while upstream is failing
+    that is the last good one, and [] only if there never was one.
+    """
+    try:
+        # Includes waiting on a load another request started
+        with timed("snapshot"):
+            return await _snapshot_cache.get(limit)
     except Exception as e:
         print(f"❌ Error fetching data: {e}")
         return []
+
+def current_snapshot():
+    return _snapshot_cache.snapshot
+
+def snapshot_cache_stats():
+    return _snapshot_cache.stats()
+
+async def refresh_snapshot():
+    """
+    Fetch a new INGEST_MAX_FLIGHTS snapshot and make it current; raises on failure.
+    In shared-snapshot mode the leader then publishes it to the other workers.
+    """
+    snapshot = await _snapshot_cache.refresh(INGEST_MAX_FLIGHTS)
+    if shared_snapshot is not None and shared_snapshot.leader:
+        with timed("publish", INGEST_STAGE_DURATION, ("publish",)):
+            name = await asyncio.to_thread(
+                shared_snapshot.publish, snapshot.flights, snapshot.version, snapshot.limit,
+                wall_time(snapshot.fetched_at)
+            )
+        # The leader serves flight bodies from the published file too
+        published_flights.install(snapshot.flights, shared_snapshot.open(name)[0].column(ENCODED))
+    return snapshot
+
+def install_snapshot(flights, encoded, version, limit, fetched_at):
+    """
+    Serve a snapshot another worker published (`encoded` is its mapped column
+    of flight JSON, `fetched_at` wall-clock time).
+    """
+    with timed("store", INGEST_STAGE_DURATION, ("store",)):
+        flights = flight_store.sync(flights)
+    published_flights.install(flights, encoded)
+    return _snapshot_cache.install(flights, limit, version, time.monotonic() - (time.time() - fetched_at))
+
+def ingest_pace():
+    """
+    Minimum seconds between scheduled refreshes that the upstream quota can sustain.
+    """
+    pages = -(-INGEST_MAX_FLIGHTS // INGEST_PAGE_SIZE)
+    return upstream.min_interval(pages)
+
+def hand_refresh_to_scheduler():
+    """
+    From now on requests only read the current snapshot; refreshes come from the scheduler.
+    """
+    _snapshot_cache.managed = True
+
+# ======== Bulk paginated ingestion ========
+async def iter_flight_batches(max_flights=None, page_size=None, concurrency=None, client=None, strict=False,
+                              columnar=False, ordered=False):
+    """
+    Walk the upstream `offset`/`pagination` fields and yield normalized batches
+    (one per page) in completion order, or in offset order when `ordered` is
+    set, with at most `concurrency` pages in flight. A failed page is skipped,
+    or raised when `strict` is set. Batches are lists of records, or
+    {field: list} columns when `columnar` is set.
+    """
+    def normalized(page):
+        columns = _normalize(page.get('data', []))
+        return columns if columnar else records(columns)
+
+    page_size = page_size or INGEST_PAGE_SIZE
+    concurrency = concurrency or INGEST_CONCURRENCY
+
+    own_client = client is None and _http_client is None
+    if client is None:
+        client = _http_client
+    if own_client:
+        client = httpx.AsyncClient(
+            timeout=10,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        )
+
+    try:
+        # First page tells us how many records exist
+        first = await _fetch_page(client, 0, page_size)
+        yield normalized(first)
+
+        total = (first.get('pagination') or {}).get('total') or len(first['data'])
+        if max_flights is not None:
+            total = min(total, max_flights)
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(offset):
+            async with semaphore:
+                return await _fetch_page(client, offset, min(page_size, total - offset))
+
+        tasks = [asyncio.ensure_future(fetch(offset)) for offset in range(page_size, total, page_size)]
+        try:
+            # Ordered: pages still download concurrently, later ones wait to be yielded
+            for next_page in (tasks if ordered else asyncio.as_completed(tasks)):
+                try:
+                    page = await next_page
+                except Exception as e:
+                    if strict:
+                        raise
+                    print(f"❌ Error fetching page: {e}")
+                    continue
+                yield normalized(page)
+        finally:
+            for task in tasks:
+                task.cancel()
+    finally:
+        if own_client:
+            await client.aclose()
+
+async def ingest_flights(max_flights=None, page_size=None, concurrency=None, client=None):
+    """
+    Bulk-ingest upstream flights into the flight store; returns how many were ingested.
+    """
+    ingested = 0
+    async for batch in iter_flight_batches(max_flights, page_size, concurrency, client, columnar=True):
+        with timed("store", INGEST_STAGE_DURATION, ("store",)):
+            flight_store.upsert_many(records(batch))
+        await _archive(batch)
+        ingested += len(batch["flight_number"])
+    return ingested
@@ -0,0 +1,98 @@
+# backend/export.py
+
+import csv
+import io
+import json
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from backend.normalizer import DISPLAY_FIELDS, display
+
+EXPORT_COLUMNS = DISPLAY_FIELDS
+
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson", "parquet": "application/vnd.apache.parquet"}
+
+PARQUET_SCHEMA = pa.schema([
+    (name, pa.float64() if name == "price" else pa.string()) for name in EXPORT_COLUMNS
+])
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Write-only file that hands back whatever was written since the last drain().
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+def _csv_batches(batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for batch in batches:
+        writer.writerows([flight.get(c) for c in EXPORT_COLUMNS] for flight in batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _ndjson_batches(batches):
+    for batch in batches:
+        lines = (json.dumps({c: flight.get(c) for c in EXPORT_COLUMNS}, ensure_ascii=False) for flight in batch)
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def _parquet_value(name, value):
+    if value is None:
+        return None
+    if name == "price":
+        return value if isinstance(value, (int, float)) else None
+    return str(value)
+
+
+def _parquet_batches(batches):
+    # One row group per batch; the footer goes out when the writer closes
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, PARQUET_SCHEMA) as writer:
+        for batch in batches:
+            table = pa.table({
+                name: pa.array([_parquet_value(name, f.get(name)) for f in batch], type=field.type)
+                for name, field in zip(EXPORT_COLUMNS, PARQUET_SCHEMA)
+            }, schema=PARQUET_SCHEMA)
+            writer.write_table(table)
+            yield sink.drain()
+    yield sink.drain()
+
+
+ENCODERS = {"csv": _csv_batches, "ndjson": _ndjson_batches, "parquet": _parquet_batches}
+
+
+def export_chunks(batches, format):
+    """
+    Encode an iterable of flight batches as `format`, one output chunk per batch,
+    so memory stays bounded by the batch size however many rows go out.
+    """
+    shown = ([display(f) for f in batch] for batch in batches)
+    for chunk in ENCODERS[format](shown):
+        if chunk:
+            yield chunk
@@ -0,0 +1,80 @@
+# backend/flight_frame.py
+
+import numpy as np
+
+
+def _encode(values, categories=None):
+    """
+    Dictionary-encode `values` into int32 codes; categories keep first-seen order.
+    """
+    lookup = {} if categories is None else {c: i for i, c in enumerate(categories)}
+    codes = np.fromiter((lookup.setdefault(v, len(lookup)) for v in values), dtype=np.int32, count=len(values))
+    return codes, list(lookup)
+
+
+class FlightFrame:
+    """
+    Columnar flights backed by NumPy arrays.
+
+    Airline, airport (shared by origin and destination) and status names are
+    stored once in a category list and referenced by int32 codes; price is a
+    float64 array with a boolean validity mask.
+    """
+
+    __slots__ = (
+        "airlines", "airports", "statuses",
+        "airline_codes", "origin_codes", "destination_codes", "status_codes",
+        "price", "price_valid",
+    )
+
+    def __init__(self, airlines, airports, statuses, airline_codes, origin_codes, destination_codes,
+                 status_codes, price, price_valid):
+        self.airlines = airlines
+        self.airports = airports
+        self.statuses = statuses
+        self.airline_codes = airline_codes
+        self.origin_codes = origin_codes
+        self.destination_codes = destination_codes
+        self.status_codes = status_codes
+        self.price = price
+        self.price_valid = price_valid
+
+    @classmethod
+    def from_flights(cls, flights):
+        return cls.from_columns({
+            name: [f.get(name) for f in flights] for name in ("airline", "origin", "destination", "status", "price")
+        })
+
+    @classmethod
+    def from_columns(cls, columns):
+        """
+        Build from a columnar batch ({field: list}, e.g. normalizer.normalize_columns).
+        """
+        airline_codes, airlines = _encode(columns["airline"])
+        origin_codes, airports = _encode(columns["origin"])
+        destination_codes, airports = _encode(columns["destination"], airports)
+        status_codes, statuses = _encode(columns["status"])
+
+        prices = columns["price"]
+        price = np.fromiter(
+            (np.nan if p is None else p for p in prices), dtype=np.float64, count=len(prices)
+        )
+        return cls(airlines, airports, statuses, airline_codes, origin_codes, destination_codes,
+                   status_codes, price, ~np.isnan(price))
+
+    def __len__(self):
+        return len(self.airline_codes)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in self.__slots__[3:])
+
+    def route_keys(self):
+        """
+        One int64 per flight identifying its (origin, destination) pair.
+        """
+        return self.origin_codes.astype(np.int64) * len(self.airports) + self.destination_codes
+
+    def route_name(self, key):
+        origin, destination = divmod(int(key), len(self.airports))
+        return f"{self.airports[origin]} → {self.airports[destination]}"
@@ -0,0 +1,247 @@
+# backend/flight_store.py
+
+import heapq
+import threading
+
+# Fields with a hash index: field name -> function that extracts the index key
+INDEXED_FIELDS = {
+    "airline": lambda f: f.get("airline"),
+    "origin": lambda f: f.get("origin"),
+    "destination": lambda f: f.get("destination"),
+    "status": lambda f: f.get("status"),
+    "route": lambda f: (f.get("origin"), f.get("destination")),
+}
+
+SORTABLE_FIELDS = (
+    "flight_number", "airline", "origin", "destination", "departure_time", "arrival_time",
+    "status", "price", "duration", "aircraft_type",
+)
+
+# Sorting by a display field uses its numeric counterpart
+SORT_KEYS = {"departure_time": "departure_ts", "arrival_time": "arrival_ts", "duration": "duration_minutes"}
+
+# Fields the free-text query matches against
+SEARCH_FIELDS = ("flight_number", "airline", "origin", "destination")
+
+
+class FlightStore:
+    """
+    In-memory flights keyed by flight number, with hash indexes on airline,
+    origin, destination and (origin, destination) route.
+
+    Every lookup is a dict access, so its cost does not grow with the store.
+    Listeners are called as listener(previous, current) on every change, with
+    None standing for "absent".
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._indexes = {name: {} for name in INDEXED_FIELDS}
+        self._listeners = []
+        self._lock = threading.RLock()
+        # Bumped on every change; lets responses be validated without hashing them
+        self.revision = 0
+        # Optional text index answering `q` (see backend.search_index)
+        self.text_index = None
+
+    def __len__(self):
+        return len(self._flights)
+
+    def __contains__(self, flight_number):
+        return flight_number in self._flights
+
+    def subscribe(self, listener, replay=True):
+        with self._lock:
+            self._listeners.append(listener)
+            if replay:
+                for flight in self._flights.values():
+                    listener(None, flight)
+
+    def upsert(self, flight):
+        flight_number = flight.get("flight_number")
+        if not flight_number or flight_number == "N/A":
+            return
+
+        with self._lock:
+            previous = self._flights.get(flight_number)
+            if previous is not None:
+                self._unindex(flight_number, previous)
+            self._flights[flight_number] = flight
+            self._index(flight_number, flight)
+            if previous is None or previous != flight:
+                self.revision += 1
+            for listener in self._listeners:
+                listener(previous, flight)
+
+    def upsert_many(self, flights):
+        with self._lock:
+            for flight in flights:
+                self.upsert(flight)
+
+    def sync(self, flights):
+        """
+        Make the store hold exactly `flights`, in their order: upsert them and
+        drop everything else. Stores synced to the same flights then list and
+        page them alike, whatever each held before.
+
+        The store holds one record per flight number; of several (the same
+        flight on several dates) the one departing last is kept, wherever it
+        comes in `flights`, so re-syncing a snapshot changes nothing. A flight
+        equal to the stored one keeps the stored record, so what is kept
+        against it (cached JSON, change-log entries) is not duplicated.
+        Returns the flights as stored.
+        """
+        with self._lock:
+            latest = {}
+            for flight in flights:
+                flight_number = flight.get("flight_number")
+                held = latest.get(flight_number)
+                if held is None or _departure(flight) >= _departure(held):
+                    latest[flight_number] = flight
+
+            kept = []
+            for flight_number, flight in latest.items():
+                stored = self._flights.get(flight_number)
+                if stored is not None and stored == flight:
+                    flight = stored
+                self.upsert(flight)
+                kept.append(flight)
+            for flight_number in [n for n in self._flights if n not in latest]:
+                self.remove(flight_number)
+            # An upsert keeps a known flight in its old place (its index
+            # buckets already follow the upserts)
+            stored = self._flights
+            self._flights = {n: stored[n] for n in latest if n in stored}
+            return [flight for flight in kept if flight.get("flight_number") in stored]
+
+    def remove(self, flight_number):
+        with self._lock:
+            previous = self._flights.pop(flight_number, None)
+            if previous is not None:
+                self._unindex(flight_number, previous)
+                self.revision += 1
+                for listener in self._listeners:
+                    listener(previous, None)
+            return previous
+
+    def clear(self):
+        with self._lock:
+            for flight in self._flights.values():
+                for listener in self._listeners:
+                    listener(flight, None)
+            self._flights = {}
+            self._indexes = {name: {} for name in INDEXED_FIELDS}
+            self.revision += 1
+
+    def get(self, flight_number):
+        return self._flights.get(flight_number)
+
+    def all(self):
+        return list(self._flights.values())
+
+    def by_airline(self, airline):
+        return self._lookup("airline", airline)
+
+    def by_origin(self, origin):
+        return self._lookup("origin", origin)
+
+    def by_destination(self, destination):
+        return self._lookup("destination", destination)
+
+    def by_route(self, origin, destination):
+        return self._lookup("route", (origin, destination))
+
+    def flight_numbers(self, index, key):
+        """
+        Live view of the flight numbers in one index bucket (no copy).
+        """
+        return self._indexes[index].get(key, {}).keys()
+
+    def query(self, airline=None, origin=None, destination=None, status=None, q=None,
+              sort=None, order="asc", page=1, page_size=50):
+        """
+        Filter, sort and paginate; returns (flights on the page, total matches).
+
+        Equality filters (and `q`, when a text index is attached) intersect the
+        index buckets, starting from the smallest; only the requested page is
+        sorted out of the matches.
+        """
+        filters = {name: value for name, value in (
+            ("airline", airline), ("origin", origin), ("destination", destination), ("status", status)
+        ) if value}
+
+        buckets = [self._indexes[name].get(value, {}) for name, value in filters.items()]
+        if q and self.text_index is not None:
+            buckets.append(self.text_index.matching_flight_numbers(q))
+
+        if buckets:
+            buckets.sort(key=len)
+            # Text matches are a set, which iterates in a per-process (hash) order
+            first = sorted(buckets[0]) if isinstance(buckets[0], set) else buckets[0]
+            flight_numbers = [n for n in first if all(n in bucket for bucket in buckets[1:])]
+        else:
+            flight_numbers = list(self._flights)
+
+        flights = self._flights
+        matches = [flights[n] for n in flight_numbers if n in flights]
+        if q and self.text_index is None:
+            needle = q.lower()
+            matches = [f for f in matches if any(needle in str(f.get(field, "")).lower() for field in SEARCH_FIELDS)]
+
+        total = len(matches)
+        start = (page - 1) * page_size
+        if sort:
+            key = _sort_key(SORT_KEYS.get(sort, sort), order == "desc")
+            if start + page_size < total // 4:
+                # Partial selection beats a full sort for early pages
+                select = heapq.nlargest if order == "desc" else heapq.nsmallest
+                matches = select(start + page_size, matches, key=key)
+            else:
+                matches = sorted(matches, key=key, reverse=order == "desc")
+        return matches[start:start + page_size], total
+
+    def _lookup(self, index, key):
+        flight_numbers = self._indexes[index].get(key, ())
+        flights = self._flights
+        return [flights[n] for n in list(flight_numbers)]
+
+    def _index(self, flight_number, flight):
+        for name, key_of in INDEXED_FIELDS.items():
+            self._indexes[name].setdefault(key_of(flight), {})[flight_number] = None
+
+    def _unindex(self, flight_number, flight):
+        for name, key_of in INDEXED_FIELDS.items():
+            index = self._indexes[name]
+            key = key_of(flight)
+            bucket = index.get(key)
+            if bucket is None:
+                continue
+            bucket.pop(flight_number, None)
+            if not bucket:
+                del index[key]
+
+
+def _departure(flight):
+    # Unknown departures rank before every known one
+    departure_ts = flight.get("departure_ts")
+    return (departure_ts is not None, departure_ts or 0)
+
+
+def _sort_key(field, descending=False):
+    # Missing values sort last in either direction. A sortable field holds
+    # numbers or text, never both: numbers compare in the second slot, text
+    # in the third (a column mixing them would order text as if it were 0)
+    missing = (-1 if descending else 1, 0, "")
+
+    def key(flight):
+        value = flight.get(field)
+        if value is None or value == "N/A":
+            return missing
+        if isinstance(value, (int, float)):
+            return (0, value, "")
+        return (0, 0, str(value))
+    return key
+
+
+# ✅ Process-wide store filled by the ingest path
+flight_store = FlightStore()
@@ -0,0 +1,112 @@
+# backend/heavy_hitters.py
+
+import heapq
+
+DEFAULT_CAPACITY = 1000
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy-hitter summary over at most `capacity` keys.
+
+    Keys are grouped into buckets by count and the smallest bucket is tracked,
+    so each update is O(1). When full, a new key replaces one from the smallest
+    bucket and inherits its count as `error`. Every reported count is within
+    [count - error, count] of the truth, and error never exceeds total/capacity,
+    so any key seen more than total/capacity times is always present.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.total = 0
+        self._counts = {}
+        self._errors = {}
+        self._buckets = {}
+        self._min = 0
+
+    def __len__(self):
+        return len(self._counts)
+
+    def __contains__(self, key):
+        return key in self._counts
+
+    @property
+    def error_bound(self):
+        """
+        Largest possible overestimate of any count.
+        """
+        return self.total // self.capacity if len(self._counts) >= self.capacity else 0
+
+    def update(self, key):
+        self.total += 1
+        count = self._counts.get(key)
+        if count is not None:
+            self._move(key, count, count + 1)
+        elif len(self._counts) < self.capacity:
+            self._counts[key] = 1
+            self._errors[key] = 0
+            self._buckets.setdefault(1, {})[key] = None
+            self._min = 1
+        else:
+            # Evict the oldest key of the smallest bucket and take over its count
+            floor = self._min
+            bucket = self._buckets[floor]
+            victim = next(iter(bucket))
+            del bucket[victim]
+            del self._counts[victim]
+            del self._errors[victim]
+            if not bucket:
+                del self._buckets[floor]
+                self._min = floor + 1
+            self._counts[key] = floor + 1
+            self._errors[key] = floor
+            self._buckets.setdefault(floor + 1, {})[key] = None
+
+    def extend(self, keys):
+        for key in keys:
+            self.update(key)
+
+    def count(self, key):
+        return self._counts.get(key, 0)
+
+    def top(self, n):
+        """
+        The n largest entries as (key, count, error), largest first.
+        """
+        best = heapq.nlargest(n, self._counts.items(), key=lambda item: item[1])
+        return [(key, count, self._errors[key]) for key, count in best]
+
+    def merge(self, other):
+        """
+        Fold in a summary built elsewhere (another shard or worker).
+        A key missing from a full summary may have been counted up to its
+        smallest count, so that is added to both its count and its error.
+        """
+        own_floor = self._min if len(self._counts) >= self.capacity else 0
+        other_floor = other._min if len(other._counts) >= other.capacity else 0
+
+        merged = {}
+        for key in self._counts.keys() | other._counts.keys():
+            count = self._counts.get(key, own_floor) + other._counts.get(key, other_floor)
+            error = self._errors.get(key, own_floor) + other._errors.get(key, other_floor)
+            merged[key] = (count, error)
+
+        kept = heapq.nlargest(self.capacity, merged.items(), key=lambda item: item[1][0])
+        self.total += other.total
+        self._counts, self._errors, self._buckets = {}, {}, {}
+        for key, (count, error) in sorted(kept, key=lambda item: item[1][0]):
+            self._counts[key] = count
+            self._errors[key] = error
+            self._buckets.setdefault(count, {})[key] = None
+        self._min = min(self._buckets) if self._buckets else 0
+        return self
+
+    def _move(self, key, old, new):
+        bucket = self._buckets[old]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[old]
+            if old == self._min:
+                self._min = new
+        self._counts[key] = new
+        self._buckets.setdefault(new, {})[key] = None
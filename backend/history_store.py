@@ -0,0 +1,157 @@
+# backend/history_store.py
+
+import os
+import sqlite3
+import threading
+import time
+from dotenv import load_dotenv
+
+from backend.normalizer import RECORD_FIELDS
+
+# Rows come back as normalized records; display strings are added at the edge
+_COLUMNS = RECORD_FIELDS
+
+# Rows are clustered on departure time, so a date range reads one contiguous
+# slice of the table (the SQLite equivalent of reading only its partitions).
+# Secondary indexes lead with the filtered column and end with departure_ts.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS flights (
+    departure_ts INTEGER NOT NULL,
+    flight_number TEXT NOT NULL,
+    airline TEXT,
+    origin TEXT,
+    destination TEXT,
+    departure_time TEXT,
+    arrival_time TEXT,
+    arrival_ts INTEGER,
+    status TEXT,
+    price REAL,
+    duration_minutes INTEGER,
+    aircraft_type TEXT,
+    ingested_at INTEGER NOT NULL,
+    PRIMARY KEY (departure_ts, flight_number)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_flights_airline ON flights (airline, departure_ts);
+CREATE INDEX IF NOT EXISTS idx_flights_route ON flights (origin, destination, departure_ts);
+CREATE INDEX IF NOT EXISTS idx_flights_destination ON flights (destination, departure_ts);
+"""
+
+_UPSERT = f"""
+INSERT INTO flights ({", ".join(_COLUMNS)}, ingested_at)
+VALUES ({", ".join("?" for _ in _COLUMNS)}, ?)
+ON CONFLICT (departure_ts, flight_number) DO UPDATE SET
+    {", ".join(f"{c} = excluded.{c}" for c in _COLUMNS if c not in ("departure_ts", "flight_number"))},
+    ingested_at = excluded.ingested_at
+"""
+
+
+class HistoryStore:
+    """
+    SQLite archive of every ingested flight, deduplicated by flight number plus
+    scheduled departure (a later sighting updates status, price, ...).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def append(self, columns):
+        """
+        Upsert a columnar batch ({field: list} over RECORD_FIELDS); returns how
+        many flights were stored (ones without a parseable scheduled departure
+        or flight number are skipped).
+        """
+        now = int(time.time())
+        rows = [
+            (*row, now) for row, departure_ts, flight_number
+            in zip(zip(*(columns[c] for c in _COLUMNS)), columns["departure_ts"], columns["flight_number"])
+            if departure_ts is not None and flight_number and flight_number != "N/A"
+        ]
+        with self._write_lock, self._connect() as conn:
+            conn.executemany(_UPSERT, rows)
+        return len(rows)
+
+    def query(self, start=None, end=None, airline=None, origin=None, destination=None, status=None, q=None,
+              limit=1000, offset=0):
+        """
+        Flights departing in [start, end) (epoch seconds) matching every given
+        filter, ordered by departure; returns (flights, total_count). `q`
+        matches a flight number prefix or text in the airline/airport names.
+        """
+        where, params = self._predicates(start, end, airline, origin, destination, status, q)
+        conn = self._connect()
+        total = conn.execute(f"SELECT COUNT(*) FROM flights {where}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM flights {where} "
+            "ORDER BY departure_ts, flight_number LIMIT ? OFFSET ?",
+            (*params, limit, offset)
+        ).fetchall()
+        return [dict(zip(_COLUMNS, row)) for row in rows], total
+
+    def iter_query(self, start=None, end=None, airline=None, origin=None, destination=None, status=None, q=None,
+                   batch_size=5000):
+        """
+        Like query() without a limit, yielding lists of up to `batch_size` flights.
+        Uses its own connection so batches can be pulled from any thread.
+        """
+        where, params = self._predicates(start, end, airline, origin, destination, status, q)
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        try:
+            cursor = conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM flights {where} ORDER BY departure_ts, flight_number", params
+            )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield [dict(zip(_COLUMNS, row)) for row in rows]
+        finally:
+            conn.close()
+
+    def count(self):
+        return self._connect().execute("SELECT COUNT(*) FROM flights").fetchone()[0]
+
+    def _predicates(self, start, end, airline, origin, destination, status=None, q=None):
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("departure_ts >= ?")
+            params.append(int(start))
+        if end is not None:
+            clauses.append("departure_ts < ?")
+            params.append(int(end))
+        equalities = (("airline", airline), ("origin", origin), ("destination", destination), ("status", status))
+        for column, value in equalities:
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if q:
+            # Same semantics as the live search index; LIKE is case-insensitive for ASCII
+            escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            clauses.append(
+                "(flight_number LIKE ? ESCAPE '\\' OR airline LIKE ? ESCAPE '\\' "
+                "OR origin LIKE ? ESCAPE '\\' OR destination LIKE ? ESCAPE '\\')"
+            )
+            params.extend([f"{escaped}%"] + [f"%{escaped}%"] * 3)
+        return ("WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def _connect(self):
+        # One connection per thread; WAL lets readers run alongside the ingest writer
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path)
+            conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+
+load_dotenv()
+
+# ✅ Shared archive; HISTORY_DB_PATH= (empty) turns history off
+HISTORY_DB_PATH = os.getenv("HISTORY_DB_PATH", "data/flight_history.sqlite3")
+history_store = HistoryStore(HISTORY_DB_PATH) if HISTORY_DB_PATH else None
@@ -0,0 +1,199 @@
+# backend/insight_cache.py
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+def digest(payload):
+    """
+    Stable content address for any JSON-serializable payload.
+    """
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class TTLCache:
+    """
+    In-memory LRU cache with a TTL, keyed by content digest.
+
+    Concurrent misses for the same key share one `factory()` call. Failed
+    calls are never cached.
+    """
+
+    def __init__(self, max_entries=256, ttl=3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, key):
+        """
+        get() that also counts towards the hit/miss stats.
+        """
+        value = self.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        self._entries[key] = (value, time.time() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        self._changed()
+
+    async def get_or_create(self, key, factory):
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(self._create(key, factory))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    def clear(self):
+        self._entries.clear()
+        self._changed()
+
+    def stats(self):
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+        }
+
+    async def _create(self, key, factory):
+        value = await factory()
+        self.set(key, value)
+        return value
+
+    def _changed(self):
+        pass
+
+
+class InsightCache(TTLCache):
+    """
+    TTLCache of generated insights. With `path` set, entries are persisted as
+    JSON and reloaded on start-up. Writes are batched: the file is rewritten
+    (off the event loop) at most once per `save_delay` seconds of changes,
+    and by flush() on shutdown.
+    """
+
+    def __init__(self, max_entries=256, ttl=3600.0, path=None, save_delay=2.0):
+        super().__init__(max_entries, ttl)
+        self.path = path
+        self.save_delay = save_delay
+        self._dirty = False
+        self._save_handle = None
+        self._saved_generation = 0
+        self._generation = 0
+        self._write_lock = threading.Lock()
+        if path:
+            self._load()
+
+    async def flush(self):
+        """
+        Write pending changes to `path` now.
+        """
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+        if not self._dirty:
+            return
+        self._dirty = False
+        self._generation += 1
+        # Listed on the loop, where entries change; written in a thread
+        rows = [[key, value, expires_at] for key, (value, expires_at) in self._entries.items()]
+        await asyncio.to_thread(self._save, rows, self._generation)
+
+    def _changed(self):
+        if not self.path:
+            return
+        self._dirty = True
+        if self._save_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop to defer to (scripts, start-up): write now
+            self._dirty = False
+            self._generation += 1
+            self._save([[key, value, expires_at] for key, (value, expires_at) in self._entries.items()],
+                       self._generation)
+            return
+        self._save_handle = loop.call_later(self.save_delay, self._save_later)
+
+    def _save_later(self):
+        self._save_handle = None
+        task = asyncio.ensure_future(self.flush())
+        # Failures are logged by _save; retrieved so asyncio does not warn
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"❌ Ignoring unreadable insight cache {self.path}: {e}")
+            return
+
+        now = time.time()
+        for key, value, expires_at in stored:
+            if expires_at > now:
+                self._entries[key] = (value, expires_at)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _save(self, rows, generation):
+        tmp_path = f"{self.path}.tmp"
+        with self._write_lock:
+            # A write that lost the race to a newer one has nothing to add
+            if generation < self._saved_generation:
+                return
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(rows, f)
+                os.replace(tmp_path, self.path)
+                self._saved_generation = generation
+            except Exception as e:
+                print(f"❌ Could not persist insight cache: {e}")
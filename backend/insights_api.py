@@ -1,16 +1,83 @@
+import asyncio
+import json
 import os
-import openai
+import time
+import httpx
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
 
+from backend.insight_cache import InsightCache, digest
+from backend.metrics import LLM_REQUEST_DURATION, LLM_TOKENS, record_stage
+from backend.normalizer import display
+
 load_dotenv()
 
-openai.api_key = os.getenv("OPENAI_API_KEY")
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+MODEL = "gpt-4"
+
+# Identical summaries are answered from here instead of calling the model again
+insight_cache = InsightCache(
+    max_entries=int(os.getenv("INSIGHT_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("INSIGHT_CACHE_TTL", "3600")),
+    path=os.getenv("INSIGHT_CACHE_PATH") or None
+)
+
+# Batch analysis: prompt+answer tokens packed into one model call, and calls in flight
+INSIGHT_BATCH_TOKEN_BUDGET = int(os.getenv("INSIGHT_BATCH_TOKEN_BUDGET", "3000"))
+INSIGHT_BATCH_CONCURRENCY = int(os.getenv("INSIGHT_BATCH_CONCURRENCY", "4"))
+# Answer tokens reserved per flight in a batch call
+TOKENS_PER_FLIGHT_ANSWER = 80
+
+_client = None
+
+async def open_openai_client():
+    """
+    Create the app-lifetime OpenAI client on a pooled keep-alive HTTP client.
+    """
+    global _client
+    if _client is None:
+        _client = AsyncOpenAI(
+            api_key=OPENAI_API_KEY,
+            http_client=httpx.AsyncClient(timeout=60, limits=httpx.Limits(max_keepalive_connections=20))
+        )
+    return _client
+
+async def close_openai_client():
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
 
-def generate_insights(flights):
+def summarize_flights(flights):
+    summary_data = f"Total flights: {len(flights)}\n"
+    # Sorted so the same flights always produce the same summary (and cache key)
+    airlines = sorted(set(f["airline"] for f in flights if f["airline"] != "N/A"))
+    summary_data += f"Airlines involved: {', '.join(airlines)}\n"
+    return summary_data
+
+async def _complete(messages, max_tokens=300):
+    client = await open_openai_client()
+    start = time.perf_counter()
+    try:
+        response = await client.chat.completions.create(
+            model=MODEL,
+            messages=messages,
+            max_tokens=max_tokens
+        )
+    except Exception:
+        LLM_REQUEST_DURATION.observe(time.perf_counter() - start, MODEL, "error")
+        raise
+    elapsed = time.perf_counter() - start
+    LLM_REQUEST_DURATION.observe(elapsed, MODEL, "ok")
+    record_stage("llm", elapsed)
+    if response.usage is not None:
+        LLM_TOKENS.inc(MODEL, "prompt", amount=response.usage.prompt_tokens)
+        LLM_TOKENS.inc(MODEL, "completion", amount=response.usage.completion_tokens)
+    return response.choices[0].message.content
+
+async def generate_insights(flights):
     try:
-        summary_data = f"Total flights: {len(flights)}\n"
-        airlines = list(set(f["airline"] for f in flights if f["airline"] != "N/A"))
-        summary_data += f"Airlines involved: {', '.join(airlines)}\n"
+        summary_data = summarize_flights(flights)
 
         prompt = (
             "You are a market analyst for the aviation industry. "
@@ -18,16 +85,108 @@ def generate_insights(flights):
             f"{summary_data}\n\n"
             "Give a concise summary with insights (max 100 words)."
         )
+        messages = [
+            {"role": "system", "content": "You are an aviation industry expert."},
+            {"role": "user", "content": prompt}
+        ]
 
-        response = openai.ChatCompletion.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are an aviation industry expert."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=300
-        )
-
-        return response.choices[0].message["content"]
+        key = digest({"model": MODEL, "messages": messages})
+        return await insight_cache.get_or_create(key, lambda: _complete(messages))
     except Exception as e:
         return f"AI Insight error: {e}"
+
+# ======== Batch per-flight insights ========
+def describe_flight(flight):
+    flight = display(flight)
+    return " | ".join(str(flight.get(field, "N/A")) for field in (
+        "flight_number", "airline", "origin", "destination", "departure_time",
+        "status", "price", "duration", "aircraft_type"
+    ))
+
+def estimate_tokens(text):
+    # ~4 characters per token for English/JSON text
+    return len(text) // 4 + 1
+
+def pack_flights(flights, token_budget=None):
+    """
+    Group flights into as few model calls as fit `token_budget` prompt+answer tokens each.
+    """
+    token_budget = token_budget or INSIGHT_BATCH_TOKEN_BUDGET
+    chunks, current, used = [], [], 0
+    for flight in flights:
+        cost = estimate_tokens(describe_flight(flight)) + TOKENS_PER_FLIGHT_ANSWER
+        if current and used + cost > token_budget:
+            chunks.append(current)
+            current, used = [], 0
+        current.append(flight)
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+def _flight_key(flight):
+    return digest({"model": MODEL, "flight": describe_flight(flight)})
+
+async def _complete_batch(flights):
+    lines = "\n".join(describe_flight(f) for f in flights)
+    prompt = (
+        "You are a market analyst for the aviation industry. "
+        "For each flight below (flight | airline | origin | destination | departure | status | price | duration | aircraft), "
+        "give a concise insight on its route, pricing and operations (max 50 words each).\n\n"
+        f"{lines}\n\n"
+        "Reply with only a JSON object mapping each flight number to its insight."
+    )
+    content = await _complete(
+        [
+            {"role": "system", "content": "You are an aviation industry expert."},
+            {"role": "user", "content": prompt}
+        ],
+        max_tokens=TOKENS_PER_FLIGHT_ANSWER * len(flights) + 50
+    )
+
+    start, end = content.find("{"), content.rfind("}")
+    answers = json.loads(content[start:end + 1]) if start != -1 else {}
+    return {f["flight_number"]: _answer_text(answers.get(f["flight_number"])) for f in flights}
+
+def _answer_text(answer):
+    # The model decides the JSON shape; only a non-empty string is an insight
+    if not answer:
+        return "AI Insight error: no insight returned for this flight"
+    if not isinstance(answer, str):
+        return "AI Insight error: insight returned for this flight is not text"
+    return answer
+
+async def generate_batch_insights(flights, token_budget=None, concurrency=None):
+    """
+    Yield {"flight_number", "insights"} per flight as results become available:
+    cached ones first, then one packed model call at a time as each completes.
+    """
+    pending = []
+    for flight in flights:
+        cached = insight_cache.lookup(_flight_key(flight))
+        if cached is not None:
+            yield {"flight_number": flight["flight_number"], "insights": cached}
+        else:
+            pending.append(flight)
+
+    semaphore = asyncio.Semaphore(concurrency or INSIGHT_BATCH_CONCURRENCY)
+
+    async def run(chunk):
+        async with semaphore:
+            try:
+                return chunk, await _complete_batch(chunk)
+            except Exception as e:
+                return chunk, {f["flight_number"]: f"AI Insight error: {e}" for f in chunk}
+
+    tasks = [asyncio.ensure_future(run(chunk)) for chunk in pack_flights(pending, token_budget)]
+    try:
+        for next_result in asyncio.as_completed(tasks):
+            chunk, answers = await next_result
+            for flight in chunk:
+                insights = answers[flight["flight_number"]]
+                if not insights.startswith("AI Insight error"):
+                    insight_cache.set(_flight_key(flight), insights)
+                yield {"flight_number": flight["flight_number"], "insights": insights}
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -1,15 +1,90 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import hashlib
+import json
+import os
+import time as clock
+from contextlib import asynccontextmanager
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.datastructures import MutableHeaders
 
 # ✅ Keep these imports assuming you're running from root
-from backend.data_fetcher import fetch_flight_data
-from backend.insights_api import generate_insights
+from backend.aggregates import flight_aggregates
+from backend.change_log import change_log
+from backend.dashboard_summary import build_summary
+from backend.data_fetcher import (
+    INGEST_MAX_FLIGHTS, close_http_client, current_snapshot, fetch_flight_data, hand_refresh_to_scheduler, ingest_pace, install_snapshot,
+    open_http_client, refresh_snapshot, snapshot_cache_stats
+)
+from backend.flight_store import SORTABLE_FIELDS, flight_store
+from backend.export import MEDIA_TYPES, export_chunks
+from backend.history_store import history_store
+from backend.insight_cache import TTLCache, digest
+from backend.insights_api import close_openai_client, generate_batch_insights, generate_insights, insight_cache
+from backend.metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE, HTTP_REQUEST_DURATION, HTTP_REQUESTS, Collector, render as render_metrics,
+    server_timing, start_request
+)
+from backend.models import AnalyticsResponse, BatchInsightsRequest
+from backend.normalizer import display
+from backend.scheduler import IngestScheduler
+from backend.search_index import search_index
+from backend.shared_snapshot import SHARED_SNAPSHOT_POLL, SnapshotFollower, shared_snapshot
+from backend.stream_hub import hub as stream_hub
+from backend.upstream_client import upstream
+from backend.wire_format import (
+    JSON, MIN_COMPRESS_BYTES, FastJSONResponse, choose_encoding, choose_format, compress, encode_flights,
+    encoded_flights, published_flights
+)
+
+# Background ingestion: upstream is polled on this interval, never from a request
+BACKGROUND_INGEST = os.getenv("BACKGROUND_INGEST", "true").lower() == "true"
+INGEST_INTERVAL = float(os.getenv("INGEST_INTERVAL", "60"))
+INGEST_JITTER = float(os.getenv("INGEST_JITTER", "0.1"))
+
+# Never more often than the upstream quota can sustain
+scheduler = IngestScheduler(refresh_snapshot, interval=INGEST_INTERVAL, jitter=INGEST_JITTER, pace=ingest_pace)
+
+# Shared-snapshot mode (SHARED_SNAPSHOT_DIR): only the elected worker runs the scheduler
+snapshot_follower = SnapshotFollower(
+    shared_snapshot, scheduler, install_snapshot, lambda: getattr(current_snapshot(), "version", 0),
+    poll=SHARED_SNAPSHOT_POLL
+) if shared_snapshot is not None else None
+
+# Flight JSON: sliced out of the published file in shared-snapshot mode, else encoded and cached per process
+flight_bodies = published_flights if shared_snapshot is not None else encoded_flights
+
+@asynccontextmanager
+async def lifespan(app):
+    await open_http_client()
+    if snapshot_follower is not None:
+        hand_refresh_to_scheduler()
+        await snapshot_follower.start()
+    elif BACKGROUND_INGEST:
+        hand_refresh_to_scheduler()
+        await scheduler.start()
+    else:
+        await fetch_flight_data()
+    yield
+    if snapshot_follower is not None:
+        await snapshot_follower.stop()
+    await scheduler.stop()
+    await insight_cache.flush()
+    await upstream.quota.flush()
+    await close_openai_client()
+    await close_http_client()
 
 # ✅ Initialize FastAPI app
 app = FastAPI(
     title="Airline Demand API",
     description="API for fetching and analyzing airline flight data.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # ✅ Enable CORS (for Streamlit frontend to access)
@@ -21,58 +96,498 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ✅ Every response says which snapshot it was computed from, plus per-route
+# latency and a Server-Timing breakdown of its stages. Plain ASGI rather than
+# @app.middleware("http"), which runs each response through an extra task and
+# memory stream: too much for thousands of long-lived /stream/flights responses.
+class ResponseHeadersMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        stages = start_request()
+        start = clock.perf_counter()
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                elapsed = clock.perf_counter() - start
+                # Route templates (/flights/{flight_number}) keep label cardinality bounded
+                route = scope.get("route")
+                path = route.path if route is not None else "unmatched"
+                HTTP_REQUEST_DURATION.observe(elapsed, scope["method"], path)
+                HTTP_REQUESTS.inc(scope["method"], path, str(message["status"]))
+
+                headers = MutableHeaders(scope=message)
+                snapshot = current_snapshot()
+                if snapshot is not None:
+                    headers["X-Snapshot-Version"] = str(snapshot.version)
+                    headers["X-Snapshot-Age"] = f"{snapshot.age:.1f}"
+                headers["Server-Timing"] = server_timing(stages, elapsed)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+app.add_middleware(ResponseHeadersMiddleware)
+
 # ✅ Health routes
 @app.get("/", tags=["Health"])
-def root():
+async def root():
     return {"message": "🚀 Airline Demand API is running"}
 
 @app.get("/health", tags=["Health"])
-def health_check():
-    return {"status": "healthy"}
+async def health_check():
+    snapshot = current_snapshot()
+    circuit = upstream.breaker.state
+    return {
+        # Degraded: serving the last good snapshot while upstream is failing
+        "status": "healthy" if circuit == "closed" else "degraded",
+        "snapshot_version": snapshot.version if snapshot else None,
+        "snapshot_age": round(snapshot.age, 1) if snapshot else None,
+        "upstream_circuit": circuit,
+        "ingest": scheduler.status(),
+        "shared_snapshot": snapshot_follower.status() if snapshot_follower is not None else None
+    }
+
+@app.get("/upstream/status", tags=["Health"])
+async def get_upstream_status():
+    """
+    AviationStack quota used this month, the rate limit pacing it, and the circuit breaker.
+    """
+    return upstream.status()
+
+# ✅ Metrics route (Prometheus text format)
+def _cache_requests():
+    snapshot, insight = snapshot_cache_stats(), insight_cache.stats()
+    return {
+        ("snapshot", "hit"): snapshot["hits"],
+        ("snapshot", "stale"): snapshot["stale_hits"],
+        ("snapshot", "miss"): snapshot["misses"],
+        ("snapshot", "fallback"): snapshot["fallbacks"],
+        ("insight", "hit"): insight["hits"],
+        ("insight", "coalesced"): insight["coalesced"],
+        ("insight", "miss"): insight["misses"],
+    }
+
+Collector("cache_requests_total", "Cache lookups by cache and result", _cache_requests, ("cache", "result"), "counter")
+Collector(
+    "cache_hit_ratio", "Share of lookups answered without loading (stale and coalesced count as hits)",
+    lambda: {("snapshot",): snapshot_cache_stats()["hit_ratio"], ("insight",): insight_cache.stats()["hit_ratio"]},
+    ("cache",)
+)
+Collector("insight_cache_entries", "Insights currently cached", lambda: len(insight_cache))
+Collector("snapshot_version", "Version of the current flight snapshot", lambda: getattr(current_snapshot(), "version", None))
+Collector("snapshot_age_seconds", "Age of the current flight snapshot", lambda: getattr(current_snapshot(), "age", None))
+Collector("flight_store_flights", "Flights in the live store", lambda: len(flight_store))
+Collector("encoded_flights", "Store flights with their JSON encoding ready to serve", lambda: len(flight_bodies))
+Collector("stream_subscribers", "Open /stream/flights connections", lambda: stream_hub.subscribers)
+Collector(
+    "stream_overflows_total", "Stream subscribers sent a reset after falling too far behind",
+    lambda: stream_hub.overflows, type="counter"
+)
+Collector("upstream_quota_used", "AviationStack requests sent this month", lambda: upstream.quota.used)
+Collector(
+    "upstream_quota_remaining", "AviationStack requests left this month (absent when unlimited)",
+    lambda: upstream.quota.remaining
+)
+Collector(
+    "upstream_circuit_state", "Upstream circuit breaker state (0 closed, 1 half-open, 2 open)",
+    lambda: {"closed": 0, "half_open": 1, "open": 2}[upstream.breaker.state]
+)
+Collector(
+    "upstream_circuit_opens_total", "Times the upstream circuit breaker opened",
+    lambda: upstream.breaker.opens, type="counter"
+)
+Collector(
+    "shared_snapshot_leader", "1 in the worker that ingests and publishes the shared snapshot",
+    lambda: int(shared_snapshot.leader) if shared_snapshot is not None else None
+)
+Collector(
+    "shared_snapshot_swaps_total", "Published snapshots this worker mapped and switched to",
+    lambda: snapshot_follower.swaps if snapshot_follower is not None else None, type="counter"
+)
+Collector("ingest_runs_total", "Scheduled ingest runs", lambda: scheduler.runs, type="counter")
+Collector("ingest_failures_total", "Scheduled ingest runs that failed", lambda: scheduler.failures, type="counter")
+
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def get_metrics():
+    return Response(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+# ✅ Flight payloads: content negotiation, compression and conditional requests
+FORMAT_QUERY = Query(None, pattern="^(json|columnar|arrow)$", description="Overrides the Accept header")
+
+def _representation(request, format):
+    media_type = choose_format(request.headers.get("accept"), format)
+    return media_type, choose_encoding(request.headers.get("accept-encoding"))
+
+def _store_tag():
+    # Names what the store holds. Shared-snapshot workers on the same version
+    # hold the same flights in the same order, so there the published version
+    # names it in every worker; otherwise only this process's revision does
+    snapshot = current_snapshot()
+    version = snapshot.version if snapshot else 0
+    if shared_snapshot is not None:
+        return f"{shared_snapshot.epoch}.{version}"
+    return f"v{version}.{flight_store.revision}"
+
+def _flights_etag(request, media_type, encoding):
+    # Strong validator: same store contents, query and representation => same bytes
+    basis = f"{request.url.path}?{sorted(request.query_params.multi_items())}|{media_type}|{encoding}"
+    return f'"{_store_tag()}-{hashlib.blake2b(basis.encode(), digest_size=8).hexdigest()}"'
+
+def _not_modified(request, etag):
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return False
+    return header.strip() == "*" or etag in (tag.strip() for tag in header.split(","))
+
+def _flights_response(flights, envelope, media_type, encoding, etag=None, cache=None):
+    body = encode_flights(flights, envelope, media_type, cache)
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if encoding and len(body) >= MIN_COMPRESS_BYTES:
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+    if etag:
+        headers["ETag"] = etag
+        headers["Cache-Control"] = "no-cache"
+    return Response(body, media_type=media_type, headers=headers)
 
 # ✅ Flights route
+# No response_model: bodies are encoded by wire_format (JSON, columnar JSON or Arrow), never validated
 @app.get("/flights", tags=["Flights"])
-def get_flights(limit: int = 50):
-    flights = fetch_flight_data(limit=limit)
-    return {"flights": flights}
+async def get_flights(
+    request: Request,
+    airline: Optional[str] = None,
+    origin: Optional[str] = None,
+    destination: Optional[str] = None,
+    status: Optional[str] = None,
+    q: Optional[str] = Query(None, description="Flight number prefix, or text in the airline or airport names"),
+    sort: Optional[str] = Query(None, pattern=f"^({'|'.join(SORTABLE_FIELDS)})$"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    page: int = Query(1, ge=1),
+    page_size: Optional[int] = Query(None, ge=1, le=1000),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Alias of page_size"),
+    format: Optional[str] = FORMAT_QUERY
+):
+    """
+    JSON, columnar JSON or Arrow IPC (see backend.wire_format), gzip/br
+    compressed on request. Send the ETag back in If-None-Match to get a 304
+    while the snapshot is unchanged. A snapshot holds at most
+    INGEST_MAX_FLIGHTS flights, so page_size is capped there (max_page_size).
+    """
+    page_size = min(page_size or limit or 50, INGEST_MAX_FLIGHTS)
+    # Keeps the snapshot fresh and deep enough for this page when refreshes
+    # are request-driven; instant otherwise
+    await fetch_flight_data(min(page * page_size, INGEST_MAX_FLIGHTS))
 
-@app.get("/flights/{flight_number}", tags=["Flights"])
-def get_flight_by_number(flight_number: str):
-    flights = fetch_flight_data(limit=100)
-    for flight in flights:
-        if flight.get('flight_number') == flight_number:
-            return {"flight": flight}
-    raise HTTPException(status_code=404, detail="Flight not found")
+    media_type, encoding = _representation(request, format)
+    etag = _flights_etag(request, media_type, encoding)
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Vary": "Accept, Accept-Encoding"})
 
-# ✅ Insights routes
-@app.get("/insights", tags=["Insights"])
-def get_insights(limit: int = 30):
-    flights = fetch_flight_data(limit=limit)
-    insights = generate_insights(flights)
-    return {"insights": insights}
+    flights, total = flight_store.query(
+        airline=airline, origin=origin, destination=destination, status=status, q=q,
+        sort=sort, order=order, page=page, page_size=page_size
+    )
+    filters = {"airline": airline, "origin": origin, "destination": destination, "status": status, "q": q}
+    envelope = {
+        "total_count": total,
+        "page": page,
+        "page_size": page_size,
+        "max_page_size": INGEST_MAX_FLIGHTS,
+        "filters_applied": {k: v for k, v in filters.items() if v}
+    }
+    # Store flights: each one's JSON is encoded once per version and reused
+    return _flights_response(flights, envelope, media_type, encoding, etag, flight_bodies)
 
-@app.get("/insights/{flight_number}", tags=["Insights"])
-def get_insights_by_flight(flight_number: str):
-    flights = fetch_flight_data(limit=100)
-    flight_data = next((f for f in flights if f.get('flight_number') == flight_number), None)
+def _day_bounds(start, end):
+    # Inclusive UTC dates -> [start_ts, end_ts) epoch seconds
+    start_ts = datetime.combine(start, time.min, timezone.utc).timestamp() if start else None
+    end_ts = datetime.combine(end + timedelta(days=1), time.min, timezone.utc).timestamp() if end else None
+    return start_ts, end_ts
 
-    if not flight_data:
+@app.get("/flights/history", tags=["Flights"])
+async def get_flight_history(
+    request: Request,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    airline: Optional[str] = None,
+    origin: Optional[str] = None,
+    destination: Optional[str] = None,
+    limit: int = Query(1000, ge=1, le=10000),
+    offset: int = Query(0, ge=0),
+    format: Optional[str] = FORMAT_QUERY
+):
+    """
+    Archived flights scheduled to depart between `start` and `end` (inclusive, UTC dates).
+    """
+    if history_store is None:
+        raise HTTPException(status_code=503, detail="Flight history is disabled")
+
+    start_ts, end_ts = _day_bounds(start, end)
+    flights, total = await asyncio.to_thread(
+        history_store.query, start_ts, end_ts, airline, origin, destination, limit=limit, offset=offset
+    )
+    filters = {"start": start, "end": end, "airline": airline, "origin": origin, "destination": destination}
+    envelope = {"total_count": total, "filters_applied": {k: v for k, v in filters.items() if v is not None}}
+    return _flights_response(flights, envelope, *_representation(request, format))
+
+@app.get("/flights/search", tags=["Flights"])
+async def search_flights(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=200),
+    typeahead: bool = False
+):
+    """
+    Flights whose number starts with `q` or whose airline/airport contains it,
+    with [start, end) highlight spans. typeahead=true returns the top matching
+    flight numbers, airlines and airports instead.
+    """
+    if typeahead:
+        return {"query": q, "suggestions": search_index.suggest(q, limit)}
+    return {"query": q, **search_index.search(q, limit)}
+
+@app.get("/flights/changes", tags=["Flights"])
+async def get_flight_changes(
+    since: Optional[str] = Query(None, description="Cursor from the previous response"),
+    limit: int = Query(1000, ge=1, le=10000)
+):
+    """
+    Flights inserted, removed or changed since `since`, one merged change per
+    flight. Poll with the returned cursor; reset=true means the cursor is no
+    longer covered and the caller should refetch /flights in full.
+    """
+    # Keeps the snapshot fresh when refreshes are request-driven; instant otherwise
+    await fetch_flight_data()
+    snapshot = current_snapshot()
+    return {"snapshot_version": snapshot.version if snapshot else None, **change_log.since(since, limit)}
+
+# Declared after the fixed /flights/... paths so it does not shadow them
+@app.get("/flights/{flight_number}", tags=["Flights"])
+async def get_flight_by_number(flight_number: str):
+    flight = flight_store.get(flight_number)
+    if flight is None:
         raise HTTPException(status_code=404, detail="Flight not found")
+    return {"flight": display(flight)}
 
-    insights = generate_insights([flight_data])
-    return {"flight_number": flight_number, "insights": insights}
+# ✅ Push route (Server-Sent Events)
+@app.get("/stream/flights", tags=["Flights"])
+async def stream_flights(
+    request: Request,
+    airline: Optional[str] = None,
+    origin: Optional[str] = None,
+    destination: Optional[str] = None
+):
+    """
+    Live flight changes as Server-Sent Events, filtered by airline/route:
+    "changes" (the /flights/changes format, after every ingest that changes a
+    matching flight), "aggregates" (headline analytics) and "reset" (the
+    client fell too far behind and should refetch). Reconnecting with
+    Last-Event-ID replays the changes missed in between.
+    """
+    return StreamingResponse(
+        stream_hub.events(airline, origin, destination, request.headers.get("last-event-id")),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# ✅ Export route
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "5000"))
+
+@app.get("/export", tags=["Flights"])
+async def export_flights(
+    format: str = Query("csv", pattern="^(csv|ndjson|parquet)$"),
+    source: str = Query("live", pattern="^(live|history)$"),
+    airline: Optional[str] = None,
+    origin: Optional[str] = None,
+    destination: Optional[str] = None,
+    status: Optional[str] = None,
+    q: Optional[str] = None,
+    sort: Optional[str] = Query(None, pattern=f"^({'|'.join(SORTABLE_FIELDS)})$"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    start: Optional[date] = None,
+    end: Optional[date] = None
+):
+    """
+    Every flight matching the /flights filters, streamed in batches (chunked
+    transfer) as CSV, NDJSON or Parquet row groups. source=history exports the
+    archive instead: start/end apply there and rows come in departure order.
+    """
+    if source == "history":
+        if history_store is None:
+            raise HTTPException(status_code=503, detail="Flight history is disabled")
+        batches = history_store.iter_query(
+            *_day_bounds(start, end), airline, origin, destination, status, q, batch_size=EXPORT_BATCH_SIZE
+        )
+    else:
+        await fetch_flight_data()
+        flights, _ = flight_store.query(
+            airline=airline, origin=origin, destination=destination, status=status, q=q,
+            sort=sort, order=order, page=1, page_size=max(len(flight_store), 1)
+        )
+        batches = (flights[i:i + EXPORT_BATCH_SIZE] for i in range(0, len(flights), EXPORT_BATCH_SIZE))
+
+    filename = f"flights_{source}_{datetime.now(timezone.utc):%Y%m%d_%H%M%S}.{format}"
+    # A sync iterator: Starlette pulls each chunk in its threadpool
+    return StreamingResponse(
+        export_chunks(batches, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+# ✅ Insights routes
+@app.get("/insights", tags=["Insights"])
+async def get_insights(limit: int = Query(30, ge=1, le=1000)):
+    flights = await fetch_flight_data(limit=limit)
+    insights = await generate_insights(flights)
+    return {"insights": insights}
 
 @app.get("/insights/summary", tags=["Insights"])
-def get_insights_summary(limit: int = 30):
-    flights = fetch_flight_data(limit=limit)
-    insights = generate_insights(flights)
+async def get_insights_summary(limit: int = Query(30, ge=1, le=1000)):
+    flights = await fetch_flight_data(limit=limit)
+    insights = await generate_insights(flights)
 
+    most_delayed = max(flights, key=lambda x: x.get('delay', 0), default=None)
     summary = {
         "total_flights": len(flights),
         "average_delay": round(
             sum(f.get('delay', 0) for f in flights) / len(flights), 2
         ) if flights else 0,
-        "most_delayed_flight": max(flights, key=lambda x: x.get('delay', 0), default=None)
+        "most_delayed_flight": display(most_delayed) if most_delayed is not None else None
     }
 
     return {"summary": summary, "insights": insights}
+
+@app.get("/insights/cache", tags=["Insights"])
+async def get_insight_cache_stats():
+    return insight_cache.stats()
+
+@app.post("/insights/batch", tags=["Insights"])
+async def get_batch_insights(request: BatchInsightsRequest):
+    """
+    Per-flight insights for many flights, streamed as NDJSON lines as each completes.
+    """
+    # Resolve every flight up front so the batch sees one consistent store state
+    flights, missing = [], []
+    for flight_number in dict.fromkeys(request.flight_numbers):
+        flight = flight_store.get(flight_number)
+        if flight is None:
+            missing.append(flight_number)
+        else:
+            flights.append(flight)
+
+    async def stream():
+        for flight_number in missing:
+            yield json.dumps({"flight_number": flight_number, "error": "Flight not found"}) + "\n"
+        async for result in generate_batch_insights(flights):
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+# Declared after the fixed /insights/... paths so it does not shadow them
+@app.get("/insights/{flight_number}", tags=["Insights"])
+async def get_insights_by_flight(flight_number: str):
+    flight_data = flight_store.get(flight_number)
+
+    if not flight_data:
+        raise HTTPException(status_code=404, detail="Flight not found")
+
+    insights = await generate_insights([flight_data])
+    return {"flight_number": flight_number, "insights": insights}
+
+# ✅ Analytics routes (served from incrementally maintained aggregates)
+def _analytics_response(analytics):
+    return AnalyticsResponse(
+        analytics=analytics,
+        data_points=flight_aggregates.flight_count,
+        generated_at=datetime.now(timezone.utc).isoformat()
+    )
+
+@app.get("/analytics", tags=["Analytics"], response_model=AnalyticsResponse)
+async def get_analytics(top_n: int = 10):
+    return _analytics_response({
+        "top_routes": flight_aggregates.top_routes(top_n),
+        "airline_distribution": flight_aggregates.airline_distribution(),
+        "price_stats": flight_aggregates.price_stats(),
+        "status_breakdown": flight_aggregates.status_breakdown()
+    })
+
+@app.get("/analytics/routes", tags=["Analytics"], response_model=AnalyticsResponse)
+async def get_top_routes(top_n: int = 10, approximate: bool = False):
+    """
+    approximate=true answers from the Space-Saving summary over the whole ingest
+    history; each route carries an "error" bound and the response an overall bound.
+    """
+    if approximate:
+        return _analytics_response({
+            "top_routes": flight_aggregates.top_routes(top_n, approximate=True),
+            "error_bound": flight_aggregates.route_hitters.error_bound,
+            "observed": flight_aggregates.route_hitters.total
+        })
+    return _analytics_response({"top_routes": flight_aggregates.top_routes(top_n)})
+
+@app.get("/analytics/airlines", tags=["Analytics"], response_model=AnalyticsResponse)
+async def get_airline_distribution(approximate: bool = False, top_n: int = 10):
+    if approximate:
+        return _analytics_response({
+            "top_airlines": flight_aggregates.top_airlines(top_n),
+            "error_bound": flight_aggregates.airline_hitters.error_bound,
+            "observed": flight_aggregates.airline_hitters.total
+        })
+    return _analytics_response({"airline_distribution": flight_aggregates.airline_distribution()})
+
+@app.get("/analytics/prices", tags=["Analytics"], response_model=AnalyticsResponse)
+async def get_price_stats():
+    return _analytics_response({"price_stats": flight_aggregates.price_stats()})
+
+@app.get("/analytics/price-quantiles", tags=["Analytics"], response_model=AnalyticsResponse)
+async def get_price_quantiles(by: str = Query("airline", pattern="^(airline|route)$")):
+    return _analytics_response({"price_quantiles": flight_aggregates.price_quantiles(by)})
+
+@app.get("/analytics/status", tags=["Analytics"], response_model=AnalyticsResponse)
+async def get_status_breakdown():
+    return _analytics_response({"status_breakdown": flight_aggregates.status_breakdown()})
+
+# ✅ Dashboard route: one precomputed summary per snapshot for every Streamlit rerun
+# Summaries keyed by source, date range and snapshot; each ingest makes new keys
+summary_cache = TTLCache(max_entries=32, ttl=3600)
+
+@app.get("/dashboard/summary", tags=["Analytics"])
+async def get_dashboard_summary(
+    request: Request,
+    source: str = Query("live", pattern="^(live|history)$"),
+    start: Optional[date] = None,
+    end: Optional[date] = None
+):
+    """
+    KPIs, chart series (airline counts, top routes, price histogram, per-airline
+    box stats) and bullet insights over the live store, or over the archive
+    between `start` and `end` with source=history. Computed once per snapshot;
+    send the ETag back in If-None-Match to get a 304 until the next ingest.
+    """
+    if source == "history" and history_store is None:
+        raise HTTPException(status_code=503, detail="Flight history is disabled")
+    await fetch_flight_data()
+
+    etag = _flights_etag(request, JSON, None)
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    snapshot = current_snapshot()
+    version = snapshot.version if snapshot else 0
+    if source == "history":
+        start_ts, end_ts = _day_bounds(start, end)
+        factory = lambda: asyncio.to_thread(
+            build_summary, history_store.iter_query(start_ts, end_ts, batch_size=EXPORT_BATCH_SIZE)
+        )
+    else:
+        # Copied on the event loop, where ingest mutates the store; summarized off it
+        factory = lambda: asyncio.to_thread(build_summary, [flight_store.all()])
+
+    key = digest([source, str(start), str(end), version, flight_store.revision])
+    summary = await summary_cache.get_or_create(key, factory)
+    return JSONResponse(
+        {"source": source, "snapshot_version": version, **summary},
+        headers={"ETag": etag, "Cache-Control": "no-cache"}
+    )
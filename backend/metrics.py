@@ -0,0 +1,215 @@
+# backend/metrics.py
+#
+# In-process metrics in the Prometheus text format (GET /metrics), plus the
+# per-request stage timings behind the Server-Timing header.
+#
+# Recording is a dict lookup and a few additions; nothing is formatted until
+# /metrics is scraped. State that other objects already count (cache hits,
+# store size, ...) is read at scrape time through collectors instead of being
+# counted twice on the hot path.
+
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Seconds; spans an in-memory page (sub-ms) up to a slow upstream or model call
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_registry = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _series(name, labelnames, labels, extra=""):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(labelnames, labels)]
+    if extra:
+        pairs.append(extra)
+    return f"{name}{{{','.join(pairs)}}}" if pairs else name
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    Monotonic count per label combination: counter.inc("timeout") or
+    counter.inc("gpt-4", "prompt", amount=412).
+    """
+
+    type = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        _registry.append(self)
+
+    def inc(self, *labels, amount=1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        for labels, value in list(self._values.items()):
+            yield _series(self.name, self.labelnames, labels), value
+
+
+class Histogram:
+    """
+    Observations bucketed by upper bound (Prometheus `le` semantics), with
+    their sum and count, per label combination.
+    """
+
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        _registry.append(self)
+
+    def observe(self, value, *labels):
+        state = self._values.get(labels)
+        if state is None:
+            # [per-bucket counts..., +Inf count, sum]
+            state = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def count(self, *labels):
+        state = self._values.get(labels)
+        return sum(state[:-1]) if state else 0
+
+    def samples(self):
+        for labels, state in list(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state):
+                cumulative += count
+                yield _series(f"{self.name}_bucket", self.labelnames, labels, f'le="{_number(bound)}"'), cumulative
+            yield _series(f"{self.name}_sum", self.labelnames, labels), state[-1]
+            yield _series(f"{self.name}_count", self.labelnames, labels), cumulative
+
+
+class Collector:
+    """
+    A metric read at scrape time: `collect()` returns a number, or a dict of
+    label tuple -> number.
+    """
+
+    def __init__(self, name, help, collect, labelnames=(), type="gauge"):
+        self.name = name
+        self.help = help
+        self.type = type
+        self.labelnames = tuple(labelnames)
+        self._collect = collect
+        _registry.append(self)
+
+    def samples(self):
+        values = self._collect()
+        if not isinstance(values, dict):
+            values = {(): values}
+        for labels, value in values.items():
+            if value is not None:
+                yield _series(self.name, self.labelnames, labels), value
+
+
+def render():
+    """
+    Every registered metric in the Prometheus text exposition format (0.0.4).
+    """
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        try:
+            lines.extend(f"{series} {_number(value)}" for series, value in metric.samples())
+        except Exception as e:
+            print(f"❌ Error collecting metric {metric.name}: {e}")
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# ======== Per-request stage timings (Server-Timing) ========
+_stages = ContextVar("server_timing_stages", default=None)
+
+
+def start_request():
+    """
+    Collect stage timings for the current request; work it awaits (and tasks
+    it starts) record into the returned list.
+    """
+    stages = []
+    _stages.set(stages)
+    return stages
+
+
+def record_stage(stage, seconds):
+    stages = _stages.get()
+    if stages is not None:
+        stages.append((stage, seconds))
+
+
+@contextmanager
+def timed(stage, histogram=None, labels=()):
+    """
+    Time the block as Server-Timing `stage` of the current request (if any)
+    and, when given, observe it in `histogram`.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if histogram is not None:
+            histogram.observe(elapsed, *labels)
+        stages = _stages.get()
+        if stages is not None:
+            stages.append((stage, elapsed))
+
+
+def server_timing(stages, total):
+    """
+    Server-Timing header value: each stage (repeats summed) and the total, in ms.
+    """
+    durations = {}
+    for stage, seconds in stages:
+        durations[stage] = durations.get(stage, 0.0) + seconds
+    durations["total"] = total
+    return ", ".join(f"{stage};dur={seconds * 1e3:.2f}" for stage, seconds in durations.items())
+
+
+# ======== Shared metrics ========
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Time to produce a response, by route template",
+    ("method", "route")
+)
+HTTP_REQUESTS = Counter("http_requests_total", "Responses by route template and status", ("method", "route", "status"))
+
+UPSTREAM_REQUEST_DURATION = Histogram(
+    "upstream_request_duration_seconds", "AviationStack page request latency", ("outcome",)
+)
+UPSTREAM_ERRORS = Counter("upstream_errors_total", "Failed AviationStack page requests by reason", ("reason",))
+UPSTREAM_RETRIES = Counter("upstream_retries_total", "AviationStack requests retried after a retryable failure")
+UPSTREAM_REJECTED = Counter(
+    "upstream_rejected_total", "AviationStack requests not sent (rate_limited, quota_exhausted, circuit_open)",
+    ("reason",)
+)
+
+INGEST_STAGE_DURATION = Histogram(
+    "ingest_stage_duration_seconds", "Time spent per ingest stage (normalize, store, archive)", ("stage",)
+)
+RECORDS_INGESTED = Counter("records_ingested_total", "Upstream records normalized into flights")
+
+LLM_REQUEST_DURATION = Histogram("llm_request_duration_seconds", "OpenAI completion latency", ("model", "outcome"))
+LLM_TOKENS = Counter("llm_tokens_total", "OpenAI tokens used, by kind (prompt, completion)", ("model", "kind"))
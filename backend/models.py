@@ -1,5 +1,5 @@
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 class Flight(BaseModel):
     airline: Optional[str]
@@ -12,6 +12,9 @@ class Flight(BaseModel):
     price: Optional[float] = None
     duration: Optional[str] = None
     aircraft_type: Optional[str] = None
+    departure_ts: Optional[int] = None
+    arrival_ts: Optional[int] = None
+    duration_minutes: Optional[int] = None
 
 class FlightResponse(BaseModel):
     flights: List[Flight]
@@ -30,3 +33,6 @@ class AnalyticsResponse(BaseModel):
     analytics: dict
     data_points: int
     generated_at: str
+
+class BatchInsightsRequest(BaseModel):
+    flight_numbers: List[str] = Field(..., min_length=1, max_length=500)
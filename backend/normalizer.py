@@ -0,0 +1,182 @@
+# backend/normalizer.py
+
+import sys
+import zlib
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Fields of a normalized record. Times are epoch seconds and duration is whole
+# minutes; the upstream ISO strings ride along untouched for display.
+RECORD_FIELDS = (
+    "flight_number", "airline", "origin", "destination", "departure_time", "arrival_time",
+    "departure_ts", "arrival_ts", "status", "price", "duration_minutes", "aircraft_type",
+)
+
+# What API responses, exports and prompts show, in this order
+DISPLAY_FIELDS = (
+    "flight_number", "airline", "origin", "destination", "departure_time", "arrival_time",
+    "status", "price", "duration", "aircraft_type",
+)
+
+# Names repeated across many records; interned so every record shares one string
+INTERNED_FIELDS = ("airline", "origin", "destination", "status", "aircraft_type")
+
+_EMPTY = {}
+_intern = sys.intern
+
+# Upstream timestamps: 2025-01-01T04:02:00+00:00 ("Z" is accepted too)
+ISO_FORMAT = "%Y-%m-%dT%H:%M:%S%z"
+
+# Scheduled times repeat heavily (same minute, many flights), so parses are memoized
+_epoch_cache = {}
+EPOCH_CACHE_SIZE = 65536
+
+
+def _parse_epoch(timestamp):
+    try:
+        return int(datetime.fromisoformat(timestamp).timestamp())
+    except ValueError:
+        return None
+
+
+def parse_epoch(timestamp):
+    """
+    Epoch seconds of an ISO-8601 timestamp, or None if missing/unparseable.
+    """
+    if not timestamp or not isinstance(timestamp, str):
+        return None
+    epoch = _epoch_cache.get(timestamp)
+    if epoch is None and timestamp not in _epoch_cache:
+        if len(_epoch_cache) >= EPOCH_CACHE_SIZE:
+            _epoch_cache.clear()
+        epoch = _epoch_cache[timestamp] = _parse_epoch(timestamp)
+    return epoch
+
+
+def mock_prices(flight_numbers, departure_times):
+    """
+    Mock fares in [100, 1000), fixed per flight number and scheduled departure
+    so re-ingesting a flight does not change its price.
+    """
+    seeds = [zlib.crc32(f"{number}|{departure}".encode()) for number, departure in zip(flight_numbers, departure_times)]
+    return np.round(100 + 900 * np.asarray(seeds, dtype=np.float64) / 2**32, 2).tolist()
+
+
+def duration_minutes(departure_ts, arrival_ts):
+    if departure_ts is None or arrival_ts is None:
+        return None
+    return (arrival_ts - departure_ts) // 60
+
+
+@lru_cache(maxsize=4096)
+def format_duration(minutes):
+    """
+    "Xh Ym" for display; "N/A" when unknown.
+    """
+    if minutes is None:
+        return "N/A"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes}m"
+
+
+def normalize_flight(flight, price=None):
+    """
+    One AviationStack record -> normalized record (normalize_batch of one).
+    Missing and null upstream fields both become "N/A". `price` defaults to the mock price.
+    """
+    record = normalize_batch([flight])[0]
+    if price is not None:
+        record["price"] = price
+    return record
+
+
+def epochs(timestamps):
+    """
+    parse_epoch over a whole column at once (vectorized in Arrow).
+    """
+    parsed = pc.strptime(pa.array(timestamps, type=pa.string()), format=ISO_FORMAT, unit="s", error_is_null=True)
+    result = parsed.cast(pa.int64()).to_pylist()
+    # strptime only takes whole seconds with an offset; fractional seconds,
+    # naive times and anything else it rejects go through parse_epoch
+    if parsed.null_count:
+        for i in pc.indices_nonzero(parsed.is_null()).to_pylist():
+            result[i] = parse_epoch(timestamps[i])
+    return result
+
+
+def normalize_columns(flights):
+    """
+    Normalize straight into a columnar batch: {field: list} over RECORD_FIELDS.
+    One pass pulls the raw fields out without building a dict per record;
+    timestamps, durations and prices are then computed a column at a time.
+    """
+    flight_number, airline, origin, destination, departure_time, arrival_time, status, aircraft_type = (
+        [] for _ in range(8)
+    )
+    for flight in flights:
+        get = flight.get
+        departure = get("departure") or _EMPTY
+        arrival = get("arrival") or _EMPTY
+        flight_number.append((get("flight") or _EMPTY).get("iata") or "N/A")
+        airline.append(_intern((get("airline") or _EMPTY).get("name") or "N/A"))
+        origin.append(_intern(departure.get("airport") or "N/A"))
+        destination.append(_intern(arrival.get("airport") or "N/A"))
+        departure_time.append(departure.get("scheduled") or "N/A")
+        arrival_time.append(arrival.get("scheduled") or "N/A")
+        status.append(_intern(get("flight_status") or "N/A"))
+        aircraft_type.append(_intern((get("aircraft") or _EMPTY).get("iata") or "N/A"))
+
+    departure_ts = epochs(departure_time)
+    arrival_ts = epochs(arrival_time)
+    return {
+        "flight_number": flight_number,
+        "airline": airline,
+        "origin": origin,
+        "destination": destination,
+        "departure_time": departure_time,
+        "arrival_time": arrival_time,
+        "departure_ts": departure_ts,
+        "arrival_ts": arrival_ts,
+        "status": status,
+        "price": mock_prices(flight_number, departure_time),
+        "duration_minutes": list(map(duration_minutes, departure_ts, arrival_ts)),
+        "aircraft_type": aircraft_type,
+    }
+
+
+def normalize_batch(flights):
+    """
+    Normalized records for a page of AviationStack records, via the columnar path.
+    """
+    return records(normalize_columns(flights))
+
+
+def records(columns):
+    """
+    Record dicts from a columnar batch ({field: list} over RECORD_FIELDS).
+    """
+    return [
+        {
+            "flight_number": number, "airline": airline, "origin": origin, "destination": destination,
+            "departure_time": dep_time, "arrival_time": arr_time, "departure_ts": dep_ts, "arrival_ts": arr_ts,
+            "status": status, "price": price, "duration_minutes": duration, "aircraft_type": aircraft,
+        }
+        for number, airline, origin, destination, dep_time, arr_time, dep_ts, arr_ts, status, price, duration, aircraft
+        in zip(*(columns[name] for name in RECORD_FIELDS))
+    ]
+
+
+def display(flight):
+    """
+    The record as shown to people: adds the "duration" string. Rows that
+    already carry one pass through.
+    """
+    if "duration" in flight or "duration_minutes" not in flight:
+        return flight
+    shown = dict(flight)
+    shown["duration"] = format_duration(flight["duration_minutes"])
+    return shown
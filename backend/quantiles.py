@@ -0,0 +1,181 @@
+# backend/quantiles.py
+
+import math
+import random
+import time
+from collections import deque
+
+# Sketch size used when callers do not pass one; see benchmarks/bench_quantiles.py
+DEFAULT_SKETCH_SIZE = 200
+
+
+def exact_quantiles(values, quantiles):
+    """
+    Nearest-rank quantiles of `values` (same definition the sketch approximates).
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return [None for _ in quantiles]
+    n = len(ordered)
+    return [ordered[min(n - 1, max(0, math.ceil(q * n) - 1))] for q in quantiles]
+
+
+class KLLSketch:
+    """
+    KLL quantile sketch: a stack of compactors where an item at level h stands
+    for 2**h inputs. Holds at most ~3k values regardless of how many it has
+    seen, merges with any other sketch, and stays exact until k values arrive.
+    Rank error is about 1/k (measured in benchmarks/bench_quantiles.py).
+    """
+
+    __slots__ = ("k", "count", "compactors", "_size", "_capacities", "_max_size", "_rng")
+
+    def __init__(self, k=DEFAULT_SKETCH_SIZE, seed=None):
+        self.k = k
+        self.count = 0
+        self.compactors = [[]]
+        self._size = 0
+        self._refresh_max_size()
+        self._rng = random.Random(seed)
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def size(self):
+        """
+        Values currently retained (what memory scales with).
+        """
+        return self._size
+
+    def update(self, value):
+        self.compactors[0].append(value)
+        self.count += 1
+        self._size += 1
+        if self._size >= self._max_size:
+            self._compress()
+
+    def extend(self, values):
+        for value in values:
+            self.update(value)
+
+    def merge(self, other):
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append([])
+            self._refresh_max_size()
+        for level, items in enumerate(other.compactors):
+            self.compactors[level].extend(items)
+        self.count += other.count
+        self._size += other._size
+        while self._size >= self._max_size:
+            self._compress()
+        return self
+
+    def quantiles(self, quantiles):
+        if not self.count:
+            return [None for _ in quantiles]
+
+        weighted = sorted(
+            (value, 1 << level) for level, items in enumerate(self.compactors) for value in items
+        )
+        total = sum(weight for _, weight in weighted)
+        targets = sorted((q * total, i) for i, q in enumerate(quantiles))
+
+        result = [None] * len(quantiles)
+        cumulative = 0
+        position = 0
+        for value, weight in weighted:
+            cumulative += weight
+            while position < len(targets) and targets[position][0] <= cumulative:
+                result[targets[position][1]] = value
+                position += 1
+        for _, index in targets[position:]:
+            result[index] = weighted[-1][0]
+        return result
+
+    def quantile(self, q):
+        return self.quantiles([q])[0]
+
+    def to_dict(self):
+        return {"k": self.k, "count": self.count, "compactors": self.compactors}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(k=data["k"])
+        sketch.count = data["count"]
+        sketch.compactors = [list(items) for items in data["compactors"]] or [[]]
+        sketch._size = sum(len(items) for items in sketch.compactors)
+        sketch._refresh_max_size()
+        return sketch
+
+    def _refresh_max_size(self):
+        # Capacity shrinks by 2/3 per level below the top one
+        height = len(self.compactors)
+        self._capacities = [
+            max(2, int(math.ceil(self.k * (2 / 3) ** (height - level - 1)))) for level in range(height)
+        ]
+        self._max_size = sum(self._capacities)
+
+    def _compress(self):
+        for level in range(len(self.compactors)):
+            if len(self.compactors[level]) >= self._capacities[level]:
+                if level + 1 == len(self.compactors):
+                    self.compactors.append([])
+                    self._refresh_max_size()
+                items = sorted(self.compactors[level])
+                # An odd item out stays behind so weights remain exact
+                keep = [items.pop()] if len(items) % 2 else []
+                promoted = items[self._rng.random() < 0.5::2]
+                self.compactors[level + 1].extend(promoted)
+                self.compactors[level] = keep
+                self._size -= len(items) - len(promoted)
+                if self._size < self._max_size:
+                    return
+
+
+class RollingQuantiles:
+    """
+    Per-group KLL sketches over a sliding time window, kept as one sketch per
+    `bucket_seconds` slice and merged when queried.
+    """
+
+    def __init__(self, window_seconds=7 * 24 * 3600, bucket_seconds=3600, k=DEFAULT_SKETCH_SIZE):
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self.k = k
+        self._groups = {}
+
+    def __contains__(self, group):
+        return group in self._groups
+
+    def groups(self):
+        return list(self._groups)
+
+    def update(self, group, value, now=None):
+        now = time.time() if now is None else now
+        bucket_start = now - now % self.bucket_seconds
+        buckets = self._groups.get(group)
+        if buckets is None:
+            buckets = self._groups[group] = deque()
+        if not buckets or buckets[-1][0] != bucket_start:
+            buckets.append((bucket_start, KLLSketch(self.k)))
+        buckets[-1][1].update(value)
+        self._expire(buckets, now)
+
+    def sketch(self, group, now=None):
+        """
+        Merged sketch of the group's window, or None if it has no data.
+        """
+        now = time.time() if now is None else now
+        buckets = self._groups.get(group)
+        if not buckets:
+            return None
+        self._expire(buckets, now)
+        merged = KLLSketch(self.k)
+        for _, sketch in buckets:
+            merged.merge(sketch)
+        return merged if merged.count else None
+
+    def _expire(self, buckets, now):
+        while buckets and buckets[0][0] + self.bucket_seconds <= now - self.window_seconds:
+            buckets.popleft()
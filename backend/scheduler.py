@@ -0,0 +1,87 @@
+# backend/scheduler.py
+
+import asyncio
+import random
+import time
+
+
+class IngestScheduler:
+    """
+    Call `refresh` (an async function) every `interval` seconds, randomized by
+    ±`jitter` so multiple deployments do not hit upstream in lockstep.
+
+    A failed refresh is logged and the previous snapshot stays current; the
+    loop itself never dies. `pace`, when given, returns the minimum interval
+    (seconds) allowed right now, e.g. by the upstream quota.
+    """
+
+    def __init__(self, refresh, interval=60.0, jitter=0.1, pace=None):
+        self._refresh = refresh
+        self._pace = pace
+        self.interval = interval
+        self.jitter = jitter
+        self._task = None
+        self.runs = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_success = None
+        self.last_error = None
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        """
+        Run one refresh right away, then keep refreshing in the background.
+        """
+        await self.run_once()
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run_once(self):
+        self.runs += 1
+        try:
+            await self._refresh()
+        except Exception as e:
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.last_error = f"{type(e).__name__}: {e}"
+            print(f"❌ Scheduled ingest failed, keeping previous snapshot: {e}")
+            return False
+
+        self.consecutive_failures = 0
+        self.last_success = time.time()
+        return True
+
+    @property
+    def effective_interval(self):
+        return max(self.interval, self._pace()) if self._pace is not None else self.interval
+
+    def next_delay(self):
+        return self.effective_interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def status(self):
+        return {
+            "running": self.running,
+            "interval": self.interval,
+            "effective_interval": round(self.effective_interval, 1),
+            "runs": self.runs,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "last_success": self.last_success,
+            "last_error": self.last_error,
+        }
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.next_delay())
+            await self.run_once()
@@ -0,0 +1,213 @@
+# backend/search_index.py
+
+from bisect import bisect_left, insort
+from collections import Counter
+
+from backend.flight_store import flight_store
+from backend.normalizer import display
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _spans(text, needle):
+    """
+    [start, end) spans of every case-insensitive occurrence of `needle`.
+    """
+    lowered, spans, start = text.lower(), [], 0
+    while needle:
+        found = lowered.find(needle, start)
+        if found == -1:
+            break
+        spans.append([found, found + len(needle)])
+        start = found + len(needle)
+    return spans
+
+
+class SearchIndex:
+    """
+    Text search over the flight store, kept current through its listener hook.
+
+    Flight numbers get prefix search: sorted lists bucketed by their first two
+    characters, so inserts stay cheap. Airline and airport names get substring
+    search through a trigram index over the distinct names; a matched name maps
+    to its flights through the store's hash indexes. Query cost depends on the
+    number of distinct names and results, not on the number of flights.
+    """
+
+    def __init__(self, store):
+        self._store = store
+        self._numbers = {}
+        self._spellings = {}
+        self._names = {"airline": Counter(), "airport": Counter()}
+        self._trigrams = {}
+        store.subscribe(self.apply)
+        store.text_index = self
+
+    def apply(self, previous, current):
+        if previous is not None and (current is None or previous.get("flight_number") != current.get("flight_number")):
+            self._remove_number(previous.get("flight_number"))
+        if current is not None and (previous is None or previous.get("flight_number") != current.get("flight_number")):
+            self._add_number(current.get("flight_number"))
+
+        if previous is not None:
+            for kind, name in self._flight_names(previous):
+                self._release_name(kind, name)
+        if current is not None:
+            for kind, name in self._flight_names(current):
+                self._hold_name(kind, name)
+
+    def flight_numbers_with_prefix(self, prefix, limit=None):
+        prefix = prefix.upper()
+        if len(prefix) >= 2:
+            buckets = [self._numbers.get(prefix[:2], [])]
+        else:
+            buckets = [bucket for key, bucket in sorted(self._numbers.items()) if key.startswith(prefix)]
+
+        found = []
+        for bucket in buckets:
+            for i in range(bisect_left(bucket, prefix), len(bucket)):
+                if not bucket[i].startswith(prefix) or (limit is not None and len(found) >= limit):
+                    break
+                found.append(self._spellings[bucket[i]])
+        return found
+
+    def names_containing(self, text):
+        """
+        (kind, name) pairs whose name contains `text`, prefix matches first.
+        """
+        needle = text.lower()
+        if len(needle) >= 3:
+            grams = sorted((self._trigrams.get(g, set()) for g in trigrams(needle)), key=len)
+            candidates = set.intersection(*grams) if grams else set()
+        else:
+            candidates = {(kind, name) for kind, names in self._names.items() for name in names}
+
+        matches = [(kind, name) for kind, name in candidates if needle in name.lower()]
+        matches.sort(key=lambda m: (not m[1].lower().startswith(needle), m[1]))
+        return matches
+
+    def matching_flight_numbers(self, text):
+        """
+        Every flight whose number starts with `text` or whose airline/airport contains it.
+        """
+        numbers = set(self.flight_numbers_with_prefix(text))
+        for kind, name in self.names_containing(text):
+            for bucket in self._buckets_for(kind, name):
+                numbers.update(bucket)
+        return numbers
+
+    def search(self, text, limit=20):
+        """
+        Up to `limit` flights matching `text`, each with [start, end) highlight
+        spans per matched field; flight-number matches come first.
+        """
+        results, seen = [], set()
+        needle = text.lower()
+
+        for number in self.flight_numbers_with_prefix(text, limit):
+            flight = self._store.get(number)
+            if flight is not None:
+                seen.add(number)
+                results.append(self._hit(flight, needle))
+
+        # Walk the matched names' index buckets lazily; stop one past the limit
+        for kind, name in self.names_containing(text):
+            for bucket in self._buckets_for(kind, name):
+                for number in bucket:
+                    if len(results) > limit:
+                        return {"results": results[:limit], "has_more": True}
+                    flight = self._store.get(number)
+                    if flight is not None and number not in seen:
+                        seen.add(number)
+                        results.append(self._hit(flight, needle))
+
+        return {"results": results[:limit], "has_more": len(results) > limit}
+
+    def suggest(self, text, limit=10):
+        """
+        Typeahead: the top flight numbers, airlines and airports for `text`,
+        ranked prefix matches first, then by how many flights they cover.
+        """
+        needle = text.lower()
+        candidates = [("flight", number, 1) for number in self.flight_numbers_with_prefix(text, limit)]
+        candidates += [(kind, name, self._names[kind][name]) for kind, name in self.names_containing(text)]
+        candidates.sort(key=lambda c: (not c[1].lower().startswith(needle), -c[2], c[1]))
+
+        # Highlights only for what is returned
+        return [
+            {"type": kind, "value": value, "count": count, "highlight": _spans(value, needle)}
+            for kind, value, count in candidates[:limit]
+        ]
+
+    def _hit(self, flight, needle):
+        highlights = {}
+        for field in ("flight_number", "airline", "origin", "destination"):
+            value = flight.get(field)
+            if not isinstance(value, str):
+                continue
+            if field == "flight_number":
+                spans = [[0, len(needle)]] if value.lower().startswith(needle) else []
+            else:
+                spans = _spans(value, needle)
+            if spans:
+                highlights[field] = spans
+        return {"flight": display(flight), "highlights": highlights}
+
+    def _buckets_for(self, kind, name):
+        if kind == "airline":
+            return [self._store.flight_numbers("airline", name)]
+        return [self._store.flight_numbers("origin", name), self._store.flight_numbers("destination", name)]
+
+    def _flight_names(self, flight):
+        names = []
+        for kind, field in (("airline", "airline"), ("airport", "origin"), ("airport", "destination")):
+            name = flight.get(field)
+            if isinstance(name, str) and name and name != "N/A":
+                names.append((kind, name))
+        return names
+
+    def _add_number(self, number):
+        if not number or number == "N/A":
+            return
+        key = number.upper()
+        if key not in self._spellings:
+            insort(self._numbers.setdefault(key[:2], []), key)
+        self._spellings[key] = number
+
+    def _remove_number(self, number):
+        if not number or number == "N/A":
+            return
+        key = number.upper()
+        bucket = self._numbers.get(key[:2])
+        if bucket:
+            i = bisect_left(bucket, key)
+            if i < len(bucket) and bucket[i] == key:
+                del bucket[i]
+                self._spellings.pop(key, None)
+            if not bucket:
+                del self._numbers[key[:2]]
+
+    def _hold_name(self, kind, name):
+        names = self._names[kind]
+        names[name] += 1
+        if names[name] == 1:
+            for gram in trigrams(name.lower()):
+                self._trigrams.setdefault(gram, set()).add((kind, name))
+
+    def _release_name(self, kind, name):
+        names = self._names[kind]
+        names[name] -= 1
+        if names[name] <= 0:
+            del names[name]
+            for gram in trigrams(name.lower()):
+                entries = self._trigrams.get(gram)
+                if entries is not None:
+                    entries.discard((kind, name))
+                    if not entries:
+                        del self._trigrams[gram]
+
+
+# ✅ Kept in step with the flight store
+search_index = SearchIndex(flight_store)
@@ -0,0 +1,257 @@
+# backend/shared_snapshot.py
+#
+# Shared-snapshot mode for multi-process deployments:
+#
+#   SHARED_SNAPSHOT_DIR=/dev/shm/flights gunicorn -w 4 -k uvicorn.workers.UvicornWorker backend.main:app
+#
+# One worker holds an flock on {dir}/leader.lock. It is the only one that
+# calls upstream and writes the history archive. After each ingest it writes
+# the snapshot as an Arrow IPC file (snapshot-<version>.arrow), then
+# atomically replaces the CURRENT pointer file. The other workers poll
+# CURRENT and memory-map each new file. The lock dies with its holder, so
+# when the leader exits the next worker to poll takes over.
+#
+# What is shared is the file: the page cache holds it once however many
+# workers map it. Besides the record columns it carries each flight's JSON
+# as /flights shows it, and every worker (the leader included) serves those
+# bodies straight from the mapping. Everything else is still per worker:
+# each one turns the columns into records for its own flight store, and
+# keeps its own search index, aggregates and change log, so those grow with
+# the number of workers. Change-log cursors and ETags name the published
+# version, so a client can move between workers.
+
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+import pyarrow as pa
+from dotenv import load_dotenv
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, so no shared mode
+    fcntl = None
+
+from backend.normalizer import INTERNED_FIELDS, RECORD_FIELDS, display, records
+from backend.wire_format import dumps
+
+load_dotenv()
+
+POINTER = "CURRENT"
+EPOCH = "EPOCH"
+
+# Column of each flight's displayed JSON, next to the RECORD_FIELDS columns
+ENCODED = "json"
+
+
+def version_of(name):
+    # snapshot-<version>.arrow
+    return int(name[len("snapshot-"):-len(".arrow")])
+
+
+class SharedSnapshot:
+    """
+    The snapshot files in `directory`: leader election, publishing, and
+    mapping the current version. Keeps the `keep` newest files; older ones
+    are unlinked, which leaves existing mappings of them valid.
+    """
+
+    def __init__(self, directory, keep=3):
+        if fcntl is None:
+            raise RuntimeError("SHARED_SNAPSHOT_DIR needs fcntl.flock (not available on this platform)")
+        self.directory = directory
+        self.keep = keep
+        self.leader = False
+        self._lock_file = None
+        os.makedirs(directory, exist_ok=True)
+        # Qualifies version numbers in cursors and ETags: versions start over
+        # when the directory is wiped, and a new epoch comes with it
+        self.epoch = self._epoch()
+
+    def try_lead(self):
+        """
+        Take the leader lock if nobody holds it; True while this process leads.
+        """
+        if self.leader:
+            return True
+        if self._lock_file is None:
+            self._lock_file = open(os.path.join(self.directory, "leader.lock"), "a")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        self.leader = True
+        return True
+
+    def current(self):
+        """
+        File name of the published snapshot, or None before the first one.
+        """
+        try:
+            with open(os.path.join(self.directory, POINTER), encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def publish(self, flights, version, limit, fetched_at):
+        """
+        Write `flights` as snapshot `version` (`fetched_at` is wall-clock
+        time) and point CURRENT at it.
+        """
+        name = f"snapshot-{version:010d}.arrow"
+        path = os.path.join(self.directory, name)
+        columns = {field: [flight.get(field) for flight in flights] for field in RECORD_FIELDS}
+        columns[ENCODED] = pa.array([dumps(display(flight)) for flight in flights], type=pa.binary())
+        table = pa.table(columns)
+        table = table.replace_schema_metadata({
+            "version": str(version), "limit": str(limit), "fetched_at": repr(fetched_at),
+        })
+
+        # Readers only ever see complete files: both renames are atomic
+        tmp_path = f"{path}.tmp"
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+        # Hand the table's buffers back to the OS instead of leaving them idle
+        # in Arrow's pool until the next publication
+        del columns, table
+        pa.default_memory_pool().release_unused()
+        pointer = os.path.join(self.directory, POINTER)
+        with open(f"{pointer}.tmp", "w", encoding="utf-8") as f:
+            f.write(name)
+        os.replace(f"{pointer}.tmp", pointer)
+        self._prune()
+        return name
+
+    def open(self, name):
+        """
+        Memory-map a published snapshot: (table, version, limit, fetched_at).
+        The table's buffers point into the mapping; nothing is copied.
+        """
+        source = pa.memory_map(os.path.join(self.directory, name))
+        table = pa.ipc.open_file(source).read_all()
+        metadata = {key.decode(): value.decode() for key, value in (table.schema.metadata or {}).items()}
+        return table, int(metadata["version"]), int(metadata["limit"]), float(metadata["fetched_at"])
+
+    def _epoch(self):
+        path = os.path.join(self.directory, EPOCH)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(uuid.uuid4().hex[:8])
+        try:
+            # Atomic and never overwrites, so the first worker's epoch is everyone's
+            os.link(tmp_path, path)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(tmp_path)
+        with open(path, encoding="utf-8") as f:
+            return f.read().strip()
+
+    def _prune(self):
+        names = sorted(n for n in os.listdir(self.directory) if n.startswith("snapshot-") and n.endswith(".arrow"))
+        for name in names[:-self.keep]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+
+class SnapshotFollower:
+    """
+    Runs shared-snapshot mode in one worker: the leader runs `scheduler`
+    (whose refresh publishes), every other worker polls every `poll`
+    seconds, calls `install(flights, encoded, version, limit, fetched_at)`
+    for each version newer than `current_version()` and tries to take over
+    the lead. `encoded` is the mapped ENCODED column of `flights`.
+    """
+
+    def __init__(self, shared, scheduler, install, current_version, poll=1.0):
+        self.shared = shared
+        self.scheduler = scheduler
+        self._install = install
+        self._current_version = current_version
+        self.poll = poll
+        self._task = None
+        self.swaps = 0
+
+    async def start(self):
+        # Serve what is already published before anything else
+        await self.follow()
+        if self.shared.try_lead():
+            await self.scheduler.start()
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def follow(self):
+        """
+        Install the published snapshot if it is newer than ours; True if it was.
+        """
+        name = self.shared.current()
+        # The leader's own publications are never newer than what it serves
+        if name is None or version_of(name) <= (self._current_version() or 0):
+            return False
+        try:
+            flights, encoded, version, limit, fetched_at = await asyncio.to_thread(self._read, name)
+        except FileNotFoundError:
+            # Pruned between reading CURRENT and opening it; the next poll sees the newer one
+            return False
+        self._install(flights, encoded, version, limit, fetched_at)
+        self.swaps += 1
+        return True
+
+    def status(self):
+        return {
+            "role": "leader" if self.shared.leader else "follower",
+            "published": self.shared.current(),
+            "swaps": self.swaps,
+        }
+
+    def _read(self, name):
+        table, version, limit, fetched_at = self.shared.open(name)
+        # The encoded column stays in the mapping
+        columns = {field: table.column(field).to_pylist() for field in RECORD_FIELDS}
+        # Like the leader's records, each worker's share one string per name
+        for field in INTERNED_FIELDS:
+            columns[field] = [None if value is None else sys.intern(value) for value in columns[field]]
+        return records(columns), table.column(ENCODED), version, limit, fetched_at
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.poll)
+            try:
+                if self.shared.leader:
+                    continue
+                if self.shared.try_lead():
+                    print("✅ Took over as shared-snapshot leader")
+                    await self.follow()
+                    await self.scheduler.start()
+                    continue
+                await self.follow()
+            except Exception as e:
+                print(f"❌ Shared snapshot poll failed: {e}")
+
+
+def wall_time(monotonic_at):
+    """
+    Wall-clock time of a time.monotonic() reading, for other processes.
+    """
+    return time.time() - (time.monotonic() - monotonic_at)
+
+
+# ✅ SHARED_SNAPSHOT_DIR= (empty) keeps every worker on a snapshot of its own
+SHARED_SNAPSHOT_DIR = os.getenv("SHARED_SNAPSHOT_DIR", "")
+# Seconds between a follower's checks for a new version (and for a vacant lead)
+SHARED_SNAPSHOT_POLL = float(os.getenv("SHARED_SNAPSHOT_POLL", "1"))
+shared_snapshot = SharedSnapshot(SHARED_SNAPSHOT_DIR) if SHARED_SNAPSHOT_DIR else None
@@ -0,0 +1,153 @@
+# backend/snapshot_cache.py
+
+import asyncio
+import time
+
+
+class Snapshot:
+    __slots__ = ("flights", "limit", "fetched_at", "version")
+
+    def __init__(self, flights, limit, fetched_at, version):
+        self.flights = flights
+        self.limit = limit
+        self.fetched_at = fetched_at
+        self.version = version
+
+    @property
+    def age(self):
+        return time.monotonic() - self.fetched_at
+
+
+class SnapshotCache:
+    """
+    Keep the largest flight snapshot fetched so far and serve every limit from it.
+
+    Fresh for `ttl` seconds; after that it is still served for `stale_ttl` seconds
+    while a single background refresh replaces it. Concurrent misses share one
+    call of the async `loader`, which always fetches at least `min_limit` flights.
+    A miss whose load fails falls back to the current snapshot, whatever its
+    age, and so does every miss for `error_ttl` seconds after, so a failing
+    upstream is not called again on every request.
+
+    Once `managed` is set, a background scheduler owns refreshing: get() only
+    serves the current snapshot, whatever its age, and never calls the loader.
+    """
+
+    def __init__(self, loader, ttl=60.0, stale_ttl=240.0, min_limit=1, error_ttl=5.0):
+        self._loader = loader
+        self.min_limit = min_limit
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.error_ttl = error_ttl
+        self._failed_at = None
+        self.managed = False
+        self._snapshot = None
+        self._version = 0
+        self._inflight = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.fallbacks = 0
+
+    @property
+    def snapshot(self):
+        return self._snapshot
+
+    async def get(self, limit):
+        snapshot = self._snapshot
+        if self.managed:
+            if snapshot is None:
+                self.misses += 1
+                return []
+            self.hits += 1
+            return snapshot.flights[:limit]
+
+        if snapshot is not None and snapshot.limit >= limit:
+            age = snapshot.age
+            if age < self.ttl:
+                self.hits += 1
+                return snapshot.flights[:limit]
+            if age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                self._refresh_in_background(snapshot.limit)
+                return snapshot.flights[:limit]
+
+        # Upstream trouble: the last good snapshot, however old, beats no data
+        if snapshot is not None and self._failed_at is not None and time.monotonic() - self._failed_at < self.error_ttl:
+            self.fallbacks += 1
+            return snapshot.flights[:limit]
+
+        self.misses += 1
+        load_limit = max(limit, self.min_limit, snapshot.limit if snapshot is not None else 0)
+        try:
+            # Shielded so a disconnecting client does not cancel the load others wait on
+            snapshot = await asyncio.shield(self._load(load_limit))
+        except Exception:
+            if self._snapshot is None:
+                raise
+            self.fallbacks += 1
+            return self._snapshot.flights[:limit]
+        return snapshot.flights[:limit]
+
+    async def refresh(self, limit=None):
+        """
+        Load a new snapshot now and swap it in; on failure the current one stays.
+        """
+        if limit is None:
+            limit = max(self.min_limit, self._snapshot.limit if self._snapshot is not None else 0)
+        return await asyncio.shield(self._load(limit))
+
+    def stats(self):
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "fallbacks": self.fallbacks,
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+    def install(self, flights, limit, version, fetched_at):
+        """
+        Make a snapshot loaded elsewhere (another process) current; later
+        loads number their versions on from it.
+        """
+        self._version = version
+        self._snapshot = Snapshot(flights, limit, fetched_at, version)
+        return self._snapshot
+
+    def invalidate(self):
+        self._snapshot = None
+
+    def _load(self, limit):
+        # Any in-flight load at least this large can answer us too
+        task = next((t for l, t in self._inflight.items() if l >= limit), None)
+        if task is None:
+            task = asyncio.ensure_future(self._run(limit))
+            self._inflight[limit] = task
+            task.add_done_callback(lambda _: self._inflight.pop(limit, None))
+        return task
+
+    async def _run(self, limit):
+        try:
+            flights = await self._loader(limit)
+        except Exception as e:
+            self._failed_at = time.monotonic()
+            if self._snapshot is not None:
+                print(f"❌ Snapshot load failed, keeping version {self._snapshot.version}: {e}")
+            raise
+        self._failed_at = None
+        self._version += 1
+        self._snapshot = Snapshot(flights, limit, time.monotonic(), self._version)
+        return self._snapshot
+
+    def _refresh_in_background(self, limit):
+        if any(l >= limit for l in self._inflight):
+            return
+
+        def report(task):
+            # Already logged by _run; retrieved so asyncio does not warn about it
+            if not task.cancelled():
+                task.exception()
+
+        self._load(limit).add_done_callback(report)
@@ -0,0 +1,247 @@
+# backend/stream_hub.py
+#
+# Server-Sent Events fan-out of flight changes (GET /stream/flights).
+#
+# Changes are collected while an ingest updates the store and flushed once
+# it yields to the event loop. Subscribers with the same filters share a
+# group, so each flushed batch is filtered and encoded once per group, not
+# once per connection. An idle subscriber costs one parked coroutine and an
+# asyncio.Event.
+
+import asyncio
+import json
+import os
+from collections import deque
+
+from dotenv import load_dotenv
+
+from backend.aggregates import flight_aggregates
+from backend.change_log import change_log, describe_change, merge_change, net_change, render_change
+from backend.flight_store import flight_store
+
+load_dotenv()
+
+# Unsent change batches a subscriber may fall behind by before it is told to resync
+STREAM_MAX_QUEUED = int(os.getenv("STREAM_MAX_QUEUED", "32"))
+# Seconds between keep-alive comments on an idle stream
+STREAM_HEARTBEAT = float(os.getenv("STREAM_HEARTBEAT", "15"))
+
+FILTER_FIELDS = ("airline", "origin", "destination")
+
+HEARTBEAT = b": ping\n\n"
+
+
+def sse(event, data, id=None):
+    """
+    One encoded SSE message; `data` is sent as a single JSON line.
+    """
+    head = f"id: {id}\n" if id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+
+class Subscriber:
+    __slots__ = ("group", "queue", "aggregates", "overflowed", "wakeup")
+
+    def __init__(self, group):
+        self.group = group
+        self.queue = deque()
+        self.aggregates = None
+        self.overflowed = False
+        self.wakeup = asyncio.Event()
+
+    def push(self, message):
+        """
+        Queue a change batch; False when this overflowed the queue.
+        """
+        if self.overflowed:
+            return True
+        self.wakeup.set()
+        if len(self.queue) >= STREAM_MAX_QUEUED:
+            # Too far behind to catch up batch by batch: drop them and have it resync
+            self.queue.clear()
+            self.overflowed = True
+            return False
+        self.queue.append(message)
+        return True
+
+    def push_aggregates(self, message):
+        # Only the latest aggregates matter, so a slow client skips the ones in between
+        self.aggregates = message
+        self.wakeup.set()
+
+
+class _Group:
+    __slots__ = ("filters", "key", "subscribers", "changes")
+
+    def __init__(self, filters):
+        self.filters = filters
+        # Indexed by its first filter, so a change only visits groups it can match
+        self.key = filters[0] if filters else None
+        self.subscribers = set()
+        self.changes = []
+
+    def matches(self, flight):
+        return all(flight.get(field) == value for field, value in self.filters)
+
+
+class StreamHub:
+    """
+    Pushes store changes to SSE subscribers as "changes" events (the
+    /flights/changes format, id = its cursor) and the headline aggregates as
+    "aggregates" events, once per flushed ingest batch.
+
+    A subscriber that falls STREAM_MAX_QUEUED batches behind has them dropped
+    and gets a "reset" event: it should refetch, then resume from the cursor
+    in that event. Aggregates are coalesced to the latest.
+    """
+
+    def __init__(self, store, aggregates):
+        self._aggregates = aggregates
+        self._groups = {}
+        self._index = {}
+        self._pending = {}
+        self._loop = None
+        self._flush_scheduled = False
+        self.subscribers = 0
+        self.overflows = 0
+        self.batches = 0
+        store.subscribe(self.apply, replay=False)
+
+    def subscribe(self, airline=None, origin=None, destination=None):
+        self._loop = asyncio.get_running_loop()
+        values = {"airline": airline, "origin": origin, "destination": destination}
+        filters = tuple((field, values[field]) for field in FILTER_FIELDS if values[field])
+        group = self._groups.get(filters)
+        if group is None:
+            group = self._groups[filters] = _Group(filters)
+            self._index.setdefault(group.key, set()).add(group)
+        subscriber = Subscriber(group)
+        group.subscribers.add(subscriber)
+        self.subscribers += 1
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        group = subscriber.group
+        if subscriber not in group.subscribers:
+            return
+        group.subscribers.discard(subscriber)
+        self.subscribers -= 1
+        if not group.subscribers:
+            del self._groups[group.filters]
+            keyed = self._index[group.key]
+            keyed.discard(group)
+            if not keyed:
+                del self._index[group.key]
+
+    def apply(self, previous, current):
+        if not self.subscribers:
+            return
+        change = describe_change(previous, current)
+        if change is None:
+            return
+        op, flight_number, payload, before = change
+
+        # Both versions are kept for matching: a flight leaving a filter is news to it too
+        earlier = self._pending.get(flight_number)
+        versions = earlier[3] if earlier is not None else []
+        versions.extend(flight for flight in (previous, current) if flight is not None)
+        self._pending[flight_number] = (
+            *merge_change(earlier[:3] if earlier else None, op, payload, before), versions
+        )
+
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self._loop.call_soon_threadsafe(self._flush)
+
+    def _flush(self):
+        self._flush_scheduled = False
+        pending, self._pending = self._pending, {}
+        if not self.subscribers:
+            return
+        self.batches += 1
+
+        index = self._index
+        touched = set()
+        for flight_number, (op, payload, base, versions) in pending.items():
+            net = net_change(op, payload, base)
+            if net is None:
+                continue
+            matched = set()
+            for flight in versions:
+                for key in (None, *((field, flight.get(field)) for field in FILTER_FIELDS)):
+                    for group in index.get(key, ()):
+                        if group not in matched and group.matches(flight):
+                            matched.add(group)
+            if matched:
+                change = render_change(flight_number, *net)
+                for group in matched:
+                    group.changes.append(change)
+                touched |= matched
+
+        cursor = change_log.cursor
+        for group in touched:
+            message = sse("changes", {"cursor": cursor, "changes": group.changes}, id=cursor)
+            group.changes = []
+            for subscriber in group.subscribers:
+                if not subscriber.push(message):
+                    self.overflows += 1
+
+        aggregates = self._aggregates
+        message = sse("aggregates", {
+            "flight_count": aggregates.flight_count,
+            "price_stats": aggregates.price_stats(),
+            "status_breakdown": aggregates.status_breakdown(),
+            "top_routes": aggregates.top_routes(5),
+        })
+        for group in self._groups.values():
+            for subscriber in group.subscribers:
+                subscriber.push_aggregates(message)
+
+    async def events(self, airline=None, origin=None, destination=None, last_event_id=None):
+        """
+        The SSE byte stream of one subscriber, until the client goes away.
+        Resuming from `last_event_id` (a change-log cursor) first replays what
+        the client missed.
+        """
+        # Subscribed once streaming starts, so the finally below always unsubscribes
+        subscriber = self.subscribe(airline, origin, destination)
+        try:
+            filters = dict(subscriber.group.filters)
+            yield b"retry: 5000\n\n" + sse("ready", {"cursor": change_log.cursor, "filters": filters})
+            if last_event_id:
+                yield self._backlog(subscriber.group, last_event_id)
+
+            while True:
+                try:
+                    await asyncio.wait_for(subscriber.wakeup.wait(), STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield HEARTBEAT
+                    continue
+                subscriber.wakeup.clear()
+
+                if subscriber.overflowed:
+                    subscriber.overflowed = False
+                    yield sse("reset", {"cursor": change_log.cursor}, id=change_log.cursor)
+                while subscriber.queue:
+                    yield subscriber.queue.popleft()
+                if subscriber.aggregates is not None:
+                    message, subscriber.aggregates = subscriber.aggregates, None
+                    yield message
+        finally:
+            self.unsubscribe(subscriber)
+
+    def _backlog(self, group, cursor):
+        missed = change_log.since(cursor, limit=100_000)
+        if missed["reset"] or missed["has_more"]:
+            return sse("reset", {"cursor": change_log.cursor}, id=change_log.cursor)
+        changes = []
+        for change in missed["changes"]:
+            flight = change.get("flight") or flight_store.get(change["flight_number"])
+            # Removed flights are gone from the store; passing them on is harmless
+            if flight is None or group.matches(flight):
+                changes.append(change)
+        return sse("changes", {"cursor": missed["cursor"], "changes": changes}, id=missed["cursor"])
+
+
+# ✅ Kept in step with the flight store
+hub = StreamHub(flight_store, flight_aggregates)
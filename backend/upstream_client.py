@@ -0,0 +1,471 @@
+# backend/upstream_client.py
+#
+# Every AviationStack request goes through one UpstreamClient:
+#
+# - a token bucket spreads what is left of the plan's monthly quota over
+#   what is left of the month (bursts of UPSTREAM_BURST requests allowed)
+# - timeouts, connection errors, 429s and 5xxs are retried with jittered
+#   exponential backoff
+# - a circuit breaker stops calling an upstream that keeps failing; the
+#   snapshot cache meanwhile serves the last good snapshot
+#
+# Requests that may not go out raise UpstreamUnavailable without touching
+# the network.
+
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+
+import httpx
+from dotenv import load_dotenv
+
+from backend.metrics import (
+    UPSTREAM_ERRORS, UPSTREAM_REJECTED, UPSTREAM_REQUEST_DURATION, UPSTREAM_RETRIES, record_stage
+)
+
+load_dotenv()
+
+# Requests per calendar month (UTC) in the AviationStack plan; 0 = unlimited
+UPSTREAM_MONTHLY_QUOTA = int(os.getenv("UPSTREAM_MONTHLY_QUOTA", "0"))
+# Requests that may go out back to back before the monthly pace applies
+UPSTREAM_BURST = int(os.getenv("UPSTREAM_BURST", "10"))
+# Seconds a request may queue for a token before it is rejected instead
+UPSTREAM_MAX_WAIT = float(os.getenv("UPSTREAM_MAX_WAIT", "5"))
+# The month's request count survives restarts in this file; empty keeps it in memory
+UPSTREAM_QUOTA_PATH = os.getenv("UPSTREAM_QUOTA_PATH") or None
+# Seconds of requests counted before the file is rewritten (and always on shutdown)
+UPSTREAM_QUOTA_SAVE_INTERVAL = float(os.getenv("UPSTREAM_QUOTA_SAVE_INTERVAL", "5"))
+
+# Retries of a retryable failure, with full-jitter backoff from UPSTREAM_BACKOFF up to UPSTREAM_BACKOFF_MAX
+UPSTREAM_MAX_RETRIES = int(os.getenv("UPSTREAM_MAX_RETRIES", "3"))
+UPSTREAM_BACKOFF = float(os.getenv("UPSTREAM_BACKOFF", "0.5"))
+UPSTREAM_BACKOFF_MAX = float(os.getenv("UPSTREAM_BACKOFF_MAX", "10"))
+
+# Consecutive failed calls that open the circuit, and seconds until it lets a trial call through
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "60"))
+
+# AviationStack error code once the plan's monthly requests are used up
+USAGE_LIMIT_REACHED = "usage_limit_reached"
+
+
+class UpstreamUnavailable(Exception):
+    """
+    No request was sent: `reason` is rate_limited, quota_exhausted or circuit_open.
+    """
+
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+
+
+def _month_bounds(now=None):
+    now = now or datetime.now(timezone.utc)
+    start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    end = start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+    return start, end
+
+
+class QuotaTracker:
+    """
+    Requests sent this calendar month against a monthly `limit` (0 =
+    unlimited). Upstream saying the quota is used up counts as exhausted
+    whatever our own count says. With `path` set, the count is persisted as
+    JSON and reloaded on start-up. The file is rewritten (off the event loop)
+    at most once per `save_interval` seconds of requests, and by flush() on
+    shutdown; a crash loses at most that many seconds of counting.
+    """
+
+    def __init__(self, limit=0, path=None, save_interval=5.0):
+        self.limit = limit
+        self.path = path
+        self.save_interval = save_interval
+        self.month = _month_bounds()[0].strftime("%Y-%m")
+        self.used = 0
+        self.exhausted = False
+        self._dirty = False
+        self._save_handle = None
+        self._write_lock = threading.Lock()
+        if path:
+            self._load()
+
+    @property
+    def remaining(self):
+        """
+        Requests left this month; None when unlimited and not exhausted.
+        """
+        self._roll()
+        if self.exhausted:
+            return 0
+        if not self.limit:
+            return None
+        return max(0, self.limit - self.used)
+
+    def seconds_left(self):
+        return max(1.0, (_month_bounds()[1] - datetime.now(timezone.utc)).total_seconds())
+
+    def record(self):
+        self._roll()
+        self.used += 1
+        self._changed()
+
+    def exhaust(self):
+        self._roll()
+        self.exhausted = True
+        self._changed()
+
+    async def flush(self):
+        """
+        Write the count to `path` now if it changed.
+        """
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+        if not self._dirty:
+            return
+        self._dirty = False
+        await asyncio.to_thread(self._save, self._state())
+
+    def status(self):
+        return {
+            "month": self.month,
+            "limit": self.limit or None,
+            "used": self.used,
+            "remaining": self.remaining,
+            "exhausted": self.exhausted,
+            "resets_at": _month_bounds()[1].isoformat(),
+        }
+
+    def _roll(self):
+        month = _month_bounds()[0].strftime("%Y-%m")
+        if month != self.month:
+            self.month, self.used, self.exhausted = month, 0, False
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"❌ Ignoring unreadable upstream quota file {self.path}: {e}")
+            return
+        if stored.get("month") == self.month:
+            self.used = int(stored.get("used", 0))
+            self.exhausted = bool(stored.get("exhausted", False))
+
+    def _state(self):
+        return {"month": self.month, "used": self.used, "exhausted": self.exhausted}
+
+    def _changed(self):
+        if not self.path:
+            return
+        self._dirty = True
+        if self._save_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop to defer to: write now
+            self._dirty = False
+            self._save(self._state())
+            return
+        self._save_handle = loop.call_later(self.save_interval, self._save_later)
+
+    def _save_later(self):
+        self._save_handle = None
+        task = asyncio.ensure_future(self.flush())
+        # Failures are logged by _save; retrieved so asyncio does not warn
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    def _save(self, state):
+        tmp_path = f"{self.path}.tmp"
+        # Counts only grow within a month, so a late write of an older state
+        # is caught up by the next one; the lock keeps the two from mixing
+        with self._write_lock:
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(state, f)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                print(f"❌ Could not persist upstream quota: {e}")
+
+
+class TokenBucket:
+    """
+    `capacity` tokens refilled at `rate` per second. A caller that has to
+    wait reserves its token first, so concurrent callers queue in order.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+
+    @property
+    def tokens(self):
+        self._refill()
+        return self._tokens
+
+    async def acquire(self, max_wait=0.0):
+        """
+        Take a token, waiting for it up to `max_wait` seconds; False (and
+        nothing taken) when it would take longer.
+        """
+        self._refill()
+        wait = (1 - self._tokens) / self.rate if self._tokens < 1 else 0.0
+        if wait > max_wait:
+            return False
+        self._tokens -= 1
+        if wait:
+            await asyncio.sleep(wait)
+        return True
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class CircuitBreaker:
+    """
+    Closed until `failure_threshold` consecutive calls fail; open then
+    rejects calls for `reset_timeout` seconds, after which it is half-open:
+    one trial call goes through, and closes it on success or reopens it on
+    failure.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opens = 0
+        self._opened_at = None
+        self._trial = False
+
+    def allow(self):
+        """
+        Whether a call may start now; a half-open breaker admits one at a time.
+        """
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self.state = "half_open"
+        if self._trial:
+            return False
+        self._trial = True
+        return True
+
+    def release(self):
+        # The admitted call ended without reaching upstream; it proves nothing either way
+        self._trial = False
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self._trial = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial = False
+        if self.state == "half_open" or (self.state == "closed" and self.failures >= self.failure_threshold):
+            self.state = "open"
+            self.opens += 1
+            self._opened_at = time.monotonic()
+
+    def retry_after(self):
+        if self.state != "open":
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def status(self):
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "opens": self.opens,
+            "retry_after": round(self.retry_after(), 1),
+        }
+
+
+def error_reason(error):
+    if isinstance(error, httpx.HTTPStatusError):
+        return f"http_{error.response.status_code}"
+    if isinstance(error, httpx.TimeoutException):
+        return "timeout"
+    if isinstance(error, httpx.TransportError):
+        return "transport"
+    return "invalid_payload"
+
+
+def _error_code(response):
+    # AviationStack errors look like {"error": {"code": "usage_limit_reached", "message": ...}}
+    try:
+        error = response.json().get("error")
+    except Exception:
+        return None
+    return error.get("code") if isinstance(error, dict) else None
+
+
+def _retry_after(response):
+    try:
+        return float(response.headers.get("Retry-After", ""))
+    except ValueError:
+        return None
+
+
+class UpstreamClient:
+    """
+    Guarded GETs of AviationStack JSON; see the module comment. `get` takes
+    the httpx client per call, so bulk ingestion can bring its own.
+    """
+
+    def __init__(self, quota, breaker, burst=UPSTREAM_BURST, max_wait=UPSTREAM_MAX_WAIT,
+                 max_retries=UPSTREAM_MAX_RETRIES, backoff=UPSTREAM_BACKOFF, backoff_max=UPSTREAM_BACKOFF_MAX):
+        self.quota = quota
+        self.breaker = breaker
+        self.max_wait = max_wait
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.bucket = TokenBucket(self._pace(), burst) if quota.limit else None
+        self.retries = 0
+
+    async def get(self, client, url, params):
+        """
+        The JSON payload at `url`, retrying retryable failures. Raises
+        UpstreamUnavailable when no request may be sent, else the last error.
+        """
+        breaker = self.breaker
+        if not breaker.allow():
+            raise self._reject("circuit_open", f"Upstream circuit open, next trial in {breaker.retry_after():.0f}s")
+
+        settled = failed = False
+        try:
+            for attempt in range(self.max_retries + 1):
+                await self._take_token()
+                try:
+                    data = await self._attempt(client, url, params)
+                except Exception as e:
+                    failed = True
+                    delay = self._retry_delay(e, attempt)
+                    if delay is None:
+                        breaker.record_failure()
+                        settled = True
+                        raise
+                    self.retries += 1
+                    UPSTREAM_RETRIES.inc()
+                    await asyncio.sleep(delay)
+                    continue
+                breaker.record_success()
+                settled = True
+                return data
+        finally:
+            if not settled:
+                # Rejected by the rate limiter or cancelled between attempts
+                breaker.record_failure() if failed else breaker.release()
+
+    def min_interval(self, requests):
+        """
+        Seconds between runs of `requests` requests that the remaining quota
+        can sustain until the month ends; 0 when unlimited.
+        """
+        if self.bucket is None:
+            return 0.0
+        return requests / self._pace()
+
+    def status(self):
+        rate_limit = None
+        if self.bucket is not None:
+            self.bucket.rate = self._pace()
+            rate_limit = {
+                "per_hour": round(self.bucket.rate * 3600, 2),
+                "burst": self.bucket.capacity,
+                "tokens": round(max(0.0, self.bucket.tokens), 2),
+            }
+        return {
+            "quota": self.quota.status(),
+            "rate_limit": rate_limit,
+            "circuit": self.breaker.status(),
+            "retries": self.retries,
+        }
+
+    def _pace(self):
+        # What is left of the quota, spread over what is left of the month
+        remaining = self.quota.remaining
+        return max(remaining or 0, 1) / self.quota.seconds_left()
+
+    async def _take_token(self):
+        quota = self.quota
+        if quota.remaining == 0:
+            raise self._reject("quota_exhausted", f"Monthly upstream quota used up until {quota.status()['resets_at']}")
+        if self.bucket is not None:
+            self.bucket.rate = self._pace()
+            if not await self.bucket.acquire(self.max_wait):
+                raise self._reject("rate_limited", "Upstream rate limit reached for this month's quota")
+        quota.record()
+
+    async def _attempt(self, client, url, params):
+        start = time.perf_counter()
+        try:
+            response = await client.get(url, params=params)
+            if response.status_code >= 400 and _error_code(response) == USAGE_LIMIT_REACHED:
+                self.quota.exhaust()
+            response.raise_for_status()
+            data = response.json()
+
+            # ❗ Check that the response contains expected data
+            if not isinstance(data, dict) or 'data' not in data:
+                raise ValueError(f"API response is invalid or missing 'data' key: {data}")
+        except Exception as e:
+            UPSTREAM_REQUEST_DURATION.observe(time.perf_counter() - start, "error")
+            UPSTREAM_ERRORS.inc(error_reason(e))
+            raise
+        elapsed = time.perf_counter() - start
+        UPSTREAM_REQUEST_DURATION.observe(elapsed, "ok")
+        record_stage("upstream", elapsed)
+        return data
+
+    def _retry_delay(self, error, attempt):
+        """
+        Seconds to back off before retrying `error`, or None to give up.
+        """
+        if attempt >= self.max_retries:
+            return None
+        retry_after = None
+        if isinstance(error, httpx.HTTPStatusError):
+            response = error.response
+            if response.status_code != 429 and response.status_code < 500:
+                return None
+            if self.quota.exhausted:
+                return None
+            retry_after = _retry_after(response)
+        elif not isinstance(error, httpx.TransportError):
+            # Invalid payloads will not fix themselves on a retry
+            return None
+
+        # Full jitter: concurrent callers that failed together retry apart
+        delay = random.uniform(0, min(self.backoff_max, self.backoff * 2 ** attempt))
+        if retry_after is not None:
+            if retry_after > self.backoff_max:
+                return None
+            delay = max(delay, retry_after)
+        return delay
+
+    def _reject(self, reason, message):
+        UPSTREAM_REJECTED.inc(reason)
+        return UpstreamUnavailable(reason, message)
+
+
+# ✅ One quota, rate limit and circuit for the whole process
+upstream = UpstreamClient(
+    QuotaTracker(UPSTREAM_MONTHLY_QUOTA, UPSTREAM_QUOTA_PATH, UPSTREAM_QUOTA_SAVE_INTERVAL),
+    CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT)
+)
@@ -0,0 +1,236 @@
+# backend/wire_format.py
+
+import gzip
+import json
+
+import brotli
+import numpy as np
+import orjson
+import pyarrow as pa
+from fastapi.responses import JSONResponse
+
+from backend.flight_store import flight_store
+from backend.normalizer import display
+
+JSON = "application/json"
+COLUMNAR_JSON = "application/vnd.flights.columnar+json"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+# ?format= shorthands for clients that cannot set Accept
+FORMATS = {"json": JSON, "columnar": COLUMNAR_JSON, "arrow": ARROW_STREAM}
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_BYTES = 1024
+
+
+def _accepted(header):
+    """
+    Tokens of an Accept/Accept-Encoding header with q > 0, most preferred first.
+    """
+    ranked = []
+    for position, part in enumerate(header.split(",")):
+        token, *params = (p.strip() for p in part.split(";"))
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if token and q > 0:
+            ranked.append((-q, position, token.lower()))
+    return [token for _, _, token in sorted(ranked)]
+
+
+def choose_format(accept, requested=None):
+    """
+    Media type for a response: an explicit ?format= wins, then the Accept header.
+    """
+    if requested:
+        return FORMATS[requested]
+    for media_type in _accepted(accept or ""):
+        if media_type in (ARROW_STREAM, COLUMNAR_JSON, JSON):
+            return media_type
+    return JSON
+
+
+def choose_encoding(accept_encoding):
+    accepted = _accepted(accept_encoding or "")
+    for encoding in ("br", "gzip"):
+        if encoding in accepted:
+            return encoding
+    return None
+
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6)
+    return body
+
+
+def dumps(payload):
+    """
+    Compact UTF-8 JSON via orjson; what it cannot encode natively goes through str().
+    """
+    return orjson.dumps(payload, default=str, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered by orjson: several times faster than json.dumps,
+    and NaN comes out as null instead of raising.
+    """
+
+    def render(self, content):
+        return dumps(content)
+
+
+class EncodedFlights:
+    """
+    The JSON bytes of each store flight as displayed, encoded once per
+    version of that flight. Store listeners drop an entry when its flight
+    changes, and a hit also needs the very dict that was encoded, so a
+    flight that is not (or no longer) the stored one is never served stale.
+    """
+
+    def __init__(self, store):
+        self._encoded = {}
+        store.subscribe(self.apply, replay=False)
+
+    def __len__(self):
+        return len(self._encoded)
+
+    def apply(self, previous, current):
+        if previous is not None and previous is not current:
+            self._encoded.pop(previous.get("flight_number"), None)
+
+    def get(self, flight):
+        flight_number = flight.get("flight_number")
+        entry = self._encoded.get(flight_number)
+        if entry is not None and entry[0] is flight:
+            return entry[1]
+        encoded = dumps(display(flight))
+        self._encoded[flight_number] = (flight, encoded)
+        return encoded
+
+
+class PublishedFlights:
+    """
+    The JSON bytes of each flight of the installed shared snapshot, sliced
+    out of its memory-mapped file (see backend.shared_snapshot): the workers
+    serve the one copy in the page cache instead of each encoding and caching
+    its own. A flight that is not (or no longer) the installed one is
+    encoded on the spot.
+    """
+
+    def __init__(self):
+        self._installed = ([], {}, None, None)
+
+    def __len__(self):
+        return len(self._installed[1])
+
+    def install(self, flights, encoded):
+        """
+        `encoded` is a binary column whose row i holds flights[i] as displayed.
+        """
+        array = encoded.chunk(0) if encoded.num_chunks == 1 else encoded.combine_chunks()
+        _, offsets, data = array.buffers()
+        # Views into the mapping; they keep it open after the file is pruned
+        offsets = np.frombuffer(offsets, dtype=np.int32)[array.offset:array.offset + len(array) + 1]
+        data = memoryview(data if data is not None else b"")
+        rows = {flight.get("flight_number"): row for row, flight in enumerate(flights)}
+        self._installed = (flights, rows, offsets, data)
+
+    def get(self, flight):
+        flights, rows, offsets, data = self._installed
+        row = rows.get(flight.get("flight_number"))
+        if row is not None and (flights[row] is flight or flights[row] == flight):
+            return data[offsets[row]:offsets[row + 1]]
+        return dumps(display(flight))
+
+
+def to_json(encoded, envelope):
+    """
+    {"flights": [...], **envelope} from already encoded flights.
+    """
+    tail = dumps(envelope)
+    return b'{"flights":[' + b",".join(encoded) + (b"]," + tail[1:] if len(tail) > 2 else b"]}")
+
+
+def _columns(flights):
+    names = dict.fromkeys(key for flight in flights for key in flight)
+    return {name: [flight.get(name) for flight in flights] for name in names}
+
+
+def _dictionary_encode(values):
+    """
+    (codes, dictionary) for a column of strings/None repeating often enough to
+    pay off, else None.
+    """
+    dictionary = {}
+    codes = [dictionary.setdefault(v, len(dictionary)) for v in values if v is None or isinstance(v, str)]
+    if len(codes) != len(values) or len(dictionary) * 2 > len(values):
+        return None
+    return codes, list(dictionary)
+
+
+def to_columnar_json(flights, envelope):
+    """
+    {"columns": {name: [...]}, "dictionaries": {name: [...]}, "length": n, **envelope}.
+    A column listed in "dictionaries" holds indexes into its dictionary.
+    """
+    columns, dictionaries = {}, {}
+    for name, values in _columns(flights).items():
+        encoded = _dictionary_encode(values)
+        if encoded is None:
+            columns[name] = values
+        else:
+            columns[name], dictionaries[name] = encoded
+    payload = {**envelope, "length": len(flights), "columns": columns, "dictionaries": dictionaries}
+    return dumps(payload)
+
+
+def to_arrow_ipc(flights, envelope):
+    """
+    Arrow IPC stream of the flights; repetitive string columns are dictionary
+    arrays and the envelope travels as JSON in the schema metadata.
+    """
+    arrays = {}
+    for name, values in _columns(flights).items():
+        try:
+            array = pa.array(values)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Mixed-type column (e.g. numbers and "N/A"): ship it as text
+            array = pa.array([None if v is None else str(v) for v in values], type=pa.string())
+        if pa.types.is_string(array.type) and _dictionary_encode(values) is not None:
+            array = array.dictionary_encode()
+        arrays[name] = array
+
+    table = pa.table(arrays).replace_schema_metadata({"envelope": json.dumps(envelope, default=str)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def encode_flights(flights, envelope, media_type, cache=None):
+    """
+    Body bytes for `flights` plus the rest of the response (`envelope`) in
+    `media_type`. Flights from the store can reuse their JSON through `cache`
+    (an EncodedFlights or PublishedFlights).
+    """
+    if media_type == JSON:
+        encode = cache.get if cache is not None else (lambda flight: dumps(display(flight)))
+        return to_json([encode(flight) for flight in flights], envelope)
+    flights = [display(f) for f in flights]
+    if media_type == ARROW_STREAM:
+        return to_arrow_ipc(flights, envelope)
+    return to_columnar_json(flights, envelope)
+
+
+# ✅ Kept in step with the flight store
+encoded_flights = EncodedFlights(flight_store)
+# ✅ Installed with each shared snapshot (SHARED_SNAPSHOT_DIR)
+published_flights = PublishedFlights()
@@ -0,0 +1,13 @@
+# benchmarks/__init__.py
+#
+# Performance benchmarks; run modules from the repository root:
+#
+#   python -m benchmarks.suite            end-to-end suite with JSON results and regression check
+#   python -m benchmarks.bench_normalize  ingest normalizer throughput
+#   python -m benchmarks.bench_quantiles  KLL sketch accuracy vs memory
+#   python -m benchmarks.bench_shared     multi-worker memory, upstream calls and reads with/without the shared snapshot
+#   python -m benchmarks.bench_stream     thousands of idle /stream/flights subscribers on one worker
+#   python -m benchmarks.bench_upstream   rate limiter, retries and circuit breaker against a failing upstream
+#
+# upstream_stub serves synthetic AviationStack pages (with injectable faults)
+# for these and the tests; payloads generates records in-process.
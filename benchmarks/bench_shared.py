@@ -0,0 +1,196 @@
+# benchmarks/bench_shared.py
+#
+# Multi-worker deployments with and without the shared snapshot
+# (SHARED_SNAPSHOT_DIR):
+#
+#   python -m benchmarks.bench_shared --workers 4 --flights 20000
+#
+# For each mode, uvicorn runs --workers processes against the local stub
+# with background ingest every --interval seconds. Reported per mode:
+#
+# - upstream requests per ingest interval (the stub counts them)
+# - RSS and PSS of each worker process, and of all of them together (RSS
+#   counts a page in every worker that maps it, PSS splits it between them)
+# - read throughput of GET /flights from --clients concurrent clients, each
+#   paging through the whole snapshot
+# - shared mode only: seconds from a new CURRENT pointer until every
+#   worker's responses carry the new X-Snapshot-Version
+#
+# Throughput can only scale with workers when there are cores for them;
+# os.cpu_count() is printed alongside.
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.upstream_stub import start_stub_server
+
+
+def rss_mb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def pss_mb(pid):
+    # Proportional set size: pages shared by n processes count 1/n in each,
+    # so the sum over workers is what they take together
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Pss:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def children(pid):
+    found = []
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    if int(f.read().rsplit(")", 1)[1].split()[1]) == pid:
+                        found.append(int(entry))
+            except OSError:
+                pass
+    return found
+
+
+async def throughput(base, clients, seconds, flights):
+    done = 0
+    deadline = time.monotonic() + seconds
+    pages = -(-flights // 50)
+
+    async def client(index):
+        nonlocal done
+        # Each client pages through the whole snapshot, from its own starting page
+        page = index * pages // clients
+        async with httpx.AsyncClient(base_url=base, timeout=30) as http:
+            while time.monotonic() < deadline:
+                page = page % pages + 1
+                response = await http.get("/flights", params={"page_size": 50, "page": page})
+                response.raise_for_status()
+                done += 1
+
+    await asyncio.gather(*(client(index) for index in range(clients)))
+    return done / seconds
+
+
+async def swap_lag(base, directory, workers, timeout=30):
+    """
+    Seconds from the next CURRENT change until 10 x `workers` consecutive
+    responses carry the new version.
+    """
+    pointer = os.path.join(directory, "CURRENT")
+    before = os.stat(pointer).st_mtime_ns
+    deadline = time.monotonic() + timeout
+    while os.stat(pointer).st_mtime_ns == before:
+        if time.monotonic() > deadline:
+            return None
+        await asyncio.sleep(0.005)
+    published = time.monotonic()
+    with open(pointer) as f:
+        version = int(f.read().strip()[len("snapshot-"):-len(".arrow")])
+
+    # New connections per request, so the kernel spreads them over the workers
+    streak = 0
+    while streak < workers * 10:
+        if time.monotonic() > deadline:
+            return None
+        async with httpx.AsyncClient(base_url=base, timeout=10) as http:
+            seen = int((await http.get("/health")).headers.get("X-Snapshot-Version", 0))
+        streak = streak + 1 if seen >= version else 0
+    return time.monotonic() - published
+
+
+async def measure(args, stub, upstream, shared):
+    port = args.port
+    directory = tempfile.mkdtemp(prefix="shared-snapshot-") if shared else ""
+    env = {
+        **os.environ,
+        "AVIATIONSTACK_BASE_URL": upstream,
+        "BACKGROUND_INGEST": "true",
+        "INGEST_INTERVAL": str(args.interval),
+        "INGEST_JITTER": "0",
+        "INGEST_MAX_FLIGHTS": str(args.flights),
+        "HISTORY_DB_PATH": "",
+        "INSIGHT_CACHE_PATH": "",
+        "UPSTREAM_MONTHLY_QUOTA": "0",
+        "UPSTREAM_QUOTA_PATH": "",
+        "SHARED_SNAPSHOT_DIR": directory,
+        "SHARED_SNAPSHOT_POLL": str(args.poll),
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port), "--workers", str(args.workers),
+         "--log-level", "warning", "--timeout-graceful-shutdown", "2"],
+        env=env
+    )
+    base = f"http://127.0.0.1:{port}"
+    try:
+        async with httpx.AsyncClient(base_url=base, timeout=30) as http:
+            for _ in range(600):
+                try:
+                    if (await http.get("/health")).json()["snapshot_version"]:
+                        break
+                except (httpx.TransportError, ValueError):
+                    pass
+                await asyncio.sleep(0.1)
+        # Every worker has had a chance to ingest or map the first snapshot
+        await asyncio.sleep(args.interval + args.poll)
+
+        received = stub.RequestHandlerClass.received
+        start_count, start = received[0], time.monotonic()
+        await asyncio.sleep(args.interval * 3)
+        per_interval = (received[0] - start_count) / ((time.monotonic() - start) / args.interval)
+
+        workers = children(server.pid)
+        # uvicorn's supervisor forks the workers; skip its multiprocessing helper
+        workers = [pid for pid in workers if rss_mb(pid) > 30]
+        rate = await throughput(base, args.clients, args.seconds, args.flights)
+        # After the reads: per-worker state built to serve them counts too
+        rss = [rss_mb(pid) for pid in workers]
+        pss = [pss_mb(pid) for pid in workers]
+        lag = await swap_lag(base, directory, args.workers) if shared else None
+    finally:
+        server.terminate()
+        server.wait()
+
+    mode = "shared snapshot" if shared else "per-worker snapshot"
+    print(f"{mode}:")
+    print(f"  upstream requests per interval  {per_interval:.1f} "
+          f"({-(-args.flights // 100)} pages per snapshot)")
+    print(f"  worker RSS                      {' '.join(f'{r:.0f}' for r in rss)} MB "
+          f"(total {sum(rss):.0f} MB)")
+    print(f"  worker PSS                      {' '.join(f'{p:.0f}' for p in pss)} MB "
+          f"(total {sum(pss):.0f} MB)")
+    print(f"  GET /flights                    {rate:.0f} req/s")
+    if shared:
+        print(f"  swap lag                        "
+              f"{f'{lag * 1e3:.0f} ms' if lag is not None else 'not observed'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared-snapshot multi-worker benchmark")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--flights", type=int, default=20000)
+    parser.add_argument("--interval", type=float, default=5.0, help="INGEST_INTERVAL seconds")
+    parser.add_argument("--poll", type=float, default=0.5, help="SHARED_SNAPSHOT_POLL seconds")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10.0, help="throughput measurement")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    print(f"{args.workers} workers, {args.flights} flights per snapshot, {os.cpu_count()} CPUs")
+    stub, upstream = start_stub_server(total=args.flights, churn=0.05)
+    try:
+        for shared in (False, True):
+            asyncio.run(measure(args, stub, upstream, shared))
+    finally:
+        stub.shutdown()
@@ -0,0 +1,188 @@
+# benchmarks/bench_stream.py
+#
+# Thousands of idle /stream/flights subscribers on one uvicorn worker.
+#
+#   python -m benchmarks.bench_stream --subscribers 5000
+#
+# The backend runs as a separate single-worker uvicorn process against the
+# local stub (with --churn, so every snapshot changes some statuses), and
+# the subscribers are raw asyncio sockets in this process. Refreshes are
+# request-driven, so the benchmark decides when each ingest starts; such
+# snapshots hold one upstream page (100 flights). Reported:
+#
+# - worker RSS before and after connecting, and per subscriber
+# - worker CPU while every subscriber idles (heartbeats only)
+# - per ingest: seconds from triggering it until each subscriber received
+#   its "changes" event (includes the upstream fetch and normalization)
+#
+# A quarter of the subscribers filter by airline, a quarter by origin.
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+from urllib.parse import urlencode
+
+import httpx
+
+from benchmarks.upstream_stub import AIRLINES, AIRPORTS, start_stub_server
+
+CLK_TCK = os.sysconf("SC_CLK_TCK")
+
+
+def rss_mb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+
+
+def cpu_seconds(pid):
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / CLK_TCK
+
+
+class Client:
+    """
+    One SSE subscriber on a raw socket; records when each event id arrives.
+    """
+
+    def __init__(self, host, port, query):
+        self.host, self.port, self.query = host, port, query
+        self.arrivals = {}
+        self.ready = asyncio.Event()
+        self.reader = self.writer = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        path = f"/stream/flights?{urlencode(self.query)}" if self.query else "/stream/flights"
+        self.writer.write(f"GET {path} HTTP/1.1\r\nHost: {self.host}\r\nAccept: text/event-stream\r\n\r\n".encode())
+        await self.writer.drain()
+
+    async def listen(self):
+        event_id = None
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                return
+            if line.startswith(b"id: "):
+                event_id = line[4:].strip().decode()
+            elif line.startswith(b"event: ready"):
+                self.ready.set()
+            elif line.startswith(b"event: changes") and event_id:
+                self.arrivals.setdefault(event_id, time.perf_counter())
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+async def run(args):
+    stub, upstream = start_stub_server(total=1000, churn=args.churn)
+    port = args.port
+    env = {
+        **os.environ,
+        "AVIATIONSTACK_BASE_URL": upstream,
+        "BACKGROUND_INGEST": "false",
+        # Request-driven refreshes: any request after the TTL starts the next ingest
+        "FLIGHT_CACHE_TTL": "1",
+        "FLIGHT_CACHE_STALE_TTL": "3600",
+        "HISTORY_DB_PATH": "",
+        "INSIGHT_CACHE_PATH": "",
+        "UPSTREAM_MONTHLY_QUOTA": "0",
+        "UPSTREAM_QUOTA_PATH": "",
+        "STREAM_HEARTBEAT": str(args.heartbeat),
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port), "--log-level", "warning",
+         "--timeout-keep-alive", "600", "--timeout-graceful-shutdown", "2", "--backlog", "8192"],
+        env=env
+    )
+    base = f"http://127.0.0.1:{port}"
+    clients = []
+    try:
+        async with httpx.AsyncClient(base_url=base, timeout=60) as http:
+            for _ in range(300):
+                try:
+                    if (await http.get("/health")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                await asyncio.sleep(0.1)
+            await http.get("/flights", params={"page_size": 1})
+            rss_before = rss_mb(server.pid)
+
+            for i in range(args.subscribers):
+                query = {}
+                if i % 4 == 1:
+                    query = {"airline": AIRLINES[i % len(AIRLINES)]}
+                elif i % 4 == 2:
+                    query = {"origin": AIRPORTS[i % len(AIRPORTS)]}
+                clients.append(Client("127.0.0.1", port, query))
+            for start in range(0, len(clients), 500):
+                await asyncio.gather(*(c.connect() for c in clients[start:start + 500]))
+            listeners = [asyncio.ensure_future(c.listen()) for c in clients]
+            await asyncio.wait_for(asyncio.gather(*(c.ready.wait() for c in clients)), 120)
+            await asyncio.sleep(1)
+            rss_after = rss_mb(server.pid)
+            subscribers = int(next(
+                line.split()[1] for line in (await http.get("/metrics")).text.splitlines()
+                if line.startswith("stream_subscribers ")
+            ))
+
+            cpu_start = cpu_seconds(server.pid)
+            await asyncio.sleep(args.idle)
+            idle_cpu = cpu_seconds(server.pid) - cpu_start
+
+            print(f"subscribers held       {subscribers}")
+            print(f"worker RSS             {rss_before:.0f} MB -> {rss_after:.0f} MB "
+                  f"({(rss_after - rss_before) * 1024 / max(subscribers, 1):.1f} KB per subscriber)")
+            print(f"idle CPU               {idle_cpu / args.idle * 100:.2f}% of a core over {args.idle:.0f}s "
+                  f"(heartbeat every {args.heartbeat:.0f}s)")
+
+            for round in range(args.rounds):
+                await asyncio.sleep(1.1)
+                seen = {event_id for c in clients for event_id in c.arrivals}
+                triggered = time.perf_counter()
+                await http.get("/flights", params={"page_size": 1})
+                deadline = triggered + 30
+                while time.perf_counter() < deadline:
+                    await asyncio.sleep(0.05)
+                    fresh = [c for c in clients if set(c.arrivals) - seen]
+                    if len(fresh) == len(clients):
+                        break
+                latencies = sorted(
+                    min(t for event_id, t in c.arrivals.items() if event_id not in seen) - triggered
+                    for c in clients if set(c.arrivals) - seen
+                )
+                if not latencies:
+                    print(f"ingest {round + 1}: no changes delivered")
+                    continue
+                print(f"ingest {round + 1}: {len(latencies)}/{len(clients)} notified, "
+                      f"first {latencies[0] * 1e3:.0f} ms, p50 {statistics.median(latencies) * 1e3:.0f} ms, "
+                      f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1e3:.0f} ms, "
+                      f"last {latencies[-1] * 1e3:.0f} ms")
+
+            for listener in listeners:
+                listener.cancel()
+    finally:
+        for client in clients:
+            client.close()
+        server.terminate()
+        server.wait()
+        stub.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SSE fan-out benchmark")
+    parser.add_argument("--subscribers", type=int, default=5000)
+    parser.add_argument("--churn", type=float, default=0.2, help="share of statuses changed per snapshot")
+    parser.add_argument("--idle", type=float, default=20.0, help="seconds of idle CPU measurement")
+    parser.add_argument("--heartbeat", type=float, default=15.0)
+    parser.add_argument("--rounds", type=int, default=3, help="ingests to time")
+    parser.add_argument("--port", type=int, default=8765)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,111 @@
+# benchmarks/bench_upstream.py
+#
+# The upstream client layer (rate limiter, retries, circuit breaker) against
+# a fault-injecting stub, with simulated users reading the snapshot:
+#
+#   python -m benchmarks.bench_upstream
+#   python -m benchmarks.bench_upstream --error-rate 0.3 --outage 5:15 --quota 200 --duration 30
+#
+# Users call fetch_flight_data in a loop with request-driven refreshes
+# (FLIGHT_CACHE_TTL seconds fresh, never served stale), so every expiry
+# sends a load upstream. Reported: how many user calls got flights (the
+# point: all but those before the first good snapshot), what reached the
+# stub, and what the client layer did about it.
+
+import os
+
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.upstream_stub import start_stub_server
+
+
+def configure(args, url):
+    # Read by the backend modules on import
+    os.environ.update({
+        "AVIATIONSTACK_BASE_URL": url,
+        "HISTORY_DB_PATH": "",
+        "INSIGHT_CACHE_PATH": "",
+        "BACKGROUND_INGEST": "false",
+        "FLIGHT_CACHE_TTL": str(args.ttl),
+        "FLIGHT_CACHE_STALE_TTL": "0",
+        "FLIGHT_CACHE_ERROR_TTL": str(args.error_ttl),
+        "UPSTREAM_MONTHLY_QUOTA": str(args.monthly_quota),
+        "UPSTREAM_BURST": str(args.burst),
+        "UPSTREAM_QUOTA_PATH": "",
+        "UPSTREAM_BACKOFF": "0.2",
+        "UPSTREAM_BACKOFF_MAX": "2",
+        "CIRCUIT_FAILURE_THRESHOLD": str(args.circuit_threshold),
+        "CIRCUIT_RESET_TIMEOUT": str(args.circuit_reset),
+    })
+
+
+async def run(args):
+    from backend import data_fetcher
+    from backend.upstream_client import upstream
+
+    await data_fetcher.open_http_client()
+    calls = served = 0
+    timeline = []
+
+    async def user():
+        nonlocal calls, served
+        while time.monotonic() < deadline:
+            flights = await data_fetcher.fetch_flight_data(limit=args.flights)
+            calls += 1
+            served += bool(flights)
+            await asyncio.sleep(args.think)
+
+    async def sample():
+        while time.monotonic() < deadline:
+            snapshot = data_fetcher.current_snapshot()
+            timeline.append((
+                round(time.monotonic() - start), upstream.breaker.state, snapshot.version if snapshot else None
+            ))
+            await asyncio.sleep(1)
+
+    start = time.monotonic()
+    deadline = start + args.duration
+    try:
+        await asyncio.gather(sample(), *(user() for _ in range(args.users)))
+    finally:
+        await data_fetcher.close_http_client()
+
+    print(f"user calls             {calls}, {served} with flights ({served / max(calls, 1):.1%})")
+    print(f"circuit by second      " + " ".join(
+        f"{second}:{state[0]}{version if version is not None else '-'}" for second, state, version in timeline
+    ))
+    print("                       (c closed, h half-open, o open; then the snapshot version served)")
+    print(f"client layer           {json.dumps(upstream.status())}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Upstream resilience against a fault-injecting stub")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--think", type=float, default=0.05, help="seconds between a user's calls")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--flights", type=int, default=1000, help="snapshot size (100 per upstream page)")
+    parser.add_argument("--ttl", type=float, default=1.0, help="seconds a snapshot is fresh")
+    parser.add_argument("--error-rate", type=float, default=0.2)
+    parser.add_argument("--throttle-rate", type=float, default=0.05)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--outage", default="8:18", help="START:END seconds of total outage")
+    parser.add_argument("--quota", type=int, help="stub requests before usage_limit_reached")
+    parser.add_argument("--monthly-quota", type=int, default=0, help="UPSTREAM_MONTHLY_QUOTA for the client")
+    parser.add_argument("--burst", type=int, default=10)
+    parser.add_argument("--error-ttl", type=float, default=1.0, help="seconds before a failed load is retried")
+    parser.add_argument("--circuit-threshold", type=int, default=3)
+    parser.add_argument("--circuit-reset", type=float, default=3.0)
+    args = parser.parse_args()
+
+    stub, url = start_stub_server(
+        total=1000, error_rate=args.error_rate, throttle_rate=args.throttle_rate, slow_rate=args.slow_rate,
+        outage=tuple(float(s) for s in args.outage.split(":")) if args.outage else None, quota=args.quota
+    )
+    configure(args, url)
+    try:
+        asyncio.run(run(args))
+    finally:
+        stub.shutdown()
@@ -0,0 +1,146 @@
+# benchmarks/payloads.py
+#
+# Deterministic AviationStack /v1/flights records for benchmarks: the same
+# (n, seed) always yields the same payload.
+#
+# Shaped like the real API, warts included:
+# - nested objects carry the fields upstream sends (terminal, gate, delay, ...)
+# - `aircraft` and `live` are usually null, as on the free tier
+# - a `null_rate` share of scalar fields is null and a `missing_rate` share of
+#   records lacks a whole nested object
+# - airlines and routes follow a Zipf distribution, so a few dominate
+
+import itertools
+import random
+from datetime import datetime, timedelta, timezone
+
+AIRLINES = [
+    ("IndiGo", "6E", "IGO"), ("Air India", "AI", "AIC"), ("Vistara", "UK", "VTI"), ("SpiceJet", "SG", "SEJ"),
+    ("Akasa Air", "QP", "AKJ"), ("Emirates", "EK", "UAE"), ("Qatar Airways", "QR", "QTR"),
+    ("Lufthansa", "LH", "DLH"), ("British Airways", "BA", "BAW"), ("Singapore Airlines", "SQ", "SIA"),
+    ("Etihad Airways", "EY", "ETD"), ("Air France", "AF", "AFR"), ("KLM", "KL", "KLM"),
+    ("Delta Air Lines", "DL", "DAL"), ("United Airlines", "UA", "UAL"), ("American Airlines", "AA", "AAL"),
+    ("Turkish Airlines", "TK", "THY"), ("Thai Airways", "TG", "THA"), ("Cathay Pacific", "CX", "CPA"),
+    ("Air Arabia", "G9", "ABY"), ("flydubai", "FZ", "FDB"), ("Oman Air", "WY", "OMA"),
+    ("Saudia", "SV", "SVA"), ("Alliance Air", "9I", "LLR"),
+]
+
+AIRPORTS = [
+    ("Indira Gandhi International", "DEL", "VIDP", "Asia/Kolkata"),
+    ("Chhatrapati Shivaji International", "BOM", "VABB", "Asia/Kolkata"),
+    ("Kempegowda International", "BLR", "VOBL", "Asia/Kolkata"),
+    ("Chennai International", "MAA", "VOMM", "Asia/Kolkata"),
+    ("Netaji Subhash Chandra Bose International", "CCU", "VECC", "Asia/Kolkata"),
+    ("Rajiv Gandhi International", "HYD", "VOHS", "Asia/Kolkata"),
+    ("Cochin International", "COK", "VOCI", "Asia/Kolkata"),
+    ("Sardar Vallabhbhai Patel International", "AMD", "VAAH", "Asia/Kolkata"),
+    ("Pune", "PNQ", "VAPO", "Asia/Kolkata"),
+    ("Goa International", "GOI", "VOGO", "Asia/Kolkata"),
+    ("Dubai International", "DXB", "OMDB", "Asia/Dubai"),
+    ("Hamad International", "DOH", "OTHH", "Asia/Qatar"),
+    ("Abu Dhabi International", "AUH", "OMAA", "Asia/Dubai"),
+    ("Singapore Changi", "SIN", "WSSS", "Asia/Singapore"),
+    ("Suvarnabhumi", "BKK", "VTBS", "Asia/Bangkok"),
+    ("Heathrow", "LHR", "EGLL", "Europe/London"),
+    ("Frankfurt am Main", "FRA", "EDDF", "Europe/Berlin"),
+    ("Charles de Gaulle", "CDG", "LFPG", "Europe/Paris"),
+    ("Schiphol", "AMS", "EHAM", "Europe/Amsterdam"),
+    ("Istanbul", "IST", "LTFM", "Europe/Istanbul"),
+    ("John F Kennedy International", "JFK", "KJFK", "America/New_York"),
+    ("San Francisco International", "SFO", "KSFO", "America/Los_Angeles"),
+    ("Hong Kong International", "HKG", "VHHH", "Asia/Hong_Kong"),
+    ("King Abdulaziz International", "JED", "OEJN", "Asia/Riyadh"),
+]
+
+STATUSES = ["scheduled", "active", "landed", "cancelled", "incident", "diverted"]
+STATUS_WEIGHTS = [40, 25, 28, 4, 1, 2]
+AIRCRAFT = ["A320", "A20N", "A321", "B738", "B38M", "B77W", "B789", "A359", "A388", "AT76"]
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+WINDOW_MINUTES = 60 * 24 * 30
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+
+
+def zipf_cum_weights(n, s=1.1):
+    return list(itertools.accumulate(1 / (rank + 1) ** s for rank in range(n)))
+
+
+def _routes(rng, count=200):
+    # A fixed, seeded route network; Zipf over it skews traffic to trunk routes
+    routes = set()
+    while len(routes) < count:
+        origin, destination = rng.sample(range(len(AIRPORTS)), 2)
+        routes.add((origin, destination))
+    return sorted(routes)
+
+
+def _endpoint(rng, airport, scheduled, null_rate, arrival=False):
+    name, iata, icao, tz = airport
+    delay = rng.choice((None, None, 0, 5, 12, 25, 60)) if rng.random() > null_rate else None
+    endpoint = {
+        "airport": name if rng.random() > null_rate else None,
+        "timezone": tz,
+        "iata": iata,
+        "icao": icao,
+        "terminal": str(rng.randint(1, 3)) if rng.random() > 0.3 else None,
+        "gate": f"{rng.choice('ABCD')}{rng.randint(1, 40)}" if rng.random() > 0.5 else None,
+        "delay": delay,
+        "scheduled": scheduled.isoformat() if rng.random() > null_rate else None,
+        "estimated": scheduled.isoformat(),
+        "actual": None,
+        "estimated_runway": None,
+        "actual_runway": None,
+    }
+    if arrival:
+        endpoint["baggage"] = str(rng.randint(1, 12)) if rng.random() > 0.6 else None
+    return endpoint
+
+
+def generate_flights(n, seed=0, null_rate=0.03, missing_rate=0.01):
+    """
+    `n` AviationStack flight records.
+    """
+    rng = random.Random(seed)
+    routes = _routes(rng)
+    airline_picks = rng.choices(range(len(AIRLINES)), cum_weights=zipf_cum_weights(len(AIRLINES)), k=n)
+    route_picks = rng.choices(routes, cum_weights=zipf_cum_weights(len(routes)), k=n)
+    status_picks = rng.choices(STATUSES, weights=STATUS_WEIGHTS, k=n)
+
+    flights = []
+    for i in range(n):
+        airline_name, airline_iata, airline_icao = AIRLINES[airline_picks[i]]
+        origin, destination = route_picks[i]
+        departure = START + timedelta(minutes=rng.randrange(WINDOW_MINUTES))
+        arrival = departure + timedelta(minutes=rng.randrange(45, 900))
+        number = str(100 + i)
+
+        flight = {
+            "flight_date": departure.date().isoformat(),
+            "flight_status": status_picks[i] if rng.random() > null_rate else None,
+            "departure": _endpoint(rng, AIRPORTS[origin], departure, null_rate),
+            "arrival": _endpoint(rng, AIRPORTS[destination], arrival, null_rate, arrival=True),
+            "airline": {
+                "name": airline_name if rng.random() > null_rate else None,
+                "iata": airline_iata,
+                "icao": airline_icao,
+            },
+            "flight": {
+                "number": number,
+                "iata": f"{airline_iata}{number}" if rng.random() > null_rate else None,
+                "icao": f"{airline_icao}{number}",
+                "codeshared": None,
+            },
+            "aircraft": {
+                "registration": f"VT-{rng.randrange(26 ** 3):05d}",
+                "iata": rng.choice(AIRCRAFT),
+                "icao": None,
+                "icao24": None,
+            } if rng.random() < 0.3 else None,
+            "live": None,
+        }
+        if rng.random() < missing_rate:
+            del flight[rng.choice(("departure", "arrival", "airline", "flight"))]
+        flights.append(flight)
+    return flights
+
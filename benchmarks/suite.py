@@ -0,0 +1,236 @@
+# benchmarks/suite.py
+#
+# Performance suite over generated AviationStack payloads (benchmarks.payloads).
+#
+#   python -m benchmarks.suite --sizes 1000 10000 100000 --out bench.json
+#   python -m benchmarks.suite --sizes 1000 10000 100000 --baseline bench.json --threshold 0.25
+#
+# Groups (--groups to pick):
+#   duration   calculate_duration over every record's scheduled times
+#   ingest     fetch_flight_data against the local stub: HTTP, pagination,
+#              normalization and the store/index/aggregate updates
+#   analytics  each analytics_engine function, on dict rows and on a FlightFrame
+#   endpoints  per-request latency through FastAPI's TestClient
+#
+# Every case reports the median and min over --repeat runs (seconds). With
+# --baseline, a case whose median grew by more than --threshold fails the
+# run (exit status 1), so it can gate a change locally.
+
+import os
+
+# Benchmarks never touch the on-disk archive or call upstream on their own
+os.environ["HISTORY_DB_PATH"] = ""
+os.environ["INSIGHT_CACHE_PATH"] = ""
+os.environ["BACKGROUND_INGEST"] = "false"
+# The stub is not AviationStack: its requests count against no quota
+os.environ["UPSTREAM_MONTHLY_QUOTA"] = "0"
+os.environ["UPSTREAM_QUOTA_PATH"] = ""
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmarks.payloads import generate_flights
+
+GROUPS = ("duration", "ingest", "analytics", "endpoints")
+
+
+def measure(fn, repeat, setup=None):
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return {"median": statistics.median(timings), "min": min(timings), "runs": repeat}
+
+
+def bench_duration(records, repeat):
+    from backend import normalizer
+    from backend.data_fetcher import calculate_duration
+
+    pairs = [
+        ((r.get("departure") or {}).get("scheduled"), (r.get("arrival") or {}).get("scheduled")) for r in records
+    ]
+    # Fresh strings every run upstream, so the timestamp memo starts empty
+    yield "calculate_duration", measure(
+        lambda: [calculate_duration(d, a) for d, a in pairs], repeat, setup=normalizer._epoch_cache.clear
+    )
+
+
+def bench_ingest(records, repeat):
+    from backend import data_fetcher
+    from benchmarks.upstream_stub import start_stub_server
+
+    server, url = start_stub_server(records=records)
+    data_fetcher.BASE_URL = url
+    # Request-driven loads (the endpoints group hands refreshes to the scheduler)
+    data_fetcher._snapshot_cache.managed = False
+
+    async def run():
+        timings = []
+        await data_fetcher.open_http_client()
+        try:
+            for _ in range(repeat):
+                data_fetcher._snapshot_cache.invalidate()
+                start = time.perf_counter()
+                flights = await data_fetcher.fetch_flight_data(limit=len(records))
+                timings.append(time.perf_counter() - start)
+                assert len(flights) == len(records), f"ingested {len(flights)} of {len(records)} records"
+        finally:
+            await data_fetcher.close_http_client()
+        return timings
+
+    try:
+        timings = asyncio.run(run())
+    finally:
+        server.shutdown()
+    yield "fetch_flight_data", {"median": statistics.median(timings), "min": min(timings), "runs": repeat}
+
+
+def bench_analytics(records, repeat):
+    from backend import analytics_engine as ae
+    from backend.flight_frame import FlightFrame
+    from backend.normalizer import normalize_batch
+
+    flights = normalize_batch(records)
+    frame = FlightFrame.from_flights(flights)
+    cases = {
+        "get_top_routes": lambda: ae.get_top_routes(flights),
+        "get_top_routes[approximate]": lambda: ae.get_top_routes(flights, approximate=True),
+        "get_top_routes[frame]": lambda: ae.get_top_routes(frame),
+        "get_airline_distribution": lambda: ae.get_airline_distribution(flights),
+        "get_airline_distribution[frame]": lambda: ae.get_airline_distribution(frame),
+        "get_price_stats": lambda: ae.get_price_stats(flights),
+        "get_price_stats[frame]": lambda: ae.get_price_stats(frame),
+        "get_price_stats[quantiles]": lambda: ae.get_price_stats(flights, quantiles=ae.DEFAULT_QUANTILES),
+        "get_price_quantiles[airline]": lambda: ae.get_price_quantiles(flights, by="airline"),
+        "get_price_quantiles[route]": lambda: ae.get_price_quantiles(flights, by="route"),
+        "build_price_sketches[airline]": lambda: ae.build_price_sketches(flights, by="airline"),
+        "FlightFrame.from_flights": lambda: FlightFrame.from_flights(flights),
+    }
+    for name, fn in cases.items():
+        yield name, measure(fn, repeat)
+
+
+def bench_endpoints(records, repeat):
+    from fastapi.testclient import TestClient
+
+    from backend.data_fetcher import hand_refresh_to_scheduler
+    from backend.flight_store import flight_store
+    from backend.main import app
+    from backend.normalizer import normalize_batch
+
+    # Requests read the store as the scheduler would leave it; nothing calls upstream
+    hand_refresh_to_scheduler()
+    flights = normalize_batch(records)
+    flight_store.sync(flights)
+    flight_number = next(f["flight_number"] for f in flights if f["flight_number"] != "N/A")
+
+    paths = {
+        "/flights": "/flights",
+        "/flights[sort=price,desc]": "/flights?sort=price&order=desc&page_size=100",
+        "/flights[q]": "/flights?q=emir&page_size=100",
+        "/flights[arrow,1000]": "/flights?format=arrow&page_size=1000",
+        "/flights/search": "/flights/search?q=emir",
+        "/flights/search[typeahead]": "/flights/search?q=de&typeahead=true",
+        "/flights/{flight_number}": f"/flights/{flight_number}",
+        "/analytics": "/analytics",
+        "/analytics/routes[approximate]": "/analytics/routes?approximate=true",
+        "/analytics/price-quantiles[route]": "/analytics/price-quantiles?by=route",
+    }
+    client = TestClient(app)
+    for name, path in paths.items():
+        client.get(path).raise_for_status()
+        yield name, measure(lambda: client.get(path), repeat)
+
+
+BENCHES = {
+    "duration": bench_duration,
+    "ingest": bench_ingest,
+    "analytics": bench_analytics,
+    "endpoints": bench_endpoints,
+}
+
+
+def run(sizes, groups, repeat, seed, ingest_max):
+    results = {}
+    for n in sizes:
+        records = generate_flights(n, seed)
+        for group in groups:
+            if group == "ingest" and n > ingest_max:
+                continue
+            for name, stats in BENCHES[group](records, repeat):
+                key = f"{group}.{name}[n={n}]"
+                results[key] = {**stats, "n": n}
+                print(f"{key:<58} {stats['median'] * 1e3:>10.2f} ms  (min {stats['min'] * 1e3:.2f})", flush=True)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Cases whose median is more than `threshold` (a fraction) above the baseline.
+    """
+    regressions = []
+    print(f"\n{'case':<58} {'baseline':>10} {'now':>10} {'ratio':>7}")
+    for key, stats in results.items():
+        before = baseline.get(key)
+        if before is None:
+            continue
+        ratio = stats["median"] / before["median"] if before["median"] else float("inf")
+        flag = "  ❌" if ratio > 1 + threshold else ""
+        print(f"{key:<58} {before['median'] * 1e3:>8.2f}ms {stats['median'] * 1e3:>8.2f}ms {ratio:>6.2f}x{flag}")
+        if flag:
+            regressions.append(key)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Airline Demand API benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--groups", nargs="+", choices=GROUPS, default=list(GROUPS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--ingest-max", type=int, default=100_000,
+                        help="skip the stub ingest above this size (one HTTP request per 100 records)")
+    parser.add_argument("--out", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="results JSON from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed median slowdown, e.g. 0.25 = 25%%")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.groups, args.repeat, args.seed, args.ingest_max)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({
+                "meta": {
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                    "python": sys.version.split()[0],
+                    "platform": platform.platform(),
+                    "sizes": args.sizes,
+                    "seed": args.seed,
+                    "repeat": args.repeat,
+                },
+                "results": results,
+            }, f, indent=2)
+        print(f"\n✅ Results written to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} case(s) slower than baseline by more than {args.threshold:.0%}")
+            return 1
+        print(f"\n✅ No case slower than baseline by more than {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
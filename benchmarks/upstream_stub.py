@@ -0,0 +1,185 @@
+# benchmarks/upstream_stub.py
+#
+# Local stand-in for the AviationStack /v1/flights endpoint, for exercising
+# ingestion without an API key or quota:
+#
+#   python -m benchmarks.upstream_stub --port 8081 --total 50000 --latency 0.2
+#   python -m benchmarks.upstream_stub --churn 0.01   # 1% of statuses change per snapshot
+#
+# Faults to exercise retries, the rate limiter and the circuit breaker:
+#
+#   python -m benchmarks.upstream_stub --error-rate 0.3 --throttle-rate 0.1 --slow-rate 0.05
+#   python -m benchmarks.upstream_stub --outage 60:180   # every request fails 60s-180s after start
+#   python -m benchmarks.upstream_stub --quota 500       # usage_limit_reached after 500 requests
+#   AVIATIONSTACK_BASE_URL=http://127.0.0.1:8081/v1/flights uvicorn backend.main:app
+
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+AIRLINES = ["IndiGo", "Air India", "Vistara", "SpiceJet", "Akasa Air", "Emirates", "Qatar Airways", "Lufthansa"]
+AIRPORTS = [
+    "Indira Gandhi International", "Chhatrapati Shivaji International", "Kempegowda International",
+    "Chennai International", "Netaji Subhash Chandra Bose International", "Rajiv Gandhi International",
+    "Dubai International", "Hamad International", "Frankfurt am Main",
+]
+STATUSES = ["scheduled", "active", "landed", "cancelled", "diverted"]
+AIRCRAFT = ["A320", "A321", "B738", "B77W", "A359", "AT76"]
+
+
+def make_flight(index, seed=0, generation=0, churn=0.0):
+    """
+    Deterministic AviationStack-shaped flight record for position `index`.
+    With `churn`, that share of flights has a different status in each
+    `generation` (snapshot) of the data.
+    """
+    rng = random.Random(seed * 1_000_003 + index)
+    airline = rng.choice(AIRLINES)
+    origin, destination = rng.sample(AIRPORTS, 2)
+    departure = datetime(2025, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=rng.randrange(0, 60 * 24 * 30))
+    arrival = departure + timedelta(minutes=rng.randrange(45, 900))
+    return {
+        "flight_date": departure.date().isoformat(),
+        "flight_status": _status(rng.choice(STATUSES), index, seed, generation, churn),
+        "departure": {"airport": origin, "scheduled": departure.isoformat()},
+        "arrival": {"airport": destination, "scheduled": arrival.isoformat()},
+        "airline": {"name": airline, "iata": airline[:2].upper()},
+        "flight": {"number": str(index), "iata": f"{airline[:2].upper()}{index}"},
+        "aircraft": {"iata": rng.choice(AIRCRAFT)},
+    }
+
+
+def _status(status, index, seed, generation, churn):
+    if not churn or not generation:
+        return status
+    rng = random.Random(hash((seed, index, generation)))
+    return rng.choice(STATUSES) if rng.random() < churn else status
+
+
+def _error_body(code, message):
+    return json.dumps({"error": {"code": code, "message": message}}).encode()
+
+
+def _handler(total, latency, seed, records=None, churn=0.0, error_rate=0.0, throttle_rate=0.0, slow_rate=0.0,
+             slow_seconds=15.0, outage=None, quota=None):
+    # Every request for the first page starts a new snapshot
+    generation = [0]
+    requests = [0]
+    started = time.monotonic()
+    faults = random.Random(seed)
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # [requests received], for benchmarks counting upstream calls
+        received = requests
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != "/v1/flights":
+                self.send_error(404)
+                return
+
+            query = parse_qs(url.query)
+            limit = min(int(query.get("limit", ["100"])[0]), 100)
+            offset = int(query.get("offset", ["0"])[0])
+
+            with lock:
+                requests[0] += 1
+                served = requests[0]
+                roll = faults.random()
+            elapsed = time.monotonic() - started
+
+            if latency:
+                time.sleep(latency)
+            if quota is not None and served > quota:
+                self._send(429, _error_body("usage_limit_reached", "Your monthly usage limit has been reached."))
+                return
+            if outage is not None and outage[0] <= elapsed < outage[1]:
+                self._send(503, _error_body("service_unavailable", "Outage."))
+                return
+            if roll < error_rate:
+                self._send(503, _error_body("service_unavailable", "Injected error."))
+                return
+            if roll < error_rate + throttle_rate:
+                self._send(429, _error_body("rate_limit_reached", "Too many requests."), {"Retry-After": "1"})
+                return
+            if roll < error_rate + throttle_rate + slow_rate:
+                # Longer than the backend's client timeout
+                time.sleep(slow_seconds)
+            if offset == 0:
+                generation[0] += 1
+
+            if records is not None:
+                data = records[offset:offset + limit]
+            else:
+                data = [make_flight(i, seed, generation[0], churn) for i in range(offset, min(offset + limit, total))]
+            body = json.dumps({
+                "pagination": {"limit": limit, "offset": offset, "count": len(data), "total": total},
+                "data": data,
+            }).encode()
+
+            self._send(200, body)
+
+        def _send(self, status, body, headers=None):
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def start_stub_server(total=10_000, latency=0.0, seed=0, host="127.0.0.1", port=0, records=None, churn=0.0,
+                      **faults):
+    """
+    Serve the stub on a background thread; returns (server, base_url).
+    `records` (raw upstream dicts) replaces the generated flights when given.
+    `faults` are error_rate, throttle_rate, slow_rate, slow_seconds, outage
+    ((start, end) seconds after start-up) and quota (requests until
+    usage_limit_reached). server.RequestHandlerClass.received[0] counts the
+    requests received. Call server.shutdown() when done.
+    """
+    if records is not None:
+        total = len(records)
+    server = ThreadingHTTPServer((host, port), _handler(total, latency, seed, records, churn, **faults))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1/flights"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local AviationStack stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--total", type=int, default=10_000, help="records exposed through pagination")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--churn", type=float, default=0.0, help="share of statuses that change per snapshot")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered 503")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="share answered 429 rate_limit_reached")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="share delayed past the client timeout")
+    parser.add_argument("--slow-seconds", type=float, default=15.0)
+    parser.add_argument("--outage", help="START:END seconds after start-up during which every request fails")
+    parser.add_argument("--quota", type=int, help="requests served before usage_limit_reached")
+    args = parser.parse_args()
+
+    outage = tuple(float(s) for s in args.outage.split(":")) if args.outage else None
+    server = ThreadingHTTPServer((args.host, args.port), _handler(
+        args.total, args.latency, args.seed, churn=args.churn, error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate, slow_rate=args.slow_rate, slow_seconds=args.slow_seconds, outage=outage,
+        quota=args.quota
+    ))
+    print(f"✈️ AviationStack stub on http://{args.host}:{args.port}/v1/flights ({args.total} flights)")
+    server.serve_forever()
@@ -5,7 +5,10 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
+import pyarrow as pa
 from datetime import datetime, timedelta
+from urllib.parse import urlencode
+import json
 import time
 
 # ======== Page Configuration ========
@@ -74,6 +77,7 @@ st.markdown("""
 
 # ======== Configuration ========
 API_BASE = st.secrets["BACKEND_API_URL"]
+PAGE_SIZE = 50
 
 ##st.warning(f"🔗 Using API Base: {API_BASE}")(remove this when you want to debug)
 
@@ -91,7 +95,7 @@ with st.sidebar:
     st.markdown("### 🎛️ Dashboard Controls")
     
     # Auto-refresh toggle
-    auto_refresh = st.checkbox("🔄 Auto-refresh (30s)", value=False)
+    auto_refresh = st.checkbox("🔄 Auto-refresh (live, at most 30s)", value=False)
     
     # Data filters
     st.markdown("### 🔍 Filters")
@@ -101,23 +105,162 @@ with st.sidebar:
         max_value=datetime.now()
     )
     
-    # Export options
+    # Export options: the browser downloads straight from the backend stream,
+    # so nothing is materialized in this process
     st.markdown("### 📊 Export Options")
-    if st.button("📥 Export Data"):
-        st.success("Export functionality ready!")
+    export_format = st.selectbox("Format", ["csv", "ndjson", "parquet"])
+    export_params = {"format": export_format}
+    if isinstance(date_range, (list, tuple)) and len(date_range) == 2:
+        export_params.update(source="history", start=date_range[0].isoformat(), end=date_range[1].isoformat())
+    st.link_button("📥 Export Data", f"{API_BASE}/export?{urlencode(export_params)}")
 
 # ======== Data Fetching Functions ========
-@st.cache_data(ttl=300, show_spinner=False)
-def fetch_flights():
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+MAX_CONDITIONAL_ENTRIES = 32
+
+def get_flight_frame(path, params=None, timeout=10):
+    """
+    GET a flight payload as Arrow, revalidating with the last ETag so an
+    unchanged snapshot costs a 304 and reuses the DataFrame already built.
+    Returns (DataFrame, envelope).
+    """
+    cache = st.session_state.setdefault("flight_frames", {})
+    key = (path, tuple(sorted((params or {}).items())))
+    cached = cache.get(key)
+    headers = {"Accept": ARROW_STREAM}
+    if cached:
+        headers["If-None-Match"] = cached[0]
+
+    res = requests.get(f"{API_BASE}{path}", params=params, headers=headers, timeout=timeout)
+    if res.status_code == 304 and cached:
+        return cached[1], cached[2]
+    res.raise_for_status()
+
+    table = pa.ipc.open_stream(res.content).read_all()
+    envelope = json.loads((table.schema.metadata or {}).get(b"envelope", b"{}"))
+    # Plain strings on the client; categoricals do not support string concatenation
+    table = table.cast(pa.schema([
+        field.with_type(field.type.value_type) if pa.types.is_dictionary(field.type) else field
+        for field in table.schema
+    ]))
+    df = table.to_pandas()
+
+    if res.headers.get("ETag"):
+        cache.pop(key, None)
+        cache[key] = (res.headers["ETag"], df, envelope)
+        while len(cache) > MAX_CONDITIONAL_ENTRIES:
+            cache.pop(next(iter(cache)))
+    return df, envelope
+
+def fetch_dashboard_summary(params=None):
+    """
+    KPIs, chart series and bullet insights, computed once per snapshot by the
+    backend; revalidated with the last ETag so a rerun usually costs a 304.
+    """
+    cache = st.session_state.setdefault("dashboard_summaries", {})
+    key = tuple(sorted((params or {}).items()))
+    cached = cache.get(key)
+    headers = {"If-None-Match": cached[0]} if cached else {}
     try:
-        res = requests.get(f"{API_BASE}/flights", timeout=10)
+        res = requests.get(f"{API_BASE}/dashboard/summary", params=params, headers=headers, timeout=30)
+        if res.status_code == 304 and cached:
+            return cached[1]
         res.raise_for_status()
-        return res.json().get("flights", [])
     except requests.exceptions.RequestException as e:
         st.error(f"🚨 API Connection Error: {e}")
-        return []
+        return None
+
+    summary = res.json()
+    if res.headers.get("ETag"):
+        cache.pop(key, None)
+        cache[key] = (res.headers["ETag"], summary)
+        while len(cache) > MAX_CONDITIONAL_ENTRIES:
+            cache.pop(next(iter(cache)))
+    return summary
+
+def fetch_flight(flight_number):
+    try:
+        res = requests.get(f"{API_BASE}/flights/{flight_number}", timeout=10)
+        res.raise_for_status()
+        return res.json().get("flight", {})
+    except Exception:
+        return {}
+
+def fetch_flight_page(q=None, airline=None, sort=None, order="asc", page=1, page_size=PAGE_SIZE):
+    params = {"q": q, "airline": airline, "sort": sort, "order": order, "page": page, "page_size": page_size}
+    try:
+        page_df, envelope = get_flight_frame("/flights", {k: v for k, v in params.items() if v is not None})
+        return page_df, envelope.get("total_count", 0)
     except Exception as e:
-        st.error(f"🚨 Unexpected Error: {e}")
+        st.error(f"🚨 API Connection Error: {e}")
+        return pd.DataFrame(), 0
+
+def fetch_flight_changes(cursor=None):
+    try:
+        res = requests.get(f"{API_BASE}/flights/changes", params={"since": cursor} if cursor else None, timeout=10)
+        res.raise_for_status()
+        return res.json()
+    except Exception:
+        return None
+
+def wait_for_flight_change(airline=None, timeout=30):
+    """
+    Block until /stream/flights pushes a change or new aggregates (for the
+    airline, if given), or `timeout` seconds pass.
+    """
+    deadline = time.monotonic() + timeout
+    try:
+        # Reads wake at least every heartbeat (15s), so the deadline is checked
+        with requests.get(f"{API_BASE}/stream/flights", params={"airline": airline} if airline else None,
+                          stream=True, timeout=(5, 20)) as res:
+            res.raise_for_status()
+            for line in res.iter_lines():
+                if line in (b"event: changes", b"event: aggregates", b"event: reset"):
+                    return
+                if time.monotonic() >= deadline:
+                    return
+    except Exception:
+        # No stream (older backend, network error): fall back to the plain interval
+        time.sleep(max(0, deadline - time.monotonic()))
+
+# Changes to these (or to the sort column) can move flights on or off a page
+PAGE_MEMBERSHIP_FIELDS = {"flight_number", "airline", "origin", "destination"}
+SORT_COUNTERPARTS = {"departure_time": "departure_ts", "arrival_time": "arrival_ts", "duration": "duration_minutes"}
+
+def apply_flight_changes(page_df, changes, sort_by):
+    """
+    The page with field updates from /flights/changes patched in, or None
+    when the changes may alter which flights belong on it (new or removed
+    flights, filter or sort fields) and it has to be refetched.
+    """
+    if changes is None or changes["reset"] or changes["has_more"]:
+        return None
+    guarded = PAGE_MEMBERSHIP_FIELDS | {sort_by, SORT_COUNTERPARTS.get(sort_by)}
+    if any(c["op"] != "update" or guarded & c["fields"].keys() for c in changes["changes"]):
+        return None
+    if not changes["changes"] or page_df.empty:
+        return page_df
+
+    page_df = page_df.copy()
+    rows = pd.Index(page_df["flight_number"])
+    for change in changes["changes"]:
+        row = rows.get_indexer([change["flight_number"]])[0]
+        fields = {k: v for k, v in change["fields"].items() if k in page_df.columns}
+        if row >= 0 and fields:
+            page_df.loc[page_df.index[row], list(fields)] = list(fields.values())
+    return page_df
+
+@st.cache_data(ttl=30, show_spinner=False)
+def fetch_search_suggestions(q, limit=8):
+    try:
+        res = requests.get(
+            f"{API_BASE}/flights/search",
+            params={"q": q, "typeahead": "true", "limit": limit},
+            timeout=5
+        )
+        res.raise_for_status()
+        return res.json().get("suggestions", [])
+    except Exception:
         return []
 
 @st.cache_data(ttl=300, show_spinner=False)
@@ -137,93 +280,72 @@ def fetch_flight_insights(flight_number):
     except Exception:
         return f"Insights for flight {flight_number} temporarily unavailable"
 
-def generate_market_insights(df):
-    total_flights = len(df)
-    average_price = df['price'].mean() if 'price' in df.columns and df['price'].notna().any() else 0
-    top_airline = df['airline'].mode().iloc[0] if 'airline' in df.columns and not df['airline'].mode().empty else "N/A"
-    if 'origin' in df.columns and 'destination' in df.columns:
-        df['route'] = df['origin'] + "–" + df['destination']
-        top_route = df['route'].mode().iloc[0] if not df['route'].mode().empty else "N/A"
-        route_count = df['route'].nunique()
-    else:
-        top_route = "N/A"
-        route_count = 0
-    unique_airlines = df['airline'].nunique() if 'airline' in df.columns else 0
-
-    # Price trend
-    price_trend = "stable"
-    if 'price' in df.columns and df['price'].notna().sum() > 1:
-        price_diff = df['price'].iloc[-1] - df['price'].iloc[0]
-        if price_diff > 2:
-            price_trend = "rising"
-        elif price_diff < -2:
-            price_trend = "declining"
+def stream_batch_insights(flight_numbers):
+    # Results arrive one NDJSON line per flight as the backend finishes them
+    try:
+        with requests.post(
+            f"{API_BASE}/insights/batch",
+            json={"flight_numbers": flight_numbers},
+            stream=True,
+            timeout=120
+        ) as res:
+            res.raise_for_status()
+            for line in res.iter_lines():
+                if line:
+                    yield json.loads(line)
+    except Exception:
+        yield {"flight_number": None, "error": "Batch insights temporarily unavailable"}
+
+def route_label(route, sep=" → "):
+    return f"{route['origin']}{sep}{route['destination']}"
+
+def generate_market_insights(summary):
+    kpis = summary["kpis"]
+    top_airline = summary["top_airline"]["airline"] or "N/A"
+    top_route = route_label(summary["top_route"], "–") if summary["top_route"]["origin"] else "N/A"
 
     report = (
-        f"The domestic flight sector has maintained a robust level of activity, with {total_flights} flights recorded in the last week. "
+        f"The domestic flight sector has maintained a robust level of activity, with {kpis['total_flights']} flights recorded in the last week. "
         f"{top_airline} continues to lead in operational frequency, reflecting strong market presence and network reach. "
         f"The {top_route} corridor remains highly trafficked, suggesting sustained demand and potential market saturation on this route. "
-        f"\n\nTicket prices are currently averaging ${average_price:.2f}, with the overall trend appearing {price_trend}. "
+        f"\n\nTicket prices are currently averaging ${kpis['avg_price']:.2f}, with the overall trend appearing {summary['price_trend']}. "
         f"Full-service carriers may be driving higher averages, while budget airlines remain competitive, especially on high-density routes. "
-        f"\n\nThe market supports {unique_airlines} active airlines and {route_count} unique routes, indicating healthy competition and operational diversity. "
+        f"\n\nThe market supports {kpis['unique_airlines']} active airlines and {kpis['unique_routes']} unique routes, indicating healthy competition and operational diversity. "
         f"Opportunities may exist for expansion into under-served regional connections, particularly in emerging tier-2 city markets. "
         f"\n\nStrategically, airlines should consider dynamic pricing on saturated routes and targeted promotions for new or less competitive connections. "
         f"Monitoring price sensitivity and route performance will be key to capturing market share in the coming weeks."
     )
     return report
 
-def generate_bullet_insights(df):
-    insights = []
-    # 1. Flight volume trend
-    if len(df) > 0:
-        insights.append(f"📈 There were {len(df)} flights in the last week, indicating steady demand.")
-    # 2. Top airline
-    if 'airline' in df.columns and not df['airline'].mode().empty:
-        top_airline = df['airline'].mode().iloc[0]
-        count = (df['airline'] == top_airline).sum()
-        insights.append(f"✈️ {top_airline} operated the most flights ({count}), maintaining market leadership.")
-    # 3. Price trend
-    if 'price' in df.columns and df['price'].notna().sum() > 1:
-        price_diff = df['price'].iloc[-1] - df['price'].iloc[0]
-        if price_diff > 2:
-            trend = "rising"
-        elif price_diff < -2:
-            trend = "declining"
-        else:
-            trend = "stable"
-        avg_price = df['price'].mean()
-        insights.append(f"💡 Average ticket price is ${avg_price:.2f} and appears {trend}.")
-    # 4. Popular route
-    if 'origin' in df.columns and 'destination' in df.columns:
-        df['route'] = df['origin'] + "–" + df['destination']
-        if not df['route'].mode().empty:
-            top_route = df['route'].mode().iloc[0]
-            route_count = (df['route'] == top_route).sum()
-            insights.append(f"📊 The busiest route is {top_route} ({route_count} flights).")
-    # 5. Market diversity
-    if 'airline' in df.columns:
-        unique_airlines = df['airline'].nunique()
-        insights.append(f"🧭 {unique_airlines} airlines are active, supporting a competitive market.")
-    return insights
-
 # ======== Auto-refresh Logic ========
 if auto_refresh:
     placeholder = st.empty()
     with placeholder.container():
-        st.info("🔄 Auto-refresh enabled - Data updates every 30 seconds")
+        st.info("🔄 Auto-refresh enabled - Data updates as flights change, at least every 30 seconds")
     time.sleep(1)
     placeholder.empty()
 
 # ======== Main Dashboard ========
 with st.spinner("🔄 Loading flight data..."):
-    flights = fetch_flights()
+    # A complete (start, end) range summarizes the backend's flight history
+    summary = None
+    if isinstance(date_range, (list, tuple)) and len(date_range) == 2:
+        summary = fetch_dashboard_summary(
+            {"source": "history", "start": date_range[0].isoformat(), "end": date_range[1].isoformat()}
+        )
+    if not summary or not summary["kpis"]["total_flights"]:
+        summary = fetch_dashboard_summary()
 
-if not flights:
+    # What changed since the previous rerun; patched into the page kept from it
+    changes = fetch_flight_changes(st.session_state.get("changes_cursor"))
+    if changes is not None:
+        st.session_state["changes_cursor"] = changes["cursor"]
+
+if not summary or not summary["kpis"]["total_flights"]:
     st.error("❌ No flight data available. Please check your API connection.")
     st.stop()
 
-# Convert to DataFrame
-df = pd.DataFrame(flights)
+kpis = summary["kpis"]
 
 # ======== Key Metrics Dashboard ========
 st.markdown("## 📊 Key Performance Indicators")
@@ -231,42 +353,32 @@ st.markdown("## 📊 Key Performance Indicators")
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    total_flights = len(df)
     st.metric(
         label="✈️ Total Flights",
-        value=total_flights,
+        value=kpis["total_flights"],
         delta=f"+{np.random.randint(5, 15)} vs last week"
     )
 
 with col2:
-    if 'price' in df.columns:
-        avg_price = df['price'].mean() if df['price'].notna().any() else 0
-        st.metric(
-            label="💰 Avg Price",
-            value=f"${avg_price:.2f}",
-            delta=f"{np.random.choice(['+', '-'])}{np.random.randint(5, 20)}%"
-        )
-    else:
-        st.metric(label="💰 Avg Price", value="N/A")
+    st.metric(
+        label="💰 Avg Price",
+        value=f"${kpis['avg_price']:.2f}",
+        delta=f"{np.random.choice(['+', '-'])}{np.random.randint(5, 20)}%"
+    )
 
 with col3:
-    unique_routes = len(df[['origin', 'destination']].drop_duplicates()) if 'origin' in df.columns and 'destination' in df.columns else 0
     st.metric(
         label="🗺️ Active Routes",
-        value=unique_routes,
+        value=kpis["unique_routes"],
         delta=f"+{np.random.randint(1, 5)} new routes"
     )
 
 with col4:
-    if 'airline' in df.columns:
-        unique_airlines = df['airline'].nunique()
-        st.metric(
-            label="🏢 Airlines",
-            value=unique_airlines,
-            delta="Stable"
-        )
-    else:
-        st.metric(label="🏢 Airlines", value="N/A")
+    st.metric(
+        label="🏢 Airlines",
+        value=kpis["unique_airlines"],
+        delta="Stable"
+    )
 
 # ======== Tabbed Interface ========
 tab1, tab2, tab3, tab4 = st.tabs(["📋 Flight Data", "📈 Analytics", "🧠 AI Insights", "🔍 Flight Analysis"])
@@ -274,110 +386,146 @@ tab1, tab2, tab3, tab4 = st.tabs(["📋 Flight Data", "📈 Analytics", "🧠 AI
 with tab1:
     st.markdown("### 📋 Flight Information")
     
-    # Search and filter
-    col1, col2 = st.columns([3, 1])
+    # Search, filter and sort run on the backend; only the visible page is downloaded
+    col1, col2, col3, col4 = st.columns([3, 1, 1, 1])
     with col1:
-        search_term = st.text_input("🔍 Search flights (flight number, airline, route)")
+        search_term = st.text_input("🔍 Search flights (flight number, airline, airport)")
+        if search_term:
+            suggestions = fetch_search_suggestions(search_term)
+            if suggestions:
+                st.caption("Suggestions: " + " · ".join(f"{s['value']} ({s['type']})" for s in suggestions))
     with col2:
-        sort_by = st.selectbox("Sort by", ["flight_number", "airline", "origin", "destination"])
-    
-    # Filter dataframe
-    filtered_df = df.copy()
-    if search_term:
-        mask = df.astype(str).apply(lambda x: x.str.contains(search_term, case=False, na=False)).any(axis=1)
-        filtered_df = df[mask]
-    
+        airline_options = ["All"] + sorted(a["airline"] for a in summary["airline_counts"])
+        airline_filter = st.selectbox("Airline", airline_options)
+    with col3:
+        sort_by = st.selectbox("Sort by", ["flight_number", "airline", "origin", "destination", "departure_time", "price"])
+    with col4:
+        sort_order = st.selectbox("Order", ["asc", "desc"])
+
+    page = st.number_input("Page", min_value=1, value=1, step=1)
+    page_key = (search_term, airline_filter, sort_by, sort_order, int(page))
+    live_page = st.session_state.get("live_page")
+    page_df = None
+    if live_page and live_page["key"] == page_key:
+        page_df = apply_flight_changes(live_page["df"], changes, sort_by)
+    if page_df is not None:
+        total_matches = live_page["total"]
+    else:
+        page_df, total_matches = fetch_flight_page(
+            q=search_term or None,
+            airline=None if airline_filter == "All" else airline_filter,
+            sort=sort_by,
+            order=sort_order,
+            page=int(page),
+            page_size=PAGE_SIZE
+        )
+    st.session_state["live_page"] = {"key": page_key, "df": page_df, "total": total_matches}
+
+    if changes and changes["changes"]:
+        with st.expander(f"🔄 {len(changes['changes'])} flights changed since the last refresh"):
+            st.dataframe(
+                pd.DataFrame([
+                    {
+                        "flight_number": c["flight_number"],
+                        "change": c["op"],
+                        "details": ", ".join(f"{k}: {v}" for k, v in c.get("fields", {}).items())
+                    }
+                    for c in changes["changes"][:200]
+                ]),
+                use_container_width=True
+            )
+
     # Display data with enhanced formatting
-    if not filtered_df.empty:
+    if not page_df.empty:
+        first_row = (int(page) - 1) * PAGE_SIZE + 1
+        st.caption(f"Live flights {first_row}–{first_row + len(page_df) - 1} of {total_matches}")
         st.dataframe(
-            filtered_df.sort_values(sort_by) if sort_by in filtered_df.columns else filtered_df,
+            page_df,
             use_container_width=True,
             height=400
         )
         
-        # Download button
-        csv = filtered_df.to_csv(index=False)
-        st.download_button(
-            label="📥 Download CSV",
-            data=csv,
-            file_name=f"flight_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-            mime="text/csv"
+        # Download every match (not just this page), streamed by the backend
+        match_params = {"q": search_term or None, "airline": None if airline_filter == "All" else airline_filter,
+                        "sort": sort_by, "order": sort_order, "format": "csv"}
+        st.link_button(
+            "📥 Download CSV",
+            f"{API_BASE}/export?{urlencode({k: v for k, v in match_params.items() if v})}"
         )
+    elif total_matches:
+        st.warning("This page is past the last matching flight.")
     else:
         st.warning("No flights match your search criteria.")
 
 with tab2:
     st.markdown("### 📈 Flight Analytics")
     
-    if len(df) > 0:
-        col1, col2 = st.columns(2)
+    # Every series arrives precomputed; nothing here touches individual flights
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        # Flight distribution by airline
+        airline_counts = summary["airline_counts"]
+        fig_pie = px.pie(
+            values=[a["count"] for a in airline_counts],
+            names=[a["airline"] for a in airline_counts],
+            title="✈️ Flights by Airline",
+            color_discrete_sequence=px.colors.qualitative.Set3
+        )
+        fig_pie.update_layout(height=400)
+        st.plotly_chart(fig_pie, use_container_width=True)
         
+    with col2:
+        # Route popularity
+        route_counts = [r["count"] for r in summary["top_routes"]]
+        fig_bar = px.bar(
+            x=route_counts,
+            y=[route_label(r) for r in summary["top_routes"]],
+            orientation='h',
+            title="🗺️ Top 10 Popular Routes",
+            color=route_counts,
+            color_continuous_scale="Blues"
+        )
+        fig_bar.update_layout(height=400, yaxis={'categoryorder':'total ascending'})
+        st.plotly_chart(fig_bar, use_container_width=True)
+    
+    # Price analysis (if price data exists)
+    histogram = summary["price_histogram"]
+    if histogram["counts"]:
+        st.markdown("#### 💰 Price Analysis")
+        
+        col1, col2 = st.columns(2)
         with col1:
-            # Flight distribution by airline
-            if 'airline' in df.columns:
-                airline_counts = df['airline'].value_counts()
-                fig_pie = px.pie(
-                    values=airline_counts.values,
-                    names=airline_counts.index,
-                    title="✈️ Flights by Airline",
-                    color_discrete_sequence=px.colors.qualitative.Set3
-                )
-                fig_pie.update_layout(height=400)
-                st.plotly_chart(fig_pie, use_container_width=True)
-            
-        with col2:
-            # Route popularity
-            if 'origin' in df.columns and 'destination' in df.columns:
-                df['route'] = df['origin'] + ' → ' + df['destination']
-                route_counts = df['route'].value_counts().head(10)
-                fig_bar = px.bar(
-                    x=route_counts.values,
-                    y=route_counts.index,
-                    orientation='h',
-                    title="🗺️ Top 10 Popular Routes",
-                    color=route_counts.values,
-                    color_continuous_scale="Blues"
-                )
-                fig_bar.update_layout(height=400, yaxis={'categoryorder':'total ascending'})
-                st.plotly_chart(fig_bar, use_container_width=True)
+            # Price distribution
+            edges = histogram["edges"]
+            fig_hist = go.Figure(go.Bar(
+                x=[(lo + hi) / 2 for lo, hi in zip(edges, edges[1:])],
+                y=histogram["counts"],
+                width=[hi - lo for lo, hi in zip(edges, edges[1:])],
+                marker_color='#2a5298'
+            ))
+            fig_hist.update_layout(title="💵 Price Distribution", xaxis_title="price", yaxis_title="count", bargap=0)
+            st.plotly_chart(fig_hist, use_container_width=True)
         
-        # Price analysis (if price data exists)
-        if 'price' in df.columns and df['price'].notna().any():
-            st.markdown("#### 💰 Price Analysis")
-            
-            col1, col2 = st.columns(2)
-            with col1:
-                # Price distribution
-                fig_hist = px.histogram(
-                    df,
-                    x='price',
-                    nbins=20,
-                    title="💵 Price Distribution",
-                    color_discrete_sequence=['#2a5298']
-                )
-                st.plotly_chart(fig_hist, use_container_width=True)
-            
-            with col2:
-                # Price by airline
-                if 'airline' in df.columns:
-                    fig_box = px.box(
-                        df,
-                        x='airline',
-                        y='price',
-                        title="💰 Price Range by Airline"
-                    )
-                    fig_box.update_xaxes(tickangle=45)
-                    st.plotly_chart(fig_box, use_container_width=True)
-    else:
-        st.info("📊 Analytics will appear when flight data is available.")
+        with col2:
+            # Price by airline
+            boxes = summary["price_by_airline"]
+            fig_box = go.Figure(go.Box(
+                x=[b["airline"] for b in boxes],
+                q1=[b["q1"] for b in boxes],
+                median=[b["median"] for b in boxes],
+                q3=[b["q3"] for b in boxes],
+                lowerfence=[b["lower_fence"] for b in boxes],
+                upperfence=[b["upper_fence"] for b in boxes],
+                mean=[b["mean"] for b in boxes]
+            ))
+            fig_box.update_layout(title="💰 Price Range by Airline", xaxis_title="airline", yaxis_title="price")
+            fig_box.update_xaxes(tickangle=45)
+            st.plotly_chart(fig_box, use_container_width=True)
 
 with tab3:
     st.markdown("### 🧠 AI-Powered Market Insights")
-    with st.spinner("🤖 Generating AI insights..."):
-        if len(df) > 0:
-            bullet_insights = generate_bullet_insights(df)
-        else:
-            bullet_insights = ["No data available for insights."]
+    bullet_insights = summary["bullet_insights"]
     st.markdown("""
     <div class="insight-box">
         <h4>🎯 Market Intelligence</h4>
@@ -390,30 +538,28 @@ with tab3:
     # Additional insights section
     st.markdown("#### 📊 Data-Driven Insights")
     
-    if len(df) > 0:
-        insights_col1, insights_col2 = st.columns(2)
-        
-        with insights_col1:
-            st.info(f"📈 **Peak Activity**: {len(df)} total flights tracked")
-            if 'airline' in df.columns:
-                top_airline = df['airline'].mode().iloc[0] if not df['airline'].mode().empty else "N/A"
-                st.info(f"🏆 **Leading Airline**: {top_airline}")
-        
-        with insights_col2:
-            if 'price' in df.columns and df['price'].notna().any():
-                price_trend = "📈 Rising" if np.random.choice([True, False]) else "📉 Declining"
-                st.info(f"💹 **Price Trend**: {price_trend}")
-            
-            if 'origin' in df.columns and 'destination' in df.columns:
-                total_routes = len(df[['origin', 'destination']].drop_duplicates())
-                st.info(f"🗺️ **Route Diversity**: {total_routes} unique routes")
+    insights_col1, insights_col2 = st.columns(2)
+    
+    with insights_col1:
+        st.info(f"📈 **Peak Activity**: {kpis['total_flights']} total flights tracked")
+        st.info(f"🏆 **Leading Airline**: {summary['top_airline']['airline'] or 'N/A'}")
+    
+    with insights_col2:
+        price_trend = {"rising": "📈 Rising", "declining": "📉 Declining"}.get(summary["price_trend"], "➖ Stable")
+        st.info(f"💹 **Price Trend**: {price_trend}")
+        st.info(f"🗺️ **Route Diversity**: {kpis['unique_routes']} unique routes")
 
 with tab4:
     st.markdown("### 🔍 Individual Flight Analysis")
     
-    if not df.empty and 'flight_number' in df.columns and df['flight_number'].notna().any():
-        flight_numbers = sorted(df['flight_number'].dropna().unique())
-        
+    # Candidates come from typeahead (or the page shown in Flight Data), never the whole dataset
+    flight_query = st.text_input("🔎 Find a flight number", help="Type the start of a flight number")
+    if flight_query:
+        flight_numbers = [s["value"] for s in fetch_search_suggestions(flight_query, limit=50) if s["type"] == "flight"]
+    else:
+        flight_numbers = page_df["flight_number"].dropna().tolist() if "flight_number" in page_df.columns else []
+    
+    if flight_numbers:
         col1, col2 = st.columns([2, 1])
         with col1:
             selected_flight = st.selectbox(
@@ -428,9 +574,7 @@ with tab4:
         if analyze_button and selected_flight:
             with st.spinner(f"🤖 Analyzing flight {selected_flight}..."):
                 flight_insight = fetch_flight_insights(selected_flight)
-            
-            # Display flight details
-            flight_details = df[df['flight_number'] == selected_flight].iloc[0]
+                flight_details = fetch_flight(selected_flight)
             
             st.markdown(f"#### ✈️ Flight {selected_flight} Details")
             
@@ -459,6 +603,32 @@ with tab4:
                     <p>{flight_insight}</p>
                 </div>
                 """, unsafe_allow_html=True)
+
+        # Batch analysis: one request, results rendered as each flight completes
+        st.markdown("#### 🧠 Batch Flight Analysis")
+        batch_col1, batch_col2 = st.columns([2, 1])
+        with batch_col1:
+            batch_flights = st.multiselect(
+                "🛫 Select Flights to Analyze Together",
+                flight_numbers,
+                max_selections=50,
+                help="Up to 50 flights, analyzed in a few AI calls"
+            )
+        with batch_col2:
+            batch_button = st.button("🔍 Analyze Selected Flights")
+
+        if batch_button and batch_flights:
+            with st.spinner(f"🤖 Analyzing {len(batch_flights)} flights..."):
+                for result in stream_batch_insights(batch_flights):
+                    label = f"Flight {result['flight_number']}" if result.get("flight_number") else "Batch"
+                    st.markdown(f"""
+                    <div class="insight-box">
+                        <h4>🧠 AI Analysis for {label}</h4>
+                        <p>{result.get("insights") or result.get("error", "")}</p>
+                    </div>
+                    """, unsafe_allow_html=True)
+    elif flight_query:
+        st.warning("No flight numbers start with that text.")
     else:
         st.warning("Flight number data not available for individual analysis.")
 
@@ -495,7 +665,7 @@ st.markdown(f"""
 # ======== Auto-refresh mechanism with countdown ========
 if auto_refresh:
     import streamlit.components.v1 as components
-    # Show a countdown timer for next refresh
+    # Show a countdown timer for the latest possible refresh; a pushed change reruns sooner
     countdown_html = """
     <script>
     let seconds = 30;
@@ -509,9 +679,9 @@ if auto_refresh:
     updateTimer();
     </script>
     <div style='text-align:center; color:#2a5298; font-size:1.1rem;'>
-        ⏳ Next refresh in <span id="refresh-timer">30s</span>
+        ⏳ Next refresh on the next change, or in <span id="refresh-timer">30s</span>
     </div>
     """
     components.html(countdown_html, height=40)
-    time.sleep(30)
+    wait_for_flight_change(None if airline_filter == "All" else airline_filter, timeout=30)
     st.rerun()
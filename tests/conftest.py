@@ -0,0 +1,11 @@
+# tests/conftest.py
+
+import os
+
+# Backend modules read these on import: no archive, no insight cache, no background ingest
+os.environ.setdefault("HISTORY_DB_PATH", "")
+os.environ.setdefault("INSIGHT_CACHE_PATH", "")
+os.environ.setdefault("BACKGROUND_INGEST", "false")
+os.environ.setdefault("UPSTREAM_MONTHLY_QUOTA", "0")
+os.environ.setdefault("UPSTREAM_QUOTA_PATH", "")
+os.environ.setdefault("SHARED_SNAPSHOT_DIR", "")
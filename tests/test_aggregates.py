@@ -0,0 +1,78 @@
+# tests/test_aggregates.py
+
+from collections import Counter
+
+from backend.aggregates import FlightAggregates
+from backend.analytics_engine import get_airline_distribution, get_price_stats
+from backend.flight_store import FlightStore
+from backend.normalizer import normalize_batch
+from benchmarks.upstream_stub import make_flight
+
+
+def ingest(times, total=100):
+    store = FlightStore()
+    aggregates = FlightAggregates()
+    store.subscribe(aggregates.apply)
+    raw = [make_flight(i) for i in range(total)]
+    for _ in range(times):
+        # Normalized afresh each time, like every ingest
+        store.sync(normalize_batch(raw))
+    return store, aggregates
+
+
+def test_reingesting_does_not_recount_top_routes():
+    _, once = ingest(1)
+    store, repeated = ingest(6)
+
+    assert repeated.route_hitters.total == once.route_hitters.total == len(store)
+    assert repeated.airline_hitters.total == once.airline_hitters.total == len(store)
+    assert repeated.top_routes(5, approximate=True) == once.top_routes(5, approximate=True)
+    # The approximate answer agrees with the exact one over the live store
+    assert [r["count"] for r in repeated.top_routes(5, approximate=True)] == \
+        [r["count"] for r in repeated.top_routes(5)]
+
+
+def test_reingesting_keeps_fare_quantiles():
+    _, once = ingest(1)
+    _, repeated = ingest(6)
+
+    assert repeated.price_quantiles("airline") == once.price_quantiles("airline")
+    assert all({"p50", "p90"} <= stats.keys() for stats in repeated.price_quantiles("airline").values())
+    assert repeated.price_quantiles("route") == once.price_quantiles("route")
+    assert sum(stats["count"] for stats in repeated.price_quantiles("airline").values()) == 100
+
+
+def test_repriced_flight_adds_one_fare():
+    store, aggregates = ingest(1, total=1)
+    flight = store.all()[0]
+    store.upsert(dict(flight, price=flight["price"] + 10))
+    store.upsert(dict(flight, price=flight["price"] + 10))
+
+    assert aggregates.price_quantiles("airline")[flight["airline"]]["count"] == 2
+    assert aggregates.route_hitters.total == 1
+
+
+def test_new_departure_is_a_new_sighting():
+    store, aggregates = ingest(1, total=1)
+    flight = dict(store.all()[0], departure_time="2030-01-01T10:00:00+00:00")
+    store.upsert(flight)
+
+    assert aggregates.route_hitters.total == 2
+    assert aggregates.flight_count == 1
+
+
+def test_live_aggregates_match_a_recount_after_changes():
+    store, aggregates = ingest(1)
+    flights = store.all()
+    cheapest = min(flights, key=lambda f: f["price"])
+    store.remove(cheapest["flight_number"])
+    store.upsert(dict(flights[1], status="cancelled", origin=flights[2]["origin"]))
+    store.upsert(dict(flights[3], price=flights[3]["price"] * 3))
+
+    flights = store.all()
+    routes = Counter(f"{f['origin']} → {f['destination']}" for f in flights)
+    assert {r["route"]: r["count"] for r in aggregates.top_routes(len(routes))} == routes
+    assert [r["count"] for r in aggregates.top_routes(5)] == [count for _, count in routes.most_common(5)]
+    assert aggregates.airline_distribution() == get_airline_distribution(flights)
+    assert aggregates.status_breakdown() == dict(Counter(f["status"] for f in flights))
+    assert aggregates.price_stats() == get_price_stats(flights)
@@ -0,0 +1,137 @@
+# tests/test_change_log.py
+
+from backend.change_log import ChangeLog
+from backend.flight_store import FlightStore
+from backend.normalizer import normalize_batch
+from benchmarks.upstream_stub import make_flight
+
+
+class Worker:
+    """
+    One shared-snapshot worker: a store and its change log, on the versions it installed.
+    """
+
+    def __init__(self):
+        self.store = FlightStore()
+        self.version = 0
+        self.log = ChangeLog(self.store, epoch="e1", version=lambda: self.version)
+
+    def install(self, flights, version):
+        self.store.sync(flights)
+        self.version = version
+
+
+def snapshot(generation, indexes):
+    return normalize_batch([make_flight(i, generation=generation, churn=0.3) for i in indexes])
+
+
+def test_cursor_from_one_worker_continues_at_another():
+    leader, follower = Worker(), Worker()
+    for worker in (leader, follower):
+        worker.install(snapshot(1, range(0, 50)), 1)
+    cursor = leader.log.cursor
+    assert cursor == follower.log.cursor == "e1.1"
+
+    for worker in (leader, follower):
+        worker.install(snapshot(2, range(10, 60)), 2)
+    from_leader = leader.log.since(cursor)
+    from_follower = follower.log.since(cursor)
+
+    assert not from_follower["reset"] and not from_follower["has_more"]
+    assert from_follower == from_leader
+    assert from_follower["cursor"] == "e1.2"
+    ops = {change["op"] for change in from_follower["changes"]}
+    assert {"upsert", "remove", "update"} <= ops
+
+
+def test_versioned_cursor_edges():
+    worker = Worker()
+    worker.install(snapshot(1, range(20)), 5)
+
+    # Ahead of this worker: nothing yet, and the reader keeps its cursor
+    assert worker.log.since("e1.6") == {"cursor": "e1.6", "reset": False, "changes": [], "has_more": False}
+    # A version this worker never held, or another deployment's, starts over
+    assert worker.log.since("e1.4")["reset"]
+    assert worker.log.since("e0.5")["reset"]
+
+    worker.install(snapshot(2, range(20)), 6)
+    partial = worker.log.since("e1.5", limit=1)
+    assert partial["has_more"] and partial["cursor"] == "e1.6"
+
+
+def test_resyncing_the_same_payload_records_no_changes():
+    worker = Worker()
+    raw = [make_flight(i) for i in range(10)]
+    raw.append({**make_flight(0, seed=3), "flight": raw[0]["flight"]})
+    worker.install(normalize_batch(raw), 1)
+    cursor = worker.log.cursor
+
+    worker.install(normalize_batch(raw), 2)
+    assert worker.log.since(cursor)["changes"] == []
+
+
+def test_changes_that_cancel_out_are_not_sent():
+    store = FlightStore()
+    log = ChangeLog(store)
+    flights = snapshot(1, range(3))
+    store.sync(flights)
+    cursor = log.cursor
+    first, second, third = flights
+
+    # Updated and back, added and gone again, removed and restored as it was
+    store.upsert({**first, "status": "cancelled"})
+    store.upsert(dict(first))
+    added = {**third, "flight_number": "ZZ1"}
+    store.upsert(added)
+    store.remove("ZZ1")
+    store.remove(second["flight_number"])
+    store.upsert(dict(second))
+    # Removed and restored with one field changed: an update of that field
+    store.remove(third["flight_number"])
+    store.upsert({**third, "price": third["price"] + 1})
+
+    assert log.since(cursor)["changes"] == [{
+        "op": "update", "flight_number": third["flight_number"], "fields": {"price": third["price"] + 1},
+    }]
+
+
+def test_polling_the_feed_keeps_a_copy_in_step():
+    store = FlightStore()
+    log = ChangeLog(store)
+    store.sync(snapshot(1, range(40)))
+    copy = {f["flight_number"]: dict(f) for f in store.all()}
+    cursor = log.cursor
+
+    for generation, indexes in ((2, range(5, 45)), (3, range(0, 30)), (4, range(0, 30))):
+        store.sync(snapshot(generation, indexes))
+        feed = log.since(cursor, limit=7)
+        while True:
+            for change in feed["changes"]:
+                if change["op"] == "upsert":
+                    copy[change["flight_number"]] = dict(change["flight"])
+                elif change["op"] == "update":
+                    copy[change["flight_number"]].update(change["fields"])
+                else:
+                    del copy[change["flight_number"]]
+            cursor = feed["cursor"]
+            if not feed["has_more"]:
+                break
+            feed = log.since(cursor, limit=7)
+
+        assert copy.keys() == {f["flight_number"] for f in store.all()}
+        for flight in store.all():
+            assert {k: copy[flight["flight_number"]][k] for k in ("status", "price")} == \
+                {k: flight[k] for k in ("status", "price")}
+
+
+def test_unknown_or_trimmed_cursors_reset():
+    store = FlightStore()
+    log = ChangeLog(store, max_entries=10)
+    assert log.since() == {"cursor": log.cursor, "reset": False, "changes": [], "has_more": False}
+
+    cursor = log.cursor
+    store.sync(snapshot(1, range(20)))
+    # Twenty changes do not fit in ten entries
+    assert log.since(cursor)["reset"]
+    assert log.since("elsewhere.3")["reset"]
+    assert not log.since(log.cursor)["reset"]
@@ -0,0 +1,39 @@
+# tests/test_dashboard_summary.py
+
+import numpy as np
+
+from backend.dashboard_summary import SummaryBuilder, build_summary
+from backend.normalizer import normalize_batch
+from benchmarks.upstream_stub import make_flight
+
+
+def flights(start, stop):
+    return normalize_batch([make_flight(i) for i in range(start, stop)])
+
+
+def test_small_snapshot_is_exact():
+    batch = flights(0, 200)
+    prices = np.asarray([f["price"] for f in batch])
+    summary = build_summary([batch])
+
+    counts, edges = np.histogram(prices, bins=20)
+    assert summary["price_histogram"] == {"edges": np.round(edges, 2).tolist(), "counts": counts.tolist()}
+    assert summary["kpis"]["avg_price"] == round(float(prices.mean()), 2)
+
+
+def test_archive_stream_stays_bounded():
+    builder = SummaryBuilder()
+    prices = {}
+    for start in range(0, 100_000, 10_000):
+        batch = flights(start, start + 10_000)
+        for flight in batch:
+            prices.setdefault(flight["airline"], []).append(flight["price"])
+        builder.add(batch)
+    summary = builder.result()
+
+    assert builder._prices.sketch.size < 3 * 1000
+    assert sum(summary["price_histogram"]["counts"]) == 100_000
+    for group in summary["price_by_airline"]:
+        assert builder._airline_prices[group["airline"]].sketch.size < 3 * 1000
+        # Within 2% of the fare range of the exact median
+        assert abs(group["median"] - np.median(prices[group["airline"]])) < 0.02 * 900
@@ -0,0 +1,29 @@
+# tests/test_data_fetcher.py
+
+import asyncio
+
+from backend import data_fetcher
+from benchmarks.upstream_stub import make_flight
+
+
+def test_ordered_pages_come_back_in_offset_order(monkeypatch):
+    total = 40
+
+    async def fetch_page(client, offset, page_size):
+        # Later pages answer first
+        await asyncio.sleep((total - offset) / 1000)
+        data = [make_flight(i) for i in range(offset, offset + page_size)]
+        return {"data": data, "pagination": {"total": total}}
+
+    async def run(ordered):
+        numbers = []
+        async for batch in data_fetcher.iter_flight_batches(
+            page_size=10, client=object(), strict=True, columnar=True, ordered=ordered
+        ):
+            numbers.extend(batch["flight_number"])
+        return numbers
+
+    monkeypatch.setattr(data_fetcher, "_fetch_page", fetch_page)
+    expected = [flight["flight"]["iata"] for flight in map(make_flight, range(total))]
+    assert asyncio.run(run(ordered=True)) == expected
+    assert asyncio.run(run(ordered=False)) != expected
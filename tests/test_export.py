@@ -0,0 +1,50 @@
+# tests/test_export.py
+
+import csv
+import io
+import json
+
+import pyarrow.parquet as pq
+import pytest
+
+from backend.export import EXPORT_COLUMNS, export_chunks
+from backend.normalizer import display, normalize_batch
+from benchmarks.upstream_stub import make_flight
+
+
+@pytest.fixture
+def batches():
+    flights = normalize_batch([make_flight(i) for i in range(25)])
+    return [flights[i:i + 10] for i in range(0, 25, 10)]
+
+
+def shown(batches):
+    return [{c: display(f).get(c) for c in EXPORT_COLUMNS} for batch in batches for f in batch]
+
+
+def test_one_chunk_per_batch(batches):
+    for format in ("csv", "ndjson"):
+        assert len(list(export_chunks(iter(batches), format))) == 3
+    # Parquet: a row group per batch, then the footer
+    assert len(list(export_chunks(iter(batches), "parquet"))) == 4
+
+
+def test_formats_round_trip(batches):
+    expected = shown(batches)
+
+    rows = list(csv.DictReader(io.StringIO(b"".join(export_chunks(batches, "csv")).decode())))
+    assert [row["flight_number"] for row in rows] == [f["flight_number"] for f in expected]
+    assert list(rows[0]) == list(EXPORT_COLUMNS)
+
+    lines = b"".join(export_chunks(batches, "ndjson")).decode().splitlines()
+    assert [json.loads(line) for line in lines] == json.loads(json.dumps(expected))
+
+    table = pq.read_table(io.BytesIO(b"".join(export_chunks(batches, "parquet"))))
+    assert table.num_rows == 25 and table.column_names == list(EXPORT_COLUMNS)
+    assert table.column("price").to_pylist() == [f["price"] for f in expected]
+
+
+def test_empty_export_still_has_a_header():
+    assert b"".join(export_chunks([], "csv")).decode().strip() == ",".join(EXPORT_COLUMNS)
+    assert list(export_chunks([], "ndjson")) == []
+    assert pq.read_table(io.BytesIO(b"".join(export_chunks([], "parquet")))).num_rows == 0
@@ -0,0 +1,37 @@
+# tests/test_flight_frame.py
+
+import pytest
+
+from backend import analytics_engine
+from backend.analytics_engine import get_airline_distribution, get_price_stats, get_top_routes
+from backend.flight_frame import FlightFrame
+from backend.normalizer import normalize_batch
+from benchmarks.upstream_stub import make_flight
+
+
+@pytest.fixture
+def flights():
+    flights = normalize_batch([make_flight(i) for i in range(500)])
+    # Unpriced flights stay out of the price stats
+    for flight in flights[::7]:
+        del flight["price"]
+    return flights
+
+
+@pytest.mark.parametrize("dense_limit", [analytics_engine._DENSE_ROUTE_LIMIT, 0])
+def test_frame_aggregates_match_the_record_path(flights, monkeypatch, dense_limit):
+    monkeypatch.setattr(analytics_engine, "_DENSE_ROUTE_LIMIT", dense_limit)
+    frame = FlightFrame.from_flights(flights)
+
+    assert len(frame) == len(flights)
+    # Same counts and the same tie order as Counter.most_common
+    assert get_top_routes(frame, 10) == get_top_routes(flights, 10)
+    assert get_airline_distribution(frame) == get_airline_distribution(flights)
+    assert get_price_stats(frame, quantiles=(0.5, 0.9)) == get_price_stats(flights, quantiles=(0.5, 0.9))
+
+
+def test_empty_frame():
+    frame = FlightFrame.from_flights([])
+    assert get_top_routes(frame) == []
+    assert get_airline_distribution(frame) == {}
+    assert get_price_stats(frame) == {"avg_price": 0, "min_price": 0, "max_price": 0}
@@ -0,0 +1,107 @@
+# tests/test_flight_store.py
+
+import pytest
+
+from backend.flight_store import FlightStore
+from backend.normalizer import normalize_batch
+from benchmarks.upstream_stub import make_flight
+
+
+def test_stores_synced_to_the_same_flights_page_alike():
+    flights = normalize_batch([make_flight(i) for i in range(40)])
+    fresh, seasoned = FlightStore(), FlightStore()
+    seasoned.sync(list(reversed(flights)) + normalize_batch([make_flight(i) for i in range(40, 60)]))
+    for store in (fresh, seasoned):
+        store.sync(flights)
+
+    assert [f["flight_number"] for f in seasoned.all()] == [f["flight_number"] for f in flights]
+    for query in ({}, {"airline": flights[0]["airline"]}, {"q": flights[0]["airline"][:3]},
+                  {"sort": "status", "page_size": 5}):
+        assert seasoned.query(**query) == fresh.query(**query)
+
+
+def test_resync_keeps_unchanged_records():
+    store = FlightStore()
+    first = store.sync(normalize_batch([make_flight(i, generation=1, churn=0.3) for i in range(40)]))
+    second = normalize_batch([make_flight(i, generation=2, churn=0.3) for i in range(40)])
+    kept = store.sync(second)
+
+    assert kept == second and store.all() == kept
+    assert all(k is (old if old == new else new) for k, old, new in zip(kept, first, second))
+    assert 0 < sum(k is old for k, old in zip(kept, first)) < len(kept)
+
+
+def test_resyncing_a_snapshot_with_repeated_flight_numbers_changes_nothing():
+    raw = [make_flight(i) for i in range(5)]
+    # The first flight again, on another date
+    raw.append({**make_flight(0, seed=3), "flight": raw[0]["flight"]})
+    store = FlightStore()
+    changes = []
+    store.subscribe(lambda previous, current: changes.append((previous, current)), replay=False)
+
+    store.sync(normalize_batch(raw))
+    first = normalize_batch(raw)
+    assert len(store) == 5
+    assert store.get(first[0]["flight_number"]) == max(first[0], first[5], key=lambda f: f["departure_ts"])
+
+    revision, changes[:] = store.revision, []
+    store.sync(normalize_batch(raw))
+    assert store.revision == revision
+    assert all(previous == current for previous, current in changes)
+
+
+def test_indexes_follow_updates_and_removals():
+    flights = normalize_batch([make_flight(i) for i in range(30)])
+    store = FlightStore()
+    store.upsert_many(flights)
+
+    for flight in flights:
+        assert store.get(flight["flight_number"]) is flight
+        assert flight in store.by_airline(flight["airline"])
+        assert flight in store.by_route(flight["origin"], flight["destination"])
+    assert sum(len(store.by_origin(origin)) for origin in {f["origin"] for f in flights}) == 30
+
+    moved = {**flights[0], "airline": "Elsewhere Air", "destination": "Nowhere"}
+    store.upsert(moved)
+    assert store.by_airline("Elsewhere Air") == [moved]
+    assert flights[0] not in store.by_airline(flights[0]["airline"])
+    assert store.by_route(moved["origin"], "Nowhere") == [moved]
+
+    store.remove(moved["flight_number"])
+    assert store.by_airline("Elsewhere Air") == []
+    assert not store.flight_numbers("airline", "Elsewhere Air")
+    assert len(store) == 29
+
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+@pytest.mark.parametrize("page", [1, 2, 9])
+def test_query_pages_match_a_full_sort(order, page):
+    flights = normalize_batch([make_flight(i) for i in range(200)])
+    for flight in flights[::10]:
+        flight["price"] = None
+    store = FlightStore()
+    store.sync(flights)
+
+    priced = sorted((f for f in flights if f["price"] is not None), key=lambda f: f["price"],
+                    reverse=order == "desc")
+    # Missing values sort last either way
+    ranked = priced + [f for f in flights if f["price"] is None]
+    matches, total = store.query(sort="price", order=order, page=page, page_size=10)
+    assert total == 200
+    assert [f["price"] for f in matches] == [f["price"] for f in ranked[(page - 1) * 10:page * 10]]
+
+
+def test_query_filters_intersect():
+    flights = normalize_batch([make_flight(i) for i in range(200)])
+    store = FlightStore()
+    store.sync(flights)
+    airline, status = flights[0]["airline"], flights[0]["status"]
+
+    expected = [f for f in flights if f["airline"] == airline and f["status"] == status]
+    matches, total = store.query(airline=airline, status=status, page_size=1000)
+    assert total == len(expected) and matches == expected
+
+    needle = flights[5]["flight_number"]
+    matches, total = store.query(q=needle.lower())
+    assert needle in [f["flight_number"] for f in matches]
+    assert store.query(airline=airline, origin="Nowhere") == ([], 0)
@@ -0,0 +1,19 @@
+# tests/test_history_store.py
+
+from backend.history_store import HistoryStore
+from backend.normalizer import normalize_columns
+from benchmarks.upstream_stub import make_flight
+
+
+def test_archive_keeps_integer_times(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+    columns = normalize_columns([make_flight(i) for i in range(10)])
+    assert store.append(columns) == 10
+
+    flights, total = store.query()
+    assert total == 10
+    by_number = {flight["flight_number"]: flight for flight in flights}
+    for i, number in enumerate(columns["flight_number"]):
+        assert by_number[number]["arrival_ts"] == columns["arrival_ts"][i]
+        assert by_number[number]["duration_minutes"] == columns["duration_minutes"][i]
+
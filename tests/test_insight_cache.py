@@ -0,0 +1,33 @@
+# tests/test_insight_cache.py
+
+import asyncio
+import os
+
+from backend.insight_cache import InsightCache
+
+
+def test_writes_are_batched_off_the_request_path(tmp_path):
+    path = str(tmp_path / "insights.json")
+
+    async def run():
+        cache = InsightCache(path=path, save_delay=0.05)
+        for i in range(100):
+            cache.set(f"key{i}", [f"insight {i}"])
+        written_at_once = os.path.exists(path)
+        await asyncio.sleep(0.2)
+        return written_at_once
+
+    assert not asyncio.run(run())
+    assert InsightCache(path=path).get("key99") == ["insight 99"]
+
+
+def test_flush_writes_pending_changes(tmp_path):
+    path = str(tmp_path / "insights.json")
+
+    async def run():
+        cache = InsightCache(path=path, save_delay=60)
+        cache.set("key", ["insight"])
+        await cache.flush()
+
+    asyncio.run(run())
+    assert InsightCache(path=path).get("key") == ["insight"]
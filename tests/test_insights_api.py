@@ -0,0 +1,30 @@
+# tests/test_insights_api.py
+
+import asyncio
+import json
+
+from backend import insights_api
+from backend.normalizer import normalize_batch
+from benchmarks.upstream_stub import make_flight
+
+
+def collect(flights):
+    async def run():
+        return [item async for item in insights_api.generate_batch_insights(flights)]
+    return asyncio.run(run())
+
+
+def test_non_text_answers_become_error_events(monkeypatch):
+    flights = normalize_batch([make_flight(i, seed=101) for i in range(3)])
+    numbers = [flight["flight_number"] for flight in flights]
+    answers = {numbers[0]: "Busy route, fares above average.", numbers[1]: {"route": "busy"}, numbers[2]: ["x"]}
+
+    async def complete(messages, max_tokens=300):
+        return json.dumps(answers)
+    monkeypatch.setattr(insights_api, "_complete", complete)
+
+    results = {item["flight_number"]: item["insights"] for item in collect(flights)}
+    assert results[numbers[0]] == "Busy route, fares above average."
+    assert results[numbers[1]].startswith("AI Insight error")
+    assert results[numbers[2]].startswith("AI Insight error")
+
@@ -0,0 +1,89 @@
+# tests/test_main.py
+
+import json
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.main import app
+from backend.normalizer import display, normalize_batch
+from benchmarks.upstream_stub import make_flight
+
+
+@pytest.mark.parametrize("path", ["/insights", "/insights/summary"])
+@pytest.mark.parametrize("limit", [0, 1001])
+def test_insights_limit_is_bounded(path, limit):
+    # Rejected before any upstream load or prompt is built
+    assert TestClient(app).get(path, params={"limit": limit}).status_code == 422
+
+
+def test_shared_mode_etag_follows_the_published_version(monkeypatch):
+    monkeypatch.setattr(main, "shared_snapshot", SimpleNamespace(epoch="e1"))
+    client = TestClient(app)
+    etag = client.get("/flights", params={"limit": 5}).headers["etag"]
+    assert etag.startswith('"e1.0-')
+
+    # Store revisions are per worker; they do not enter the validator
+    main.flight_store.revision += 7
+    assert client.get("/flights", params={"limit": 5}, headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_insights_summary_shows_the_flight_as_displayed(monkeypatch):
+    flights = normalize_batch([make_flight(i) for i in range(3)])
+
+    async def fetch(limit=50):
+        return flights
+
+    async def insights(flights):
+        return []
+
+    monkeypatch.setattr(main, "fetch_flight_data", fetch)
+    monkeypatch.setattr(main, "generate_insights", insights)
+    summary = TestClient(app).get("/insights/summary").json()["summary"]
+    assert summary["most_delayed_flight"] == json.loads(json.dumps(display(flights[0])))
+    assert "duration" in summary["most_delayed_flight"]
+
+
+def test_flights_page_size_is_capped_at_the_snapshot_size(monkeypatch):
+    loaded = []
+
+    async def fetch(limit=50):
+        loaded.append(limit)
+        return []
+
+    monkeypatch.setattr(main, "fetch_flight_data", fetch)
+    monkeypatch.setattr(main, "INGEST_MAX_FLIGHTS", 300)
+    client = TestClient(app)
+
+    body = client.get("/flights", params={"limit": 500}).json()
+    assert (body["page_size"], body["max_page_size"]) == (300, 300)
+    # A deeper page asks for a snapshot that reaches it
+    client.get("/flights", params={"page": 2, "page_size": 120})
+    assert loaded == [300, 240]
+
+
+def test_flights_revalidate_until_the_store_changes(monkeypatch):
+    async def fetch(limit=50):
+        return []
+
+    monkeypatch.setattr(main, "fetch_flight_data", fetch)
+    flights = normalize_batch([make_flight(i) for i in range(30)])
+    main.flight_store.sync(flights)
+    try:
+        client = TestClient(app)
+        headers = {"Accept": "application/vnd.apache.arrow.stream", "Accept-Encoding": "gzip"}
+        response = client.get("/flights", headers=headers)
+        assert response.headers["content-type"] == "application/vnd.apache.arrow.stream"
+        assert response.headers["content-encoding"] == "gzip"
+
+        etag = response.headers["etag"]
+        assert client.get("/flights", headers={**headers, "If-None-Match": etag}).status_code == 304
+        # Another representation is another validator
+        assert client.get("/flights", headers={"If-None-Match": etag}).status_code == 200
+
+        main.flight_store.upsert(dict(flights[0], price=flights[0]["price"] + 1))
+        assert client.get("/flights", headers={**headers, "If-None-Match": etag}).status_code == 200
+    finally:
+        main.flight_store.sync([])
@@ -0,0 +1,57 @@
+# tests/test_metrics.py
+
+import asyncio
+import re
+
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.metrics import server_timing, start_request, timed
+
+
+def test_stages_are_recorded_per_request():
+    async def request(name):
+        stages = start_request()
+        with timed("store"):
+            await asyncio.sleep(0)
+        with timed("store"):
+            pass
+        await asyncio.create_task(work(name))
+        return stages
+
+    async def work(name):
+        with timed(name):
+            await asyncio.sleep(0)
+
+    async def run():
+        return await asyncio.gather(request("a"), request("b"))
+
+    first, second = asyncio.run(run())
+    assert [stage for stage, _ in first] == ["store", "store", "a"]
+    assert [stage for stage, _ in second] == ["store", "store", "b"]
+
+    header = server_timing([("store", 0.001), ("encode", 0.0005), ("store", 0.002)], 0.01)
+    assert header == "store;dur=3.00, encode;dur=0.50, total;dur=10.00"
+
+
+def test_metrics_count_requests_by_route_template():
+    client = TestClient(app)
+    route = 'method="GET",route="/flights/{flight_number}"'
+
+    def scrape():
+        lines = client.get("/metrics").text.splitlines()
+        count = next((int(line.rsplit(" ", 1)[1]) for line in lines
+                      if line.startswith(f'http_requests_total{{{route},status="404"}} ')), 0)
+        buckets = [int(line.rsplit(" ", 1)[1]) for line in lines
+                   if line.startswith(f"http_request_duration_seconds_bucket{{{route},")]
+        return count, buckets
+
+    before, _ = scrape()
+    response = client.get("/flights/XX1")
+    assert response.status_code == 404
+    assert re.fullmatch(r"(\w+;dur=\d+\.\d\d, )*total;dur=\d+\.\d\d", response.headers["server-timing"])
+    client.get("/flights/XX2")
+
+    count, buckets = scrape()
+    assert count == before + 2
+    assert buckets == sorted(buckets) and buckets[-1] >= count
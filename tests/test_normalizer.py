@@ -0,0 +1,56 @@
+# tests/test_normalizer.py
+
+import pytest
+
+from backend.normalizer import display, epochs, normalize_batch, normalize_flight, parse_epoch
+
+TIMESTAMPS = [
+    ("2025-01-01T10:00:00+00:00", "2025-01-01T12:30:00+00:00"),
+    ("2025-01-01T10:00:00.000+00:00", "2025-01-01T12:30:00.000+00:00"),
+    ("2025-01-01T10:00:00Z", "2025-01-01T12:30:00Z"),
+    ("2025-01-01T10:00:00", "2025-01-01T12:30:00"),
+    ("2025-01-01T10:00:00+02:00", "2025-01-01T12:30:00.5+02:00"),
+]
+
+
+def raw(index, departure, arrival):
+    return {
+        "flight_status": "scheduled",
+        "departure": {"airport": "Dubai International", "scheduled": departure},
+        "arrival": {"airport": "Heathrow", "scheduled": arrival},
+        "airline": {"name": "Emirates"},
+        "flight": {"iata": f"EK{index}"},
+        "aircraft": {"iata": "A388"},
+    }
+
+
+@pytest.mark.parametrize("departure, arrival", TIMESTAMPS)
+def test_timestamp_forms_parse_like_parse_epoch(departure, arrival):
+    record = normalize_batch([raw(0, departure, arrival)])[0]
+
+    assert record["departure_ts"] == parse_epoch(departure)
+    assert record["arrival_ts"] == parse_epoch(arrival)
+    assert record["duration_minutes"] == 150
+    assert display(record)["duration"] == "2h 30m"
+
+
+def test_batch_matches_per_record_normalizer():
+    # Mixed forms in one batch, so the fallback has to land on the right rows
+    flights = [raw(i, *pair) for i, pair in enumerate(TIMESTAMPS)]
+    flights.append({"flight": {"iata": "EK99"}, "departure": None})
+
+    assert normalize_batch(flights) == [normalize_flight(flight) for flight in flights]
+    assert normalize_batch(flights)[-1]["duration_minutes"] is None
+
+
+def test_mock_prices_are_stable_and_spread():
+    flights = [raw(i, *TIMESTAMPS[0]) for i in range(1000)]
+    prices = [record["price"] for record in normalize_batch(flights)]
+
+    assert prices == [record["price"] for record in normalize_batch(flights)]
+    assert all(100 <= price < 1000 for price in prices)
+    assert max(prices) - min(prices) > 800
+
+
+def test_epochs_keeps_missing_values():
+    assert epochs(["N/A", None, "not a time"]) == [None, None, None]
@@ -0,0 +1,59 @@
+# tests/test_scheduler.py
+
+import asyncio
+
+from backend.scheduler import IngestScheduler
+from backend.snapshot_cache import SnapshotCache
+
+
+def test_failed_refreshes_do_not_stop_the_loop():
+    outcomes = iter([None, RuntimeError("upstream down"), RuntimeError("upstream down"), None])
+
+    async def refresh():
+        outcome = next(outcomes, None)
+        if outcome is not None:
+            raise outcome
+
+    async def run():
+        scheduler = IngestScheduler(refresh, interval=0.01, jitter=0)
+        await scheduler.start()
+        await asyncio.sleep(0.2)
+        running = scheduler.running
+        await scheduler.stop()
+        return scheduler, running
+
+    scheduler, running = asyncio.run(run())
+    assert running and not scheduler.running
+    assert scheduler.runs >= 4
+    assert scheduler.failures == 2
+    assert scheduler.consecutive_failures == 0
+    assert scheduler.last_error == "RuntimeError: upstream down"
+
+
+def test_pace_stretches_the_interval():
+    async def refresh():
+        pass
+
+    scheduler = IngestScheduler(refresh, interval=60, jitter=0.1, pace=lambda: 300)
+    assert scheduler.effective_interval == 300
+    assert all(270 <= scheduler.next_delay() <= 330 for _ in range(100))
+
+
+def test_scheduled_snapshots_are_served_without_loading():
+    loads = []
+
+    async def loader(limit):
+        loads.append(limit)
+        return list(range(limit))
+
+    async def run():
+        cache = SnapshotCache(loader, ttl=0, stale_ttl=0)
+        cache.managed = True
+        assert await cache.get(10) == []
+        await IngestScheduler(lambda: cache.refresh(100)).run_once()
+        cache.snapshot.fetched_at -= 3600
+        # However old, the scheduler's snapshot is served as is
+        return await cache.get(10)
+
+    assert asyncio.run(run()) == list(range(10))
+    assert loads == [100]
@@ -0,0 +1,55 @@
+# tests/test_search_index.py
+
+import pytest
+
+from backend.flight_store import FlightStore
+from backend.normalizer import normalize_batch
+from backend.search_index import SearchIndex
+from benchmarks.upstream_stub import make_flight
+
+
+@pytest.fixture
+def store():
+    store = FlightStore()
+    SearchIndex(store)
+    store.sync(normalize_batch([make_flight(i) for i in range(300)]))
+    return store
+
+
+def brute_force(store, text):
+    needle = text.lower()
+    return {
+        f["flight_number"] for f in store.all()
+        if f["flight_number"].lower().startswith(needle)
+        or any(needle in f[field].lower() for field in ("airline", "origin", "destination"))
+    }
+
+
+def test_matches_agree_with_a_scan(store):
+    flight = store.all()[7]
+    for text in (flight["flight_number"], flight["flight_number"][:3], flight["airline"][1:5].upper(),
+                 flight["origin"][-4:], "a", "zzz"):
+        assert store.text_index.matching_flight_numbers(text) == brute_force(store, text)
+
+
+def test_search_highlights_and_limits(store):
+    flight = store.all()[0]
+    found = store.text_index.search(flight["airline"][:4], limit=5)
+    assert len(found["results"]) == 5 and found["has_more"]
+    for hit in found["results"]:
+        assert hit["highlights"]["airline"][0] == [0, 4]
+
+    number = store.text_index.search(flight["flight_number"])["results"][0]
+    assert number["flight"]["flight_number"] == flight["flight_number"]
+    assert number["highlights"]["flight_number"] == [[0, len(flight["flight_number"])]]
+
+
+def test_removed_names_leave_the_index(store):
+    flights = store.all()
+    airline = flights[0]["airline"]
+    for flight in flights:
+        if flight["airline"] == airline:
+            store.remove(flight["flight_number"])
+
+    assert not any(s["value"] == airline for s in store.text_index.suggest(airline))
+    assert store.text_index.matching_flight_numbers(airline) == brute_force(store, airline)
@@ -0,0 +1,30 @@
+# tests/test_shared_snapshot.py
+
+import os
+
+from backend.normalizer import display, normalize_batch
+from backend.shared_snapshot import SharedSnapshot, SnapshotFollower
+from backend.wire_format import PublishedFlights, dumps, to_json
+from benchmarks.upstream_stub import make_flight
+
+
+def test_workers_share_one_epoch(tmp_path):
+    first, second = SharedSnapshot(str(tmp_path)), SharedSnapshot(str(tmp_path))
+    assert first.epoch == second.epoch
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_flight_bodies_come_from_the_published_file(tmp_path):
+    shared = SharedSnapshot(str(tmp_path))
+    name = shared.publish(normalize_batch([make_flight(i) for i in range(30)]), 1, 30, 0.0)
+
+    flights, encoded, version, _, _ = SnapshotFollower(shared, None, None, lambda: 0)._read(name)
+    bodies = PublishedFlights()
+    bodies.install(flights, encoded)
+    assert version == 1 and len(bodies) == 30
+    served = to_json([bodies.get(flight) for flight in flights], {})
+    assert served == to_json([dumps(display(flight)) for flight in flights], {})
+
+    # A flight other than the installed one is encoded afresh
+    changed = {**flights[0], "status": "cancelled"}
+    assert bodies.get(changed) == dumps(display(changed))
@@ -0,0 +1,76 @@
+# tests/test_snapshot_cache.py
+
+import asyncio
+
+import pytest
+
+from backend.snapshot_cache import SnapshotCache
+
+
+class Loader:
+    def __init__(self):
+        self.calls = []
+        self.fail = False
+
+    async def __call__(self, limit):
+        self.calls.append(limit)
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise RuntimeError("upstream down")
+        return list(range(limit))
+
+
+def test_concurrent_misses_share_one_load():
+    loader = Loader()
+    cache = SnapshotCache(loader, min_limit=100)
+
+    async def run():
+        return await asyncio.gather(*(cache.get(limit) for limit in (10, 50, 100)))
+
+    results = asyncio.run(run())
+    assert loader.calls == [100]
+    assert [len(flights) for flights in results] == [10, 50, 100]
+    # Smaller limits are served from the larger snapshot
+    assert len(asyncio.run(cache.get(20))) == 20
+    assert loader.calls == [100]
+    assert cache.stats()["hits"] == 1
+
+
+def test_stale_snapshot_is_served_while_one_refresh_runs():
+    loader = Loader()
+    cache = SnapshotCache(loader, ttl=60, stale_ttl=240)
+
+    async def run():
+        await cache.get(10)
+        cache.snapshot.fetched_at -= 120
+        stale = await asyncio.gather(cache.get(10), cache.get(5))
+        await asyncio.sleep(0.05)
+        return stale
+
+    stale = asyncio.run(run())
+    assert [len(flights) for flights in stale] == [10, 5]
+    assert loader.calls == [10, 10]
+    assert cache.snapshot.version == 2
+    assert cache.stats()["stale_hits"] == 2
+
+
+def test_failed_load_falls_back_to_the_last_snapshot():
+    loader = Loader()
+    cache = SnapshotCache(loader, ttl=0, stale_ttl=0, error_ttl=60)
+
+    async def run():
+        await cache.get(10)
+        loader.fail = True
+        # The first miss tries upstream, the next ones within error_ttl do not
+        return [await cache.get(10) for _ in range(3)]
+
+    assert [len(flights) for flights in asyncio.run(run())] == [10, 10, 10]
+    assert loader.calls == [10, 10]
+    assert cache.stats()["fallbacks"] == 3
+
+
+def test_first_load_failure_is_raised():
+    loader = Loader()
+    loader.fail = True
+    with pytest.raises(RuntimeError):
+        asyncio.run(SnapshotCache(loader).get(10))
@@ -0,0 +1,81 @@
+# tests/test_stream_hub.py
+
+import asyncio
+import json
+
+from backend import stream_hub
+from backend.aggregates import FlightAggregates
+from backend.flight_store import FlightStore
+from backend.normalizer import normalize_batch
+from backend.stream_hub import StreamHub
+from benchmarks.upstream_stub import make_flight
+
+
+def test_only_net_changes_are_pushed():
+    async def run():
+        store = FlightStore()
+        hub = StreamHub(store, FlightAggregates())
+        subscriber = hub.subscribe()
+        raw = [make_flight(i) for i in range(10)]
+        store.sync(normalize_batch(raw))
+        await asyncio.sleep(0)
+        first = list(subscriber.queue)
+        subscriber.queue.clear()
+
+        # The same payload again, then a flight updated and put back within one batch
+        store.sync(normalize_batch(raw))
+        flight = store.all()[0]
+        store.upsert({**flight, "status": "cancelled"})
+        store.upsert(dict(flight))
+        await asyncio.sleep(0)
+        return first, list(subscriber.queue)
+
+    first, again = asyncio.run(run())
+    assert len(first) == 1 and b'"op":"upsert"' in first[0]
+    assert again == []
+
+
+def pushed(subscriber):
+    messages = [json.loads(message.split(b"data: ", 1)[1]) for message in subscriber.queue]
+    subscriber.queue.clear()
+    return [change for message in messages for change in message["changes"]]
+
+
+def test_subscribers_get_the_changes_their_filters_match(monkeypatch):
+    monkeypatch.setattr(stream_hub, "STREAM_MAX_QUEUED", 2)
+
+    async def run():
+        store = FlightStore()
+        aggregates = FlightAggregates()
+        store.subscribe(aggregates.apply)
+        hub = StreamHub(store, aggregates)
+        flights = normalize_batch([make_flight(i) for i in range(30)])
+        airline = flights[0]["airline"]
+        everyone, filtered, same = hub.subscribe(), hub.subscribe(airline=airline), hub.subscribe(airline=airline)
+        assert filtered.group is same.group and hub.subscribers == 3
+
+        store.sync(flights)
+        await asyncio.sleep(0)
+        assert len(pushed(everyone)) == 30
+        assert {c["flight"]["airline"] for c in pushed(filtered)} == {airline}
+
+        # A flight leaving the filter is news to it too
+        store.upsert(dict(flights[0], airline="Elsewhere Air"))
+        await asyncio.sleep(0)
+        assert [c["flight_number"] for c in pushed(filtered)] == [flights[0]["flight_number"]]
+        pushed(same)
+
+        # Three batches unread by a queue of two: dropped, and told to resync
+        ours = next(flight for flight in flights[1:] if flight["airline"] == airline)
+        for price in (1, 2, 3):
+            store.upsert(dict(ours, price=price))
+            await asyncio.sleep(0)
+        latest = same.aggregates
+        hub.unsubscribe(everyone)
+        return same, latest, hub
+
+    same, latest, hub = asyncio.run(run())
+    assert same.overflowed and not same.queue
+    # Only the latest aggregates are kept
+    assert json.loads(latest.split(b"data: ", 1)[1])["flight_count"] == 30
+    assert hub.overflows >= 1 and hub.subscribers == 2
@@ -0,0 +1,139 @@
+# tests/test_upstream_client.py
+#
+# The upstream client layer against the fault-injecting local stub.
+
+import asyncio
+import random
+import time
+
+import httpx
+import pytest
+
+from backend.upstream_client import CircuitBreaker, QuotaTracker, UpstreamClient, UpstreamUnavailable
+from benchmarks.upstream_stub import start_stub_server
+
+PARAMS = {"limit": 10, "offset": 0}
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(**faults):
+        server, url = start_stub_server(total=50, **faults)
+        servers.append(server)
+        return server.RequestHandlerClass.received, url
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+def make_client(limit=0, threshold=5, reset_timeout=60.0, **options):
+    options = {"max_retries": 3, "backoff": 0.01, "backoff_max": 2.0, **options}
+    return UpstreamClient(QuotaTracker(limit), CircuitBreaker(threshold, reset_timeout), **options)
+
+
+def get(upstream, url):
+    async def run():
+        async with httpx.AsyncClient(timeout=5) as client:
+            return await upstream.get(client, url, PARAMS)
+    return asyncio.run(run())
+
+
+def seed_throttling_first_request_only(rate=0.5):
+    # The stub rolls one number per request from Random(seed)
+    for seed in range(1000):
+        rng = random.Random(seed)
+        if rng.random() < rate <= rng.random():
+            return seed
+
+
+def test_429_is_retried_after_retry_after(stub):
+    received, url = stub(throttle_rate=0.5, seed=seed_throttling_first_request_only())
+    upstream = make_client()
+
+    start = time.monotonic()
+    data = get(upstream, url)
+    assert len(data["data"]) == 10
+    assert received[0] == 2 and upstream.retries == 1
+    # The stub asks for Retry-After: 1, far above the jittered backoff
+    assert time.monotonic() - start >= 1.0
+
+
+def test_retry_after_beyond_backoff_max_is_not_waited_for(stub):
+    received, url = stub(throttle_rate=1.0)
+    upstream = make_client(backoff_max=0.5)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        get(upstream, url)
+    assert received[0] == 1
+
+
+def test_outage_opens_then_half_open_trial_closes_circuit(stub):
+    received, url = stub(outage=(0, 1.0))
+    upstream = make_client(threshold=2, reset_timeout=0.3, max_retries=1)
+
+    for _ in range(2):
+        with pytest.raises(httpx.HTTPStatusError):
+            get(upstream, url)
+    assert upstream.breaker.state == "open"
+    assert received[0] == 4
+
+    # Open: rejected without a request
+    with pytest.raises(UpstreamUnavailable) as rejected:
+        get(upstream, url)
+    assert rejected.value.reason == "circuit_open"
+    assert received[0] == 4
+
+    # Half-open during the outage: the one trial fails and reopens the circuit
+    time.sleep(0.35)
+    with pytest.raises(httpx.HTTPStatusError):
+        get(upstream, url)
+    assert upstream.breaker.state == "open" and upstream.breaker.opens == 2
+
+    # Outage over: the next trial succeeds and closes it
+    time.sleep(1.0)
+    assert get(upstream, url)["data"]
+    assert upstream.breaker.state == "closed"
+
+
+def test_monthly_quota_paces_requests(stub):
+    received, url = stub()
+    upstream = make_client(limit=1000, burst=2, max_wait=0.0)
+
+    get(upstream, url)
+    get(upstream, url)
+    # A thousand requests a month is one every ~45 minutes once the burst is spent
+    with pytest.raises(UpstreamUnavailable) as rejected:
+        get(upstream, url)
+    assert rejected.value.reason == "rate_limited"
+    assert received[0] == 2
+    assert upstream.min_interval(1) > 60
+
+
+def test_usage_limit_reached_stops_requests(stub):
+    received, url = stub(quota=1)
+    upstream = make_client()
+
+    get(upstream, url)
+    with pytest.raises(httpx.HTTPStatusError):
+        get(upstream, url)
+    with pytest.raises(UpstreamUnavailable) as rejected:
+        get(upstream, url)
+    assert rejected.value.reason == "quota_exhausted"
+    assert received[0] == 2
+
+
+def test_quota_count_is_written_once_per_interval(tmp_path):
+    path = tmp_path / "quota.json"
+
+    async def run():
+        quota = QuotaTracker(100, str(path), save_interval=60)
+        for _ in range(20):
+            quota.record()
+        # Nothing written on the request path
+        assert not path.exists()
+        await quota.flush()
+
+    asyncio.run(run())
+    assert QuotaTracker(100, str(path)).used == 20
@@ -0,0 +1,45 @@
+# tests/test_wire_format.py
+
+import gzip
+import json
+
+import pyarrow as pa
+
+from backend.normalizer import display, normalize_batch
+from backend.wire_format import (
+    ARROW_STREAM, COLUMNAR_JSON, JSON, choose_encoding, choose_format, compress, encode_flights
+)
+from benchmarks.upstream_stub import make_flight
+
+ENVELOPE = {"total_count": 40, "page": 1}
+
+
+def test_every_format_carries_the_same_flights():
+    flights = normalize_batch([make_flight(i) for i in range(40)])
+    expected = json.loads(json.dumps([display(f) for f in flights]))
+
+    body = json.loads(encode_flights(flights, ENVELOPE, JSON))
+    assert body["flights"] == expected and body["total_count"] == 40
+
+    body = json.loads(encode_flights(flights, ENVELOPE, COLUMNAR_JSON))
+    columns = {
+        name: [body["dictionaries"][name][code] for code in values] if name in body["dictionaries"] else values
+        for name, values in body["columns"].items()
+    }
+    assert body["length"] == 40 and body["page"] == 1
+    assert [{name: columns[name][i] for name in columns} for i in range(40)] == expected
+    # Airline names repeat, so they travel as dictionary codes
+    assert "airline" in body["dictionaries"]
+
+    table = pa.ipc.open_stream(encode_flights(flights, ENVELOPE, ARROW_STREAM)).read_all()
+    assert json.loads(table.schema.metadata[b"envelope"]) == ENVELOPE
+    assert table.to_pylist() == expected
+
+
+def test_negotiation():
+    assert choose_format("application/json;q=0.5, application/vnd.apache.arrow.stream") == ARROW_STREAM
+    assert choose_format(ARROW_STREAM, requested="columnar") == COLUMNAR_JSON
+    assert choose_format("text/html") == JSON
+    assert choose_encoding("gzip, br;q=0") == "gzip"
+    assert choose_encoding("identity") is None
+    assert gzip.decompress(compress(b"x" * 2000, "gzip")) == b"x" * 2000